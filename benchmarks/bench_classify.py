@@ -0,0 +1,139 @@
+"""Benchmark keyword classification: legacy any(word in text) chains vs KeywordClassifier.
+
+Run from the repository root:
+    python benchmarks/bench_classify.py [--texts N] [--repeat N] [--check]
+
+The legacy functions below are the pre-change subject chain of
+generate_content_from_user_description and the first-substring-wins theme
+lookup, so both classify the same synthetic descriptions. The disagreement
+column counts texts where the two differ, mostly substring false positives
+such as "cat" in "education". The "prompt" row looks each text up three
+times, as the palette, placeholder and caption templates do for one prompt.
+
+--check classifies every line of benchmarks/classify_corpus.jsonl and exits
+non-zero if any subject or theme differs from the recorded one.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instagen.classify import SUBJECTS, THEMES  # noqa: E402
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "classify_corpus.jsonl")
+
+LEGACY_SUBJECTS = [
+    ("food", ['food', 'pizza', 'burger', 'cake', 'coffee', 'drink', 'meal', 'dish', 'restaurant', 'cooking', 'bread', 'fruit', 'vegetable', 'dessert', 'lunch', 'dinner', 'breakfast', 'eat', 'delicious', 'tasty', 'yummy', 'hungry', 'recipe']),
+    ("people", ['person', 'people', 'man', 'woman', 'child', 'baby', 'face', 'smiling', 'portrait', 'selfie', 'group', 'family', 'friends', 'me', 'myself', 'us', 'together', 'smile', 'happy', 'photo']),
+    ("nature", ['nature', 'tree', 'forest', 'mountain', 'sky', 'sunset', 'sunrise', 'beach', 'ocean', 'river', 'park', 'garden', 'flower', 'plant', 'outdoor', 'landscape', 'scenery', 'view', 'beautiful', 'green', 'blue']),
+    ("animal", ['dog', 'cat', 'animal', 'pet', 'bird', 'horse', 'wildlife', 'puppy', 'kitten', 'cute', 'furry', 'paws', 'tail', 'ears']),
+    ("vehicle", ['car', 'bike', 'motorcycle', 'truck', 'vehicle', 'transport', 'road', 'driving', 'ride', 'wheels', 'engine', 'speed']),
+    ("architecture", ['building', 'house', 'architecture', 'city', 'urban', 'street', 'bridge', 'tower', 'modern', 'construction', 'home', 'office', 'structure']),
+    ("technology", ['phone', 'computer', 'tech', 'device', 'gadget', 'electronic', 'screen', 'digital', 'laptop', 'tablet', 'camera', 'headphones']),
+    ("fashion", ['outfit', 'clothes', 'fashion', 'style', 'dress', 'shirt', 'shoes', 'accessories', 'look', 'wearing', 'ootd']),
+]
+LEGACY_THEMES = ["sunset", "sunrise", "ocean", "forest", "mountain", "flower", "coffee", "city", "cat", "dog",
+                 "food", "fire", "sky", "night", "gold", "winter"]
+
+FILLER = ["a", "the", "with", "on", "in", "of", "and", "bright", "soft", "light", "shot", "close", "up", "old",
+          "new", "small", "large", "wooden", "table", "window", "morning", "corner", "against", "warm"]
+# Words that contain keywords without meaning them ("cat" in "education", "car" in "card")
+TRAPS = ["education", "card", "scary", "usual", "scatter", "carpet", "theme", "because", "category", "concert"]
+
+
+def legacy_subject(text):
+    text = text.lower().strip()
+    for category, words in LEGACY_SUBJECTS:
+        if any(word in text for word in words):
+            return category
+    return None
+
+
+def legacy_theme(text, among=LEGACY_THEMES):
+    text = text.lower()
+    for keyword in among:
+        if keyword in text:
+            return keyword
+    return None
+
+
+def synthetic_texts(count, seed=7):
+    """Short image descriptions mixing keywords of every category with filler"""
+    rng = random.Random(seed)
+    keywords = [word for _, words in LEGACY_SUBJECTS for word in words] + LEGACY_THEMES
+    texts = []
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(5, 18)) + rng.choices(keywords, k=rng.randint(0, 3))
+        if rng.random() < 0.2:
+            words.append(rng.choice(TRAPS))
+        rng.shuffle(words)
+        texts.append(" ".join(words))
+    return texts
+
+
+# Themes known to each template lookup made for one prompt (None: every theme)
+PROMPT_LOOKUPS = [None, ("sunset", "ocean", "sky"), ("gold",)]
+
+
+def legacy_prompt(text):
+    return [legacy_theme(text, among or LEGACY_THEMES) for among in PROMPT_LOOKUPS]
+
+
+def prompt_themes(text):
+    return [THEMES.best(text, among) for among in PROMPT_LOOKUPS]
+
+
+def best_of(fn, repeat):
+    """Return the fastest of `repeat` runs in milliseconds, and the last result"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), result
+
+
+def check_corpus():
+    """Return a message for every corpus line whose classification changed"""
+    failures = []
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        for line in f:
+            case = json.loads(line)
+            got = {"subject": SUBJECTS.best(case["text"]), "theme": THEMES.best(case["text"])}
+            for field in ("subject", "theme"):
+                if got[field] != case[field]:
+                    failures.append(f"{case['text']!r}: {field} {got[field]!r}, expected {case[field]!r}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword classification")
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="verify benchmarks/classify_corpus.jsonl")
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.texts)
+    print(f"{'classifier':<10} {'legacy ms':>10} {'new ms':>8} {'speedup':>8} {'disagree':>9}")
+    rows = [("subject", legacy_subject, SUBJECTS.best), ("theme", legacy_theme, THEMES.best),
+            ("prompt", legacy_prompt, prompt_themes)]
+    for label, legacy, new in rows:
+        legacy_ms, legacy_results = best_of(lambda: [legacy(text) for text in texts], args.repeat)
+        new_ms, new_results = best_of(lambda: [new(text) for text in texts], args.repeat)
+        disagree = sum(a != b for a, b in zip(legacy_results, new_results)) / len(texts)
+        print(f"{label:<10} {legacy_ms:>10.1f} {new_ms:>8.1f} {legacy_ms / new_ms:>7.1f}x {disagree:>8.1%}")
+
+    if args.check:
+        failures = check_corpus()
+        for failure in failures:
+            print(f"MISMATCH {failure}")
+        if failures:
+            sys.exit(1)
+        print("regression corpus matches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark upload colour analysis: full-resolution np.mean vs the palette engine.
+
+Run from the repository root:
+    python benchmarks/bench_palette.py [--repeat N]
+
+The legacy path is what the colour fallbacks did before: decode the upload,
+convert every pixel to a NumPy array and average it. The new path is
+palette_for_upload() on the same bytes, first uncached and then as a cache
+hit, and extract_palette() on an image that is already decoded. Peak memory
+is the tracemalloc peak of one run. Sources are the synthetic photos of
+bench_vision_input.py.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_vision_input import SOURCES, encode_source, synthetic_photo  # noqa: E402
+from instagen import palette as palette_module  # noqa: E402
+from instagen.palette import extract_palette, palette_for_upload  # noqa: E402
+
+
+def legacy_average(data):
+    """Pre-change path: full-resolution array, mean over every pixel"""
+    return np.mean(np.array(Image.open(io.BytesIO(data))), axis=(0, 1))
+
+
+def uncached_palette(data):
+    palette_module._palettes.clear()
+    return palette_for_upload(data)
+
+
+def best_of(fn, repeat):
+    """Return the fastest of `repeat` runs in milliseconds, and the last result"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), result
+
+
+def peak_mb(fn):
+    """Peak traced allocation of one call, in megabytes"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark upload palette extraction")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'source':<22} {'legacy ms':>10} {'legacy MB':>10} {'new ms':>8} {'new MB':>8} "
+          f"{'cached ms':>10} {'decoded ms':>11}  palette")
+    for label, (width, height), image_format, orientation in SOURCES:
+        data = encode_source(synthetic_photo(width, height), image_format, orientation)
+        legacy_ms, _ = best_of(lambda: legacy_average(data), args.repeat)
+        legacy_mb = peak_mb(lambda: legacy_average(data))
+        new_ms, palette = best_of(lambda: uncached_palette(data), args.repeat)
+        new_mb = peak_mb(lambda: uncached_palette(data))
+        cached_ms, _ = best_of(lambda: palette_for_upload(data), args.repeat)
+        decoded = Image.open(io.BytesIO(data))
+        decoded.load()
+        decoded_ms, _ = best_of(lambda: extract_palette(decoded), args.repeat)
+        print(f"{label:<22} {legacy_ms:>10.1f} {legacy_mb:>10.1f} {new_ms:>8.1f} {new_mb:>8.2f} "
+              f"{cached_ms:>10.3f} {decoded_ms:>11.1f}  {palette.tone()}")
+
+
+if __name__ == "__main__":
+    main()
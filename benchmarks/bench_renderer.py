@@ -0,0 +1,113 @@
+"""Benchmark the NumPy renderer against the original per-primitive PIL loop.
+
+Run from the repository root:
+    python benchmarks/bench_renderer.py [--repeat N]
+
+The legacy implementation below is the pre-vectorization
+create_ai_style_background, generalised from a fixed 512 px canvas to any
+size so both renderers can be compared at 512 px and 1080x1350. The legacy
+loop keeps its fixed 20-100 px shapes, while the new renderer scales shapes
+with the canvas, so at 1080x1350 the shape styles fill about 4x the pixels.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instagen.renderer import render_background  # noqa: E402
+
+STYLES = ["realistic", "artistic", "cartoon", "vintage", "modern"]
+SIZES = [(512, 512), (1080, 1350)]
+PALETTE = [(255, 165, 0), (255, 69, 0), (255, 20, 147), (138, 43, 226)]
+
+
+def blend_colors(color1, color2, ratio):
+    return (
+        int(color1[0] * (1 - ratio) + color2[0] * ratio),
+        int(color1[1] * (1 - ratio) + color2[1] * ratio),
+        int(color1[2] * (1 - ratio) + color2[2] * ratio)
+    )
+
+
+def legacy_render(colors, style, width, height, seed):
+    """Original one-draw-call-per-primitive renderer"""
+    img = Image.new('RGB', (width, height), color='white')
+    draw = ImageDraw.Draw(img)
+    random.seed(seed)
+
+    if style == "realistic":
+        for y in range(height):
+            draw.line([(0, y), (width, y)], fill=blend_colors(colors[0], colors[1], y / height))
+    elif style == "artistic":
+        for _ in range(20):
+            x = random.randint(0, width)
+            y = random.randint(0, height)
+            size = random.randint(20, 100)
+            color = random.choice(colors)
+            draw.ellipse([x - size // 2, y - size // 2, x + size // 2, y + size // 2], fill=color)
+    elif style == "cartoon":
+        for _ in range(15):
+            x = random.randint(50, width - 50)
+            y = random.randint(50, height - 50)
+            size = random.randint(30, 80)
+            color = random.choice(colors)
+            shape_type = random.choice(['circle', 'square', 'triangle'])
+            if shape_type == 'circle':
+                draw.ellipse([x - size // 2, y - size // 2, x + size // 2, y + size // 2], fill=color)
+            elif shape_type == 'square':
+                draw.rectangle([x - size // 2, y - size // 2, x + size // 2, y + size // 2], fill=color)
+    elif style == "vintage":
+        base_color = colors[0]
+        for y in range(0, height, 4):
+            for x in range(0, width, 4):
+                noise = random.randint(-20, 20)
+                color = (
+                    max(0, min(255, base_color[0] + noise)),
+                    max(0, min(255, base_color[1] + noise)),
+                    max(0, min(255, base_color[2] + noise))
+                )
+                draw.rectangle([x, y, x + 4, y + 4], fill=color)
+    else:
+        stripe = height // 8
+        for i in range(8):
+            draw.rectangle([0, i * stripe, width, (i + 1) * stripe], fill=colors[i % len(colors)])
+    return img
+
+
+def best_of(fn, repeat):
+    """Return the fastest of `repeat` runs in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the background renderers")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':>10}  {'style':<10} {'legacy ms':>10} {'new ms':>10} {'speedup':>8}  deterministic")
+    for width, height in SIZES:
+        legacy_total = numpy_total = 0.0
+        for style in STYLES:
+            legacy_ms = best_of(lambda: legacy_render(PALETTE, style, width, height, 42), args.repeat)
+            numpy_ms = best_of(lambda: render_background(PALETTE, style, width, height, 42), args.repeat)
+            same = (render_background(PALETTE, style, width, height, 42).tobytes()
+                    == render_background(PALETTE, style, width, height, 42).tobytes())
+            legacy_total += legacy_ms
+            numpy_total += numpy_ms
+            print(f"{width}x{height:<5} {style:<10} {legacy_ms:>10.2f} {numpy_ms:>10.2f} "
+                  f"{legacy_ms / numpy_ms:>7.1f}x  {same}")
+        print(f"{width}x{height:<5} {'all':<10} {legacy_total:>10.2f} {numpy_total:>10.2f} "
+              f"{legacy_total / numpy_total:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
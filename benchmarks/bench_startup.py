@@ -0,0 +1,166 @@
+"""Measure cold-start import time and per-page rerun time of the Streamlit app.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py [--repeat N] [--check]
+
+Import time runs model.py's import block in a fresh interpreter under
+`python -X importtime`, reporting the wall time and the slowest top-level
+packages. Rerun time drives model.py through streamlit.testing.AppTest in a
+scratch copy of the repo (so the history files are not touched): the first
+run of a fresh worker, then the best of N reruns on each page. Only the script
+itself is timed, not AppTest's own polling.
+
+With --check the numbers are compared against benchmarks/startup_budget.json
+and the script exits non-zero on any overrun, so CI can run it as a gate.
+"""
+import argparse
+import ast
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(REPO_ROOT, "benchmarks", "startup_budget.json")
+PAGES = ["Trending Dashboard", "Content Generator", "Image Generator", "History",
+         "History Analytics", "Post to Instagram"]
+
+
+def model_imports():
+    """Source of model.py's module-level import statements"""
+    with open(os.path.join(REPO_ROOT, "model.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def import_times(code):
+    """Run `code` in a fresh interpreter under -X importtime; return (stdout, stderr lines)"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True)
+    return completed.stdout, completed.stderr.splitlines()
+
+
+def measure_imports(source, baseline):
+    """Wall milliseconds and {package: cumulative ms} for one cold import of `source`
+
+    Packages in `baseline` are loaded by interpreter startup and are left out.
+    """
+    code = ("import time\nstarted = time.perf_counter()\n" + source +
+            "\nprint((time.perf_counter() - started) * 1000)")
+    stdout, lines = import_times(code)
+    packages = {}
+    for line in lines:
+        # "import time:  self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # Nested imports are indented
+            name = name.strip().split(".")[0]
+            if name not in baseline:
+                packages[name] = packages.get(name, 0) + int(cumulative) / 1000
+    return float(stdout.strip().splitlines()[-1]), packages
+
+
+def startup_packages():
+    """Top-level packages a bare interpreter imports before running any code"""
+    _, lines = import_times("pass")
+    return {line.split("|")[-1].strip().split(".")[0] for line in lines if "cumulative" not in line}
+
+
+def timed_app():
+    """AppTest script: run model.py and record how long the run took"""
+    import runpy
+    import time
+
+    import streamlit as st
+
+    started = time.perf_counter()
+    try:
+        runpy.run_path("model.py", run_name="__main__")
+    finally:
+        st.session_state["bench_script_ms"] = (time.perf_counter() - started) * 1000
+
+
+def measure_reruns(repeat):
+    """First-run milliseconds and the best rerun milliseconds per page"""
+    from streamlit.testing.v1 import AppTest
+
+    scratch = tempfile.mkdtemp(prefix="instagen-startup-")
+    workdir = os.path.join(scratch, "app")
+    shutil.copytree(REPO_ROOT, workdir, ignore=shutil.ignore_patterns(".git", ".cache", "__pycache__", "*.jsonl*",
+                                                                      "image_blobs"))
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    sys.path.insert(0, workdir)
+    try:
+        app = AppTest.from_function(timed_app, default_timeout=120)
+        app.run()
+        first_run = app.session_state["bench_script_ms"]
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+
+        reruns = {}
+        for page in PAGES:
+            next(box for box in app.sidebar.selectbox if box.label == "Choose Feature:").set_value(page).run()
+            timings = []
+            for _ in range(repeat):
+                app.run()
+                timings.append(app.session_state["bench_script_ms"])
+            if app.exception:
+                raise RuntimeError(f"{page}: {app.exception[0].message}")
+            reruns[page] = min(timings)
+        return first_run, reruns
+    finally:
+        os.chdir(cwd)
+        sys.path.remove(workdir)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def check_budget(results):
+    """Return a message for every measurement over its budget"""
+    with open(BUDGET_PATH, encoding="utf-8") as f:
+        budget = json.load(f)
+    overruns = []
+    for name in ("import_ms", "first_run_ms"):
+        if results[name] > budget[name]:
+            overruns.append(f"{name}: {results[name]:.0f} ms > {budget[name]} ms")
+    for page, limit in budget["rerun_ms"].items():
+        if results["rerun_ms"].get(page, 0) > limit:
+            overruns.append(f"rerun {page}: {results['rerun_ms'][page]:.0f} ms > {limit} ms")
+    return overruns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app cold start and reruns")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="slowest imported packages to list")
+    parser.add_argument("--check", action="store_true", help="fail if startup_budget.json is exceeded")
+    args = parser.parse_args()
+
+    source = model_imports()
+    baseline = startup_packages()
+    runs = [measure_imports(source, baseline) for _ in range(args.repeat)]
+    import_ms, packages = min(runs, key=lambda run: run[0])
+    print(f"cold import of model.py's imports: {import_ms:.0f} ms")
+    for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<24} {ms:>8.1f} ms")
+
+    first_run_ms, rerun_ms = measure_reruns(args.repeat)
+    print(f"first run of a fresh worker: {first_run_ms:.0f} ms")
+    for page, ms in rerun_ms.items():
+        print(f"  rerun {page:<20} {ms:>8.1f} ms")
+
+    if args.check:
+        overruns = check_budget({"import_ms": import_ms, "first_run_ms": first_run_ms, "rerun_ms": rerun_ms})
+        for overrun in overruns:
+            print(f"OVER BUDGET {overrun}")
+        if overruns:
+            sys.exit(1)
+        print("within budget")
+
+
+if __name__ == "__main__":
+    main()
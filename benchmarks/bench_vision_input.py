@@ -0,0 +1,91 @@
+"""Benchmark preparing uploads for vision requests: full-size PNG vs prepare_vision_image.
+
+Run from the repository root:
+    python benchmarks/bench_vision_input.py [--repeat N]
+
+The legacy path is what the Content Generator did before: decode the upload
+at full resolution, save it as PNG and base64 it. Sources are synthetic
+photo-like images (gradients plus sensor-style noise) at common phone and
+screenshot sizes, so the numbers do not depend on sample files.
+"""
+import argparse
+import base64
+import io
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from instagen.vision_input import estimate_vision_tokens, prepare_vision_image  # noqa: E402
+
+SOURCES = [
+    ("12 MP JPEG, rotated", (4032, 3024), "JPEG", 6),
+    ("3 MP JPEG", (2048, 1536), "JPEG", 1),
+    ("screenshot PNG", (1170, 2532), "PNG", 1),
+]
+
+
+def synthetic_photo(width, height, seed=42):
+    """Smooth gradients with noise, roughly as compressible as a real photo"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([
+        128 + 100 * np.sin(x / width * 6.0),
+        128 + 100 * np.cos(y / height * 4.0),
+        128 + 80 * np.sin((x + y) / (width + height) * 9.0),
+    ], axis=-1)
+    noise = rng.normal(0, 12, size=base.shape)
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8))
+
+
+def encode_source(image, image_format, orientation):
+    buffered = io.BytesIO()
+    if image_format == "JPEG":
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        image.save(buffered, format="JPEG", quality=92, exif=exif)
+    else:
+        image.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def legacy_prepare(data):
+    """Pre-change path: full-resolution PNG, base64 encoded"""
+    buffered = io.BytesIO()
+    Image.open(io.BytesIO(data)).save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode()
+
+
+def best_of(fn, repeat):
+    """Return the fastest of `repeat` runs in milliseconds, and the last result"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vision input preparation")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'source':<22} {'upload KB':>9} {'legacy ms':>10} {'legacy KB':>10} "
+          f"{'new ms':>8} {'new KB':>8} {'sent size':>11} {'tokens':>7}")
+    for label, (width, height), image_format, orientation in SOURCES:
+        data = encode_source(synthetic_photo(width, height), image_format, orientation)
+        legacy_ms, legacy_b64 = best_of(lambda: legacy_prepare(data), args.repeat)
+        new_ms, vision = best_of(lambda: prepare_vision_image(Image.open(io.BytesIO(data))), args.repeat)
+        new_kb = (len(vision.data_url) - vision.data_url.index(",") - 1) / 1024
+        # The model rescales either way, so both requests cost the same tokens
+        assert vision.tokens() == estimate_vision_tokens(width, height)
+        print(f"{label:<22} {len(data) / 1024:>9.0f} {legacy_ms:>10.1f} {len(legacy_b64) / 1024:>10.0f} "
+              f"{new_ms:>8.1f} {new_kb:>8.0f} {vision.width:>5}x{vision.height:<5} {vision.tokens():>7}")
+
+
+if __name__ == "__main__":
+    main()
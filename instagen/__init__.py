@@ -0,0 +1,5 @@
+"""InstaGen core library: image and caption generation, rendering and history.
+
+Nothing in this package imports Streamlit. model.py is the Streamlit front
+end and `python -m instagen` is the command-line one.
+"""
@@ -0,0 +1,144 @@
+"""Batch content generation over many images with bounded concurrency.
+
+Sources can be uploaded file objects, image paths, ZIP archives or
+directories. Each image is described on the 'batch' worker pool through
+content.describe_upload, which applies the vision cache and the OpenAI rate
+limiter. At most `concurrency` images are in flight, and image bytes are only
+read when an item is submitted.
+"""
+import datetime
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from .content import describe_upload
+from .workers import get_executor, timed
+
+BATCH_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def _is_image_name(name):
+    base = os.path.basename(name)
+    return not base.startswith('.') and name.lower().endswith(BATCH_IMAGE_EXTENSIONS)
+
+
+def _zip_items(archive):
+    items = []
+    for info in archive.infolist():
+        name = info.filename
+        if info.is_dir() or name.startswith('__MACOSX/') or not _is_image_name(name):
+            continue
+        items.append((name, lambda archive=archive, info=info: archive.read(info)))
+    return items
+
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def collect_batch_images(sources):
+    """List (name, load) for every image in the sources, expanding ZIPs and directories
+
+    A source is a path or a file object with a .name (e.g. an upload). Returns
+    (items, skipped), where skipped names the sources that could not be read.
+    """
+    items = []
+    skipped = []
+    for source in sources:
+        if isinstance(source, (str, os.PathLike)):
+            path = os.fspath(source)
+            name = path
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    for file_name in sorted(files):
+                        file_path = os.path.join(root, file_name)
+                        if _is_image_name(file_name):
+                            items.append((file_path, lambda file_path=file_path: _read_file(file_path)))
+                continue
+            if not path.lower().endswith('.zip'):
+                items.append((path, lambda path=path: _read_file(path)))
+                continue
+        else:
+            name = source.name
+            if not name.lower().endswith('.zip'):
+                items.append((name, source.getvalue))
+                continue
+        try:
+            items.extend(_zip_items(zipfile.ZipFile(source)))
+        except (zipfile.BadZipFile, OSError) as e:
+            print(f"Batch error: skipped {name}: {e}")
+            skipped.append(name)
+    return items, skipped
+
+
+def run_batch(items, concurrency, brand_voice, audience, creativity, on_update=None):
+    """Describe every item on the batch pool, at most `concurrency` at a time
+
+    Each row holds name, status ('queued', 'running', 'done', 'cached' or
+    'failed'), description, seconds and error. on_update(rows, done) is
+    called from the calling thread whenever a status changes. Returns
+    (rows, results) with one content dict, or None on failure, per item.
+    """
+    rows = [{'name': name, 'status': 'queued', 'description': '', 'seconds': None, 'error': ''}
+            for name, _ in items]
+    results = [None] * len(items)
+    executor = get_executor('batch')
+    pending = {}
+    next_item = 0
+    done = 0
+
+    def fail(index, error):
+        rows[index].update({'status': 'failed', 'error': str(error)[:200]})
+
+    while next_item < len(items) or pending:
+        # Keep the window full; bytes are read here, on the calling thread
+        while next_item < len(items) and len(pending) < concurrency:
+            name, load = items[next_item]
+            rows[next_item]['status'] = 'running'
+            try:
+                future = executor.submit(timed, describe_upload, load(), brand_voice, audience, creativity)
+                pending[future] = next_item
+            except Exception as e:
+                fail(next_item, e)
+                done += 1
+            next_item += 1
+        if on_update:
+            on_update(rows, done)
+        if not pending:
+            continue
+
+        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
+            index = pending.pop(future)
+            try:
+                result, seconds = future.result()
+                results[index] = result
+                rows[index].update({
+                    'status': 'cached' if result['source'] == 'cache' else 'done',
+                    'description': result.get('description', ''),
+                    'seconds': round(seconds, 2),
+                })
+            except Exception as e:
+                print(f"Batch item error ({items[index][0]}): {e}")
+                fail(index, e)
+            done += 1
+
+    if on_update:
+        on_update(rows, done)
+    return rows, results
+
+
+def batch_records(items, results, brand_voice, audience):
+    """Content history records for the successful items of a batch, sharing one timestamp"""
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return [{
+        "caption": result["caption"],
+        "hashtags": ' '.join(result["hashtags"]) if isinstance(result["hashtags"], list) else result["hashtags"],
+        "image_description": result["image_description"],
+        "timestamp": timestamp,
+        "brand_voice": brand_voice,
+        "audience": audience,
+        "image_name": name
+    } for (name, _), result in zip(items, results) if result is not None]
@@ -0,0 +1,136 @@
+"""Content-addressed blob store for images referenced from the history files.
+
+Each image is written once to a file named after the sha256 of its bytes, so
+identical images are stored a single time and history records only carry the
+digest. Files are fanned out into two-character subdirectories to keep
+directory listings short.
+"""
+import base64
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from .image_cache import sniff_mime
+
+BLOB_DIR = os.getenv('INSTAGEN_BLOB_DIR', 'image_blobs')
+
+# Suffix for the untouched copy of a history file kept by the migration
+MIGRATION_BACKUP_SUFFIX = '.pre-blobs'
+
+
+class BlobStore:
+    """Directory of immutable, sha256-named image files"""
+
+    def __init__(self, directory=BLOB_DIR):
+        self.directory = directory
+        self.writes = 0
+        self.dedup_hits = 0
+        self.dedup_bytes = 0  # Bytes not written again because the blob already existed
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def put(self, data):
+        """Store bytes and return their sha256 hex digest"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if os.path.exists(path):
+            with self._lock:
+                self.dedup_hits += 1
+                self.dedup_bytes += len(data)
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)  # Atomic; a concurrent writer of the same digest is harmless
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self.writes += 1
+        return digest
+
+    def get(self, digest):
+        """Return the bytes for a digest, or None if the blob is missing"""
+        try:
+            with open(self.path(digest), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    """Return the process-wide blob store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+        return _store
+
+
+def image_reference(data, store=None):
+    """Store image bytes and return the fields a history record keeps for them"""
+    store = store or get_blob_store()
+    return {'blob': store.put(data), 'mime': sniff_mime(data), 'bytes': len(data)}
+
+
+def decode_data_url(url):
+    """Return the bytes of a base64 data: URL, or None for any other URL"""
+    if not url or not url.startswith('data:') or ';base64,' not in url:
+        return None
+    return base64.b64decode(url.split(';base64,', 1)[1])
+
+
+def migrate_records(records, store=None):
+    """Move inline data: URLs into the blob store; returns the number converted"""
+    converted = 0
+    for record in records:
+        data = decode_data_url(record.get('url'))
+        if data is None:
+            continue
+        record.pop('url')
+        record.update(image_reference(data, store))
+        converted += 1
+    return converted
+
+
+def migrate_history_file(path, store=None):
+    """One-time conversion of a history file with inline images to blob references
+
+    The original file is kept alongside with MIGRATION_BACKUP_SUFFIX. Files
+    without inline images are left untouched, so calling this again is a no-op.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+
+    store = store or get_blob_store()
+    converted = migrate_records(records, store)
+    if converted:
+        backup = path + MIGRATION_BACKUP_SUFFIX
+        if not os.path.exists(backup):
+            shutil.copy2(path, backup)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(records, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        print(f"Migrated {converted} inline images from {path} to {store.directory}")
+    return converted
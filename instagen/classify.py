@@ -0,0 +1,242 @@
+"""Keyword classification of prompts and image descriptions.
+
+Every template and fallback path classifies text through one of two shared
+KeywordClassifier tables. SUBJECTS holds what an image description is about
+(food, people, nature, ...). THEMES holds the scene a prompt asks for
+(sunset, ocean, coffee, ...), which picks palettes, placeholders, stock
+images and fallback captions. Each table scores all its categories in one
+pass over the words of the text. Matching is by whole word, so "cat" no
+longer matches "education" and "car" no longer matches "card"; regular
+plurals still match.
+"""
+import re
+
+# Bump when the tables change in a way that alters output; it is part of the local render cache key
+KEYWORDS_VERSION = 1
+
+
+def plural(word):
+    """Regular English plural of a keyword ("dish" -> "dishes", "puppy" -> "puppies")"""
+    if word.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        return word + 'es'
+    if word.endswith('y') and word[-2:-1] not in 'aeiou':
+        return word[:-1] + 'ies'
+    return word + 's'
+
+
+# Byte table lowercasing ASCII text and turning every non-word character into a space, so bytes.split()
+# stops at the same boundaries as a regex \b; text with other characters is split by WORD_RE instead
+_SEPARATORS = bytes(ord(chr(code).lower()) if chr(code).isalnum() or chr(code) == '_' else ord(' ')
+                    for code in range(128)) + bytes(128)
+WORD_RE = re.compile(r'\w+')
+
+
+class KeywordClassifier:
+    """Scores text against ordered categories of keywords with one word lookup
+
+    Categories earlier in the table win ties, so the order of the table is
+    the priority order the if/elif chains used to encode. Each keyword also
+    matches its regular plural; irregular forms are listed as keywords.
+
+    The text is split into words once and each word is looked up in a set
+    of keyword forms. Keywords of several words ("golden hour") are matched
+    only when their first word occurs, and win over a shorter keyword at
+    the same place. The keywords of the latest text are kept, so the
+    template lookups made one after another for a prompt share a single
+    scan. best() only counts the categories in `among`.
+    """
+
+    def __init__(self, categories):
+        self.categories = list(categories)
+        self._priority = {category: index for index, category in enumerate(self.categories)}
+        self._form_categories = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                # Two-letter keywords are pronouns ("me", "us"): "uses" is not about people
+                for form in (keyword, plural(keyword)) if len(keyword) > 2 else (keyword,):
+                    if category not in self._form_categories.setdefault(form, []):
+                        self._form_categories[form].append(category)
+        # First word -> [(all words, form)] for keywords of several words, longest first
+        self._phrases = {}
+        for form in self._form_categories:
+            words = tuple(form.split())
+            if len(words) > 1:
+                self._phrases.setdefault(words[0], []).append((words, form))
+        for candidates in self._phrases.values():
+            candidates.sort(key=lambda candidate: -len(candidate[0]))
+        self._lookup = set(self._form_categories) | set(self._phrases)
+        self._ascii_lookup = {word.encode() for word in self._lookup if word.isascii()}
+        self._last = (None, ())  # (text, keywords) of the latest scan, swapped in as one tuple
+
+    def keywords(self, text):
+        """Every keyword occurrence in the text, in order"""
+        return list(self._keywords(text))
+
+    def _keywords(self, text):
+        last_text, last_keywords = self._last
+        if text == last_text:
+            return last_keywords
+        keywords = self._scan(text)
+        self._last = (text, keywords)
+        return keywords
+
+    def _scan(self, text):
+        if text.isascii():
+            # Lowercased, translated and split in C; only the words that are keywords are decoded
+            words = text.encode().translate(_SEPARATORS).split()
+            if self._ascii_lookup.isdisjoint(words):
+                return ()  # Most texts: rejected without a Python-level loop over the words
+            hits = [word.decode() for word in words if word in self._ascii_lookup]
+        else:
+            words = WORD_RE.findall(text.lower())
+            hits = [word for word in words if word in self._lookup]
+        if self._phrases.keys().isdisjoint(hits):
+            return tuple(hits)
+
+        if text.isascii():
+            words = [word.decode() for word in words]
+        found = []
+        position = 0
+        while position < len(words):
+            word = words[position]
+            for phrase, form in self._phrases.get(word, ()):
+                if tuple(words[position:position + len(phrase)]) == phrase:
+                    found.append(form)
+                    position += len(phrase)
+                    break
+            else:
+                if word in self._form_categories:
+                    found.append(word)
+                position += 1
+        return tuple(found)
+
+    def scores(self, text):
+        """Keyword hits per category, for the categories that matched"""
+        counts = {}
+        for form in self._keywords(text):
+            for category in self._form_categories.get(form, ()):
+                counts[category] = counts.get(category, 0) + 1
+        return counts
+
+    def ranked(self, text):
+        """Matched categories, most hits first and table order between equals"""
+        counts = self.scores(text)
+        return sorted(counts, key=lambda category: (-counts[category], self._priority[category]))
+
+    def best(self, text, among=None):
+        """Top category of the text, optionally limited to `among`; None when nothing matches"""
+        forms = self._keywords(text)
+        if not forms:
+            return None  # Most texts: no dict of scores to build
+        if len(forms) == 1:
+            # A single hit needs no counting: its categories are listed in table order
+            for category in self._form_categories[forms[0]]:
+                if among is None or category in among:
+                    return category
+            return None
+        counts = {}
+        for form in forms:
+            for category in self._form_categories.get(form, ()):
+                if among is None or category in among:
+                    counts[category] = counts.get(category, 0) + 1
+        if not counts:
+            return None
+        return min(counts, key=lambda category: (-counts[category], self._priority[category]))
+
+
+SUBJECTS = KeywordClassifier({
+    "food": ['food', 'pizza', 'burger', 'cake', 'coffee', 'latte', 'espresso', 'cafe', 'drink', 'meal', 'dish',
+             'restaurant', 'cook', 'cooking', 'cooked', 'bread', 'fruit', 'vegetable', 'dessert', 'lunch',
+             'dinner', 'breakfast', 'eat', 'eating', 'delicious', 'tasty', 'yummy', 'hungry', 'recipe'],
+    "people": ['person', 'people', 'man', 'men', 'woman', 'women', 'child', 'children', 'baby',
+               'face', 'smiling', 'portrait', 'selfie', 'group', 'family', 'friend', 'me',
+               'myself', 'us', 'together', 'smile', 'happy'],
+    "nature": ['nature', 'tree', 'forest', 'mountain', 'sky', 'sunset', 'sunrise', 'beach', 'ocean',
+               'river', 'park', 'garden', 'flower', 'plant', 'outdoor', 'landscape', 'scenery', 'view',
+               'beautiful', 'green', 'blue'],
+    "animal": ['dog', 'cat', 'animal', 'pet', 'bird', 'horse', 'wildlife', 'puppy', 'kitten',
+               'cute', 'furry', 'paw', 'tail', 'ear'],
+    "vehicle": ['car', 'bike', 'motorcycle', 'truck', 'vehicle', 'transport', 'road', 'driving', 'ride',
+                'wheel', 'engine', 'speed'],
+    "architecture": ['building', 'house', 'architecture', 'city', 'urban', 'street', 'bridge',
+                     'tower', 'modern', 'construction', 'home', 'office', 'structure'],
+    "technology": ['phone', 'computer', 'tech', 'technology', 'device', 'gadget', 'electronic', 'screen',
+                   'digital', 'laptop', 'tablet', 'camera', 'headphone'],
+    "fashion": ['outfit', 'clothes', 'fashion', 'style', 'dress', 'shirt', 'shoe', 'accessories', 'look',
+                'wearing', 'ootd'],
+})
+
+THEMES = KeywordClassifier({
+    "sunset": ['sunset', 'dusk', 'golden hour'],
+    "sunrise": ['sunrise', 'dawn'],
+    "ocean": ['ocean', 'sea', 'seascape', 'beach', 'wave'],
+    "forest": ['forest', 'woods', 'woodland', 'jungle'],
+    "mountain": ['mountain', 'peak', 'alps'],
+    "flower": ['flower', 'floral', 'bloom', 'blossom', 'rose', 'tulip'],
+    "coffee": ['coffee', 'cafe', 'espresso', 'latte', 'cappuccino'],
+    "city": ['city', 'skyline', 'downtown', 'urban'],
+    "cat": ['cat', 'kitten', 'kitty'],
+    "dog": ['dog', 'puppy'],
+    "food": ['food', 'meal', 'dish', 'pizza', 'burger', 'cake', 'dessert'],
+    "fire": ['fire', 'flame', 'campfire'],
+    "sky": ['sky', 'cloud'],
+    "night": ['night', 'midnight', 'starry', 'star'],
+    "gold": ['gold', 'golden'],
+    "winter": ['winter', 'snow', 'snowy', 'frost'],
+})
+
+
+def get_colors_from_prompt(prompt, style):
+    """Extract colors based on prompt keywords"""
+    # Color mappings based on keywords
+    color_map = {
+        "sunset": [(255, 165, 0), (255, 69, 0), (255, 20, 147), (138, 43, 226)],
+        "ocean": [(0, 119, 190), (0, 168, 204), (127, 219, 255), (173, 216, 230)],
+        "forest": [(34, 139, 34), (50, 205, 50), (144, 238, 144), (0, 100, 0)],
+        "fire": [(255, 0, 0), (255, 165, 0), (255, 255, 0), (220, 20, 60)],
+        "sky": [(135, 206, 235), (176, 224, 230), (173, 216, 230), (240, 248, 255)],
+        "flower": [(255, 192, 203), (255, 20, 147), (255, 105, 180), (219, 112, 147)],
+        "night": [(25, 25, 112), (72, 61, 139), (106, 90, 205), (123, 104, 238)],
+        "gold": [(255, 215, 0), (255, 223, 0), (255, 255, 224), (240, 230, 140)]
+    }
+
+    # Default colors based on style
+    style_colors = {
+        "realistic": [(100, 100, 100), (150, 150, 150), (200, 200, 200), (250, 250, 250)],
+        "artistic": [(255, 99, 71), (255, 165, 0), (255, 215, 0), (50, 205, 50)],
+        "cartoon": [(255, 20, 147), (0, 191, 255), (50, 205, 50), (255, 165, 0)],
+        "vintage": [(139, 69, 19), (160, 82, 45), (210, 180, 140), (245, 245, 220)],
+        "modern": [(70, 130, 180), (100, 149, 237), (176, 196, 222), (230, 230, 250)]
+    }
+
+    # Find matching colors
+    theme = THEMES.best(prompt, among=color_map)
+    if theme:
+        return color_map[theme]
+
+    return style_colors.get(style, style_colors["realistic"])
+
+
+def get_themed_placeholder(prompt):
+    """Pick a gradient and emoji placeholder theme for a prompt"""
+    # Define theme-based gradients and emojis
+    themes = {
+        "sunset": {"gradient": "linear-gradient(45deg, #FF6B35, #F7931E, #FFD23F)", "emoji": "🌅", "color": "#FFF"},
+        "sunrise": {"gradient": "linear-gradient(45deg, #FFD23F, #F7931E, #FF6B35)", "emoji": "🌄", "color": "#FFF"},
+        "ocean": {"gradient": "linear-gradient(45deg, #0077BE, #00A8CC, #7FDBFF)", "emoji": "🌊", "color": "#FFF"},
+        "mountain": {"gradient": "linear-gradient(45deg, #8B4513, #A0522D, #D2B48C)", "emoji": "🏔️", "color": "#FFF"},
+        "forest": {"gradient": "linear-gradient(45deg, #228B22, #32CD32, #90EE90)", "emoji": "🌲", "color": "#FFF"},
+        "flower": {"gradient": "linear-gradient(45deg, #FF69B4, #FFB6C1, #FFC0CB)", "emoji": "🌸", "color": "#FFF"},
+        "city": {"gradient": "linear-gradient(45deg, #4A4A4A, #696969, #A9A9A9)", "emoji": "🏙️", "color": "#FFF"},
+        "coffee": {"gradient": "linear-gradient(45deg, #8B4513, #A0522D, #D2691E)", "emoji": "☕", "color": "#FFF"},
+        "sky": {"gradient": "linear-gradient(45deg, #87CEEB, #87CEFA, #B0E0E6)", "emoji": "☁️", "color": "#333"},
+        "winter": {"gradient": "linear-gradient(45deg, #B0E0E6, #E0FFFF, #F0F8FF)", "emoji": "❄️", "color": "#333"},
+    }
+
+    # Find matching theme
+    theme = THEMES.best(prompt, among=themes)
+    if theme:
+        return themes[theme]
+
+    # Default theme
+    return {"gradient": "linear-gradient(45deg, #667eea, #764ba2)", "emoji": "🎨", "color": "#FFF"}
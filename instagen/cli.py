@@ -0,0 +1,132 @@
+"""Command-line front end: python -m instagen <command> ...
+
+    generate-image PROMPT   generate one image and write it to a file
+    caption PROMPT          caption, hashtags and a posting tip for an image prompt
+    batch PATH...           content for every image in files, folders or ZIPs
+
+Runs without Streamlit. Settings come from the environment and .env, like the app.
+"""
+import argparse
+import json
+import sys
+
+STYLES = ["realistic", "artistic", "cartoon", "abstract", "vintage", "modern"]
+
+
+def cmd_generate_image(args):
+    from .images import generate_image
+
+    result = generate_image(args.prompt, args.style, seed=args.seed)
+    print(f"provider={result.provider} seed={result.seed} seconds={result.timings.get('total', 0):.2f}", file=sys.stderr)
+    payload = result.payload
+    if not payload:
+        print(f"No image bytes fetched; stock image URL: {result.url}")
+        return 1
+
+    extension = result.mime.split('/')[-1].replace('jpeg', 'jpg')
+    output = args.output or f"instagen_{result.seed}.{extension}"
+    with open(output, 'wb') as f:
+        f.write(payload)
+    print(output)
+
+    if args.save:
+        from .history import image_record, open_history
+
+        image_log, _ = open_history()
+        image_log.append(image_record(result, args.style.capitalize()))
+    return 0
+
+
+def cmd_caption(args):
+    from .content import generate_social_media_content
+
+    content = generate_social_media_content(args.prompt, args.style)
+    if args.json:
+        print(json.dumps(content, ensure_ascii=False, indent=2))
+    else:
+        print(f"CAPTION:\n{content['caption']}\n\nHASHTAGS:\n{content['hashtags']}\n\nTIP:\n{content['tips']}")
+    return 0
+
+
+def cmd_batch(args):
+    from .batch import batch_records, collect_batch_images, run_batch
+    from .rate_limit import get_openai_limiter
+
+    items, skipped = collect_batch_images(args.paths)
+    if not items:
+        print("No JPG, PNG or WebP images found.", file=sys.stderr)
+        return 1
+
+    reported = set()
+
+    def report(rows, done):
+        # One line per finished item
+        for index, row in enumerate(rows):
+            if row['status'] in ('done', 'cached', 'failed') and index not in reported:
+                reported.add(index)
+                detail = row['error'] if row['status'] == 'failed' else row['description']
+                print(f"[{done}/{len(rows)}] {row['status']:<6} {row['name']} {detail}", file=sys.stderr)
+
+    rows, results = run_batch(items, args.concurrency, args.brand_voice, args.audience, args.creativity,
+                              on_update=report)
+    records = batch_records(items, results, args.brand_voice, args.audience)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for record in records:
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if args.save and records:
+        from .history import open_history
+
+        _, content_log = open_history()
+        content_log.append_many(records)
+
+    failed = sum(1 for row in rows if row['status'] == 'failed') + len(skipped)
+    limiter = get_openai_limiter().stats()
+    print(f"{len(records)} succeeded, {failed} failed, {limiter['throttled']} requests throttled "
+          f"({limiter['waited_seconds']:.1f}s waited)", file=sys.stderr)
+    return 1 if failed and not records else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='instagen', description='InstaGen AI without the web UI')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    image = commands.add_parser('generate-image', help='generate one image for a prompt')
+    image.add_argument('prompt')
+    image.add_argument('--style', choices=STYLES, default='realistic')
+    image.add_argument('--seed', type=int, default=None, help='defaults to a seed derived from the prompt')
+    image.add_argument('--output', '-o', help='file to write (default instagen_<seed>.<ext>)')
+    image.add_argument('--save', action='store_true', help='also add the image to the image history')
+    image.set_defaults(func=cmd_generate_image)
+
+    caption = commands.add_parser('caption', help='caption, hashtags and a tip for an image prompt')
+    caption.add_argument('prompt')
+    caption.add_argument('--style', choices=STYLES, default='realistic')
+    caption.add_argument('--json', action='store_true', help='print the result as JSON')
+    caption.set_defaults(func=cmd_caption)
+
+    batch = commands.add_parser('batch', help='generate content for many images')
+    batch.add_argument('paths', nargs='+', help='image files, folders or ZIP archives')
+    batch.add_argument('--concurrency', type=int, default=4)
+    batch.add_argument('--brand-voice', default='professional and engaging')
+    batch.add_argument('--audience', default='general social media users')
+    batch.add_argument('--creativity', type=int, default=7)
+    batch.add_argument('--output', '-o', help='JSON Lines file for the results (default stdout)')
+    batch.add_argument('--save', action='store_true', help='also append the results to the content history')
+    batch.set_defaults(func=cmd_batch)
+    return parser
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    args = build_parser().parse_args(argv)
+    if getattr(args, 'concurrency', 1) < 1:
+        args.concurrency = 1
+    sys.exit(args.func(args))
@@ -0,0 +1,569 @@
+"""Captions, hashtags and post content, from prompts or from image descriptions.
+
+Text generation streams from OpenAI where possible and falls back to keyword
+templates. Uploaded images are described in a few words by a vision model,
+and the post is then built from that description.
+"""
+import io
+
+from PIL import Image
+
+from .classify import SUBJECTS, THEMES
+from .openai_client import get_client
+from .palette import extract_palette
+from .rate_limit import get_openai_limiter
+from .streaming import SocialContentParser, iter_text
+from .vision_cache import dhash, get_vision_cache, params_key
+from .vision_input import prepare_vision_image
+
+
+def generate_social_media_content(prompt, style, on_update=None):
+    """Generate caption, hashtags, and tips based on image prompt and style
+
+    The completion is streamed; on_update, if given, is called with the partial
+    sections after every text delta so callers can show them as they arrive.
+    """
+    try:
+        # First try AI generation with OpenAI
+        response = get_client().chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a social media expert. Generate engaging captions, relevant hashtags, and posting tips for images."
+                },
+                {
+                    "role": "user",
+                    "content": f"Create social media content for this specific image: '{prompt}' in {style} style. The caption should be about the ACTUAL IMAGE CONTENT (what's shown: {prompt}), not about AI generation. Provide: 1) An engaging caption about the image subject (2-3 sentences), 2) 10-15 relevant hashtags, 3) One posting tip. Focus on the image content, not the AI aspect."
+                }
+            ],
+            max_tokens=300,
+            stream=True
+        )
+
+        # Parse the AI response as it streams in
+        parser = SocialContentParser()
+        for delta in iter_text(response):
+            parser.feed(delta)
+            if on_update:
+                on_update(parser.snapshot())
+        parser.close()
+
+        content = parser.text
+        caption = parser.sections['caption'].strip()
+        hashtags = parser.sections['hashtags'].strip()
+        tips = parser.sections['tips'].strip()
+
+        # If parsing failed, use the whole content as caption
+        if not caption:
+            caption = content[:200] + "..."
+
+        return {
+            'caption': caption,
+            'hashtags': hashtags if hashtags else generate_fallback_hashtags(prompt, style),
+            'tips': tips if tips else generate_fallback_tips(style)
+        }
+
+    except Exception as e:
+        print(f"AI content generation error: {e}")
+        # Fallback to rule-based generation
+        return generate_fallback_social_content(prompt, style)
+
+
+def generate_fallback_social_content(prompt, style):
+    """Generate social media content using rule-based approach"""
+
+    # Generate caption based on prompt keywords - MORE SPECIFIC TO THE ACTUAL PROMPT
+    caption_templates = {
+        "sunset": [
+            f"Captured this stunning sunset moment 🌅 {prompt[:30]}... absolutely breathtaking!",
+            f"Golden hour magic never gets old ✨ This {prompt.lower()} scene is pure perfection 🧡",
+            f"When nature paints the sky like this... {prompt[:40]} 🌅 Simply magical!"
+        ],
+        "ocean": [
+            f"Ocean vibes hitting different today 🌊 This {prompt.lower()} view is everything 💙",
+            f"Lost in the beauty of {prompt[:30]}... �️ Ocean therapy at its finest!",
+            f"The sea always knows how to calm the soul 🌊 {prompt[:40]} perfection!"
+        ],
+        "forest": [
+            f"Into the wild we go 🌲 This {prompt.lower()} scene speaks to my soul �",
+            f"Finding peace in nature's embrace � {prompt[:40]} is pure magic!",
+            f"Forest therapy session complete ✅ {prompt[:30]} vibes are unmatched �"
+        ],
+        "mountain": [
+            f"Peak vibes only! 🏔️ This {prompt.lower()} view is absolutely stunning ⛰️",
+            f"Mountains are calling and I must go... {prompt[:40]} adventure awaits! 🗻",
+            f"Elevated perspectives, elevated mood � {prompt[:30]} perfection!"
+        ],
+        "flower": [
+            f"Bloom where you are planted 🌸 This {prompt.lower()} beauty is incredible!",
+            f"Nature's confetti is the prettiest 🌼 {prompt[:40]} magic ✨",
+            f"Petals and positivity 🌺 {prompt[:30]} bringing all the good vibes!"
+        ],
+        "coffee": [
+            f"But first, coffee ☕ This {prompt.lower()} setup is my morning mood!",
+            f"Brewing up some good vibes ☕ {prompt[:40]} perfection in a cup!",
+            f"Life happens, coffee helps ☕ {prompt[:30]} aesthetic is everything!"
+        ],
+        "city": [
+            f"Urban adventures await 🏙️ This {prompt.lower()} scene is pure energy!",
+            f"City lights and endless possibilities ✨ {prompt[:40]} vibes are unmatched!",
+            f"Concrete jungle where dreams are made 🌃 {prompt[:30]} magic!"
+        ],
+        "cat": [
+            f"Feline fine with this adorable moment 🐱 {prompt[:40]} cuteness overload!",
+            f"Cat vibes are the best vibes 😻 This {prompt.lower()} scene melts my heart!",
+            f"Purrfection captured in one frame � {prompt[:30]} is everything!"
+        ],
+        "dog": [
+            f"Puppy love at its finest 🐕 This {prompt.lower()} moment is pure joy!",
+            f"Dogs make everything better 🐶 {prompt[:40]} happiness captured!",
+            f"Unconditional love in one frame 🐾 {prompt[:30]} perfection!"
+        ],
+        "food": [
+            f"Food is love, food is life 🍽️ This {prompt.lower()} looks absolutely delicious!",
+            f"Feast your eyes on this beauty 😋 {prompt[:40]} is making me hungry!",
+            f"Good food, good mood 🤤 {prompt[:30]} perfection on a plate!"
+        ]
+    }
+
+    # Find matching caption - check multiple keywords
+    caption = f"Absolutely loving this {prompt.lower()} moment ✨ AI art that captures the essence perfectly! 🎨"
+
+    theme = THEMES.best(prompt, among=caption_templates)
+    if theme:
+        import random
+        caption = random.choice(caption_templates[theme])
+
+    # If no specific keyword found, create a custom caption based on the prompt
+    if "AI art that captures" in caption:  # Default wasn't changed
+        # Create a more personalized caption
+        prompt_words = prompt.lower().split()
+        if len(prompt_words) > 0:
+            main_subject = prompt_words[0] if len(prompt_words) == 1 else " ".join(prompt_words[:2])
+            caption = f"Mesmerized by this {main_subject} creation ✨ {prompt[:50]}... pure artistic magic! 🎨"
+
+    # Generate hashtags
+    hashtags = generate_fallback_hashtags(prompt, style)
+
+    # Generate tips
+    tips = generate_fallback_tips(style)
+
+    return {
+        'caption': caption,
+        'hashtags': hashtags,
+        'tips': tips
+    }
+
+
+def generate_fallback_hashtags(prompt, style):
+    """Generate hashtags based on prompt and style"""
+
+    # Base hashtags
+    base_tags = ["#AIart", "#DigitalArt", "#CreativeAI", "#ArtificialIntelligence", "#GeneratedArt"]
+
+    # Style-specific hashtags
+    style_tags = {
+        "realistic": ["#PhotoRealistic", "#DigitalPhotography", "#AIPhotography"],
+        "artistic": ["#AbstractArt", "#DigitalPainting", "#ConceptualArt"],
+        "cartoon": ["#CartoonArt", "#Animation", "#DigitalIllustration"],
+        "vintage": ["#VintageArt", "#RetroStyle", "#ClassicArt"],
+        "modern": ["#ModernArt", "#ContemporaryArt", "#MinimalArt"]
+    }
+
+    # Keyword-specific hashtags
+    keyword_tags = {
+        "sunset": ["#Sunset", "#GoldenHour", "#SkyArt", "#NatureArt"],
+        "ocean": ["#Ocean", "#Seascape", "#BlueArt", "#WaterArt"],
+        "forest": ["#Forest", "#NatureArt", "#TreeArt", "#GreenArt"],
+        "mountain": ["#Mountain", "#Landscape", "#PeakViews", "#NaturePhotography"],
+        "flower": ["#FlowerArt", "#Botanical", "#NatureArt", "#BloomArt"],
+        "coffee": ["#CoffeeArt", "#CafeVibes", "#MorningArt"],
+        "city": ["#CityArt", "#UrbanArt", "#Skyline", "#ArchitectureArt"]
+    }
+
+    # Combine hashtags
+    all_tags = base_tags.copy()
+    all_tags.extend(style_tags.get(style, []))
+
+    # Add keyword-specific tags
+    theme = THEMES.best(prompt, among=keyword_tags)
+    if theme:
+        all_tags.extend(keyword_tags[theme])
+
+    # Add general popular tags
+    popular_tags = ["#Art", "#Creative", "#Digital", "#Design", "#Beautiful", "#Amazing", "#Cool", "#Awesome"]
+    all_tags.extend(popular_tags[:3])  # Add first 3
+
+    return " ".join(all_tags[:15])  # Limit to 15 hashtags
+
+
+def generate_fallback_tips(style):
+    """Generate posting tips based on style"""
+
+    tips = {
+        "realistic": "💡 Post during peak hours (7-9 PM) for maximum engagement. Realistic AI art performs well on LinkedIn and Facebook!",
+        "artistic": "💡 Share the creative process in your stories! Artistic content gets great engagement on Instagram and Pinterest.",
+        "cartoon": "💡 Perfect for TikTok and Instagram Reels! Add fun music and watch the engagement soar 🚀",
+        "vintage": "💡 Vintage content performs amazingly on Pinterest! Consider creating a vintage art board for better reach.",
+        "modern": "💡 Modern art resonates well on professional platforms. Great for LinkedIn posts about creativity and innovation!"
+    }
+
+    return tips.get(style, "💡 Post consistently and engage with your audience for the best results! AI art is trending right now 🔥")
+
+
+# Short description of an upload that the content templates are built from
+VISION_DESCRIBE_PROMPT = "What do you see in this image? Describe in 2-3 words only. Examples: 'food pizza', 'person smiling', 'dog playing', 'car red', 'sunset sky'."
+VISION_DESCRIBE_MAX_TOKENS = 10
+
+
+def vision_describe_messages(image_url):
+    """Chat messages asking the vision model for a 2-3 word description"""
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": VISION_DESCRIBE_PROMPT},
+                {"type": "image_url", "image_url": {"url": image_url}}
+            ]
+        }
+    ]
+
+
+# Retries of a rate-limited (429) vision call
+VISION_RETRIES = 3
+
+
+def describe_upload(data, brand_voice, audience, creativity):
+    """Headless vision analysis of one upload, for batch runs and the CLI
+
+    Returns the content dict plus 'source' ('cache' or 'api') and, for API
+    results, the 'description' the content was built from.
+    """
+    vision = prepare_vision_image(Image.open(io.BytesIO(data)))
+    vision_cache = get_vision_cache()
+    image_hash = dhash(vision.image)
+    vision_params = params_key("gpt-4o-mini", brand_voice, audience, creativity)
+    cached_result, _ = vision_cache.get(image_hash, vision_params)
+    if cached_result is not None:
+        return {**cached_result, "source": "cache"}
+
+    limiter = get_openai_limiter()
+    for attempt in range(VISION_RETRIES + 1):
+        limiter.acquire(vision.tokens("gpt-4o-mini") + VISION_DESCRIBE_MAX_TOKENS)
+        try:
+            response = get_client().chat.completions.create(
+                model="gpt-4o-mini",
+                messages=vision_describe_messages(vision.data_url),
+                max_tokens=VISION_DESCRIBE_MAX_TOKENS
+            )
+            break
+        except Exception as e:
+            # Quota exhaustion is also a 429 but waiting will not fix it
+            if "429" not in str(e) or "quota" in str(e).lower() or attempt == VISION_RETRIES:
+                raise
+            headers = getattr(getattr(e, "response", None), "headers", None) or {}
+            try:
+                retry_after = float(headers.get("retry-after", 2 ** attempt))
+            except ValueError:
+                retry_after = 2 ** attempt
+            limiter.penalize(retry_after)
+
+    description = (response.choices[0].message.content or "").strip()
+    result = generate_content_from_user_description(description)
+    vision_cache.put(image_hash, vision_params, result)
+    return {**result, "description": description, "source": "api"}
+
+
+def generate_content_from_user_description(description):
+    """Generate highly relevant content based on user's description of their image"""
+    description = description.lower().strip()
+    subject = SUBJECTS.best(description)
+
+    # Food-related content
+    if subject == "food":
+        return {
+            "caption": f"Absolutely delicious! This {description} looks incredible and is making me hungry just looking at it! 🤤 Food is one of life's greatest pleasures - it brings people together, creates memories, and tells stories of culture and love. What's your favorite way to enjoy {description.split()[0] if description.split() else 'this dish'}?",
+            "hashtags": ["#food", "#delicious", "#foodie", "#yummy", "#instafood", "#foodporn", "#tasty", "#cooking", "#meal", "#hungry"],
+            "image_description": f"A mouth-watering image of {description} that showcases culinary excellence and appetizing presentation."
+        }
+
+    # People/Portrait content
+    elif subject == "people":
+        return {
+            "caption": f"Beautiful moment captured! This {description} shows the power of authentic human connection and genuine emotion. 😊 Every person has a unique story to tell, and photos like this remind us of the importance of relationships, memories, and sharing our lives with others. What's your favorite memory with the people you love?",
+            "hashtags": ["#portrait", "#people", "#lifestyle", "#authentic", "#moments", "#human", "#smile", "#life", "#story", "#connection"],
+            "image_description": f"A heartwarming portrait featuring {description} with genuine emotion and human connection."
+        }
+
+    # Nature/Outdoor content
+    elif subject == "nature":
+        return {
+            "caption": f"Nature's masterpiece! This stunning {description} reminds us of the incredible beauty that surrounds us every day. 🌿 The natural world has this amazing ability to inspire, heal, and bring peace to our busy lives. Take a moment to appreciate these beautiful scenes and reconnect with the earth. Where's your favorite place in nature?",
+            "hashtags": ["#nature", "#beautiful", "#outdoors", "#landscape", "#natural", "#scenic", "#peaceful", "#earth", "#adventure", "#explore"],
+            "image_description": f"A breathtaking natural scene featuring {description} in all its natural glory."
+        }
+
+    # Animal content
+    elif subject == "animal":
+        return {
+            "caption": f"Absolutely adorable! This sweet {description} just melts my heart! 🐾 Animals have this incredible ability to bring pure joy and unconditional love into our lives. They remind us what it means to live in the moment, love without conditions, and find happiness in the simple things. What's your favorite thing about {description.split()[0] if description.split() else 'pets'}?",
+            "hashtags": ["#animals", "#pets", "#cute", "#adorable", "#love", "#furry", "#wildlife", "#nature", "#companion", "#joy"],
+            "image_description": f"An endearing image of {description} showing natural animal behavior and irresistible charm."
+        }
+
+    # Vehicle/Transportation content
+    elif subject == "vehicle":
+        return {
+            "caption": f"What an amazing ride! This {description} represents freedom, adventure, and the thrill of the open road! 🚗 There's something special about vehicles - they take us places, create adventures, and represent our dreams of exploration and independence. Every journey begins with that first turn of the key. Where would you drive this beauty?",
+            "hashtags": ["#car", "#vehicle", "#drive", "#road", "#adventure", "#freedom", "#automotive", "#travel", "#journey", "#lifestyle"],
+            "image_description": f"An impressive image of {description} showcasing automotive design and the spirit of adventure."
+        }
+
+    # Architecture/Building content
+    elif subject == "architecture":
+        return {
+            "caption": f"Incredible architecture! This {description} showcases human creativity, engineering excellence, and our ability to shape the world around us. 🏗️ Buildings tell the story of our civilization, our dreams made real in concrete and steel. Every structure represents someone's vision brought to life. What's your favorite architectural style?",
+            "hashtags": ["#architecture", "#building", "#design", "#urban", "#city", "#modern", "#construction", "#engineering", "#structure", "#art"],
+            "image_description": f"An architectural image featuring {description} with impressive design elements and structural beauty."
+        }
+
+    # Technology/Product content
+    elif subject == "technology":
+        return {
+            "caption": f"Innovation at its finest! This {description} represents the incredible technology that connects our world and enhances our daily lives. 📱 Every device tells a story of human ingenuity, countless hours of development, and our endless quest to make life better and more connected. How has technology changed your life?",
+            "hashtags": ["#technology", "#tech", "#innovation", "#digital", "#modern", "#gadget", "#device", "#future", "#smart", "#electronic"],
+            "image_description": f"A technology image showcasing {description} with modern design and cutting-edge functionality."
+        }
+
+    # Fashion/Style content
+    elif subject == "fashion":
+        return {
+            "caption": f"Style perfection! This {description} is absolutely stunning and shows incredible fashion sense! 👗 Fashion is such a powerful form of self-expression - it tells the world who we are without saying a word. Every outfit choice is a chance to show creativity, confidence, and personality. What's your go-to style?",
+            "hashtags": ["#fashion", "#style", "#outfit", "#ootd", "#trendy", "#chic", "#fashionista", "#stylish", "#look", "#clothing"],
+            "image_description": f"A stylish fashion image featuring {description} with excellent taste and creative expression."
+        }
+
+    # Default for anything else
+    else:
+        return {
+            "caption": f"Perfectly captured! This {description} tells such a unique and interesting story! ✨ Every image has the power to inspire, connect, and create lasting memories. There's something special about this moment that caught your eye and made you want to share it with the world. What story does this {description} tell you?",
+            "hashtags": ["#photography", "#creative", "#art", "#visual", "#story", "#moment", "#beautiful", "#inspiration", "#life", "#share"],
+            "image_description": f"A creative and engaging image featuring {description} with artistic composition and visual appeal."
+        }
+
+
+def create_content_from_text_description(description):
+    """Create content from AI text description"""
+    templates = {
+        'food': {
+            "caption": f"Delicious! {description[:100]}... This looks absolutely amazing! Food brings people together and creates unforgettable moments. What's your favorite dish?",
+            "hashtags": ["#food", "#delicious", "#foodie", "#yummy", "#instafood", "#foodporn", "#tasty", "#cooking", "#meal", "#hungry"],
+            "image_description": f"Food image: {description[:150]}"
+        },
+        'people': {
+            "caption": f"Beautiful moment! {description[:100]}... Every person has a unique story to tell. Authentic connections make the best content!",
+            "hashtags": ["#portrait", "#people", "#lifestyle", "#authentic", "#moments", "#human", "#smile", "#life", "#story", "#connection"],
+            "image_description": f"Portrait image: {description[:150]}"
+        },
+        'nature': {
+            "caption": f"Nature's beauty! {description[:100]}... The natural world never fails to inspire and amaze us. Take time to appreciate these moments!",
+            "hashtags": ["#nature", "#beautiful", "#outdoors", "#landscape", "#natural", "#scenic", "#earth", "#peaceful", "#adventure", "#explore"],
+            "image_description": f"Nature image: {description[:150]}"
+        },
+        'animal': {
+            "caption": f"So adorable! {description[:100]}... Animals bring such joy and love into our lives. They remind us what pure happiness looks like!",
+            "hashtags": ["#animals", "#pets", "#cute", "#adorable", "#love", "#furry", "#wildlife", "#nature", "#companion", "#joy"],
+            "image_description": f"Animal image: {description[:150]}"
+        },
+        'vehicle': {
+            "caption": f"Amazing ride! {description[:100]}... This represents freedom, adventure, and the open road ahead!",
+            "hashtags": ["#car", "#vehicle", "#drive", "#road", "#adventure", "#freedom", "#automotive", "#travel", "#journey", "#lifestyle"],
+            "image_description": f"Vehicle image: {description[:150]}"
+        },
+        'general': {
+            "caption": f"Captured perfectly! {description[:100]}... Every image tells a unique story worth sharing!",
+            "hashtags": ["#photography", "#creative", "#art", "#visual", "#story", "#moment", "#beautiful", "#inspiration", "#life", "#share"],
+            "image_description": f"Image showing: {description[:150]}"
+        }
+    }
+
+    # Subjects without a template of their own get the general one
+    content_type = SUBJECTS.best(description, among=templates) or 'general'
+    return templates[content_type]
+
+
+def create_generic_content_with_image_analysis(image, palette=None):
+    """Final fallback with basic image analysis"""
+    try:
+        palette = palette or extract_palette(image)
+
+        # Colour families rather than one average, so a half-blue, half-orange photo is not read as grey
+        if palette.colors:
+            if palette.share('warm') >= 0.45 and palette.brightness > 0.35:  # Warm colors - likely food
+                return {
+                    "caption": "This looks absolutely delicious! Food is one of life's greatest pleasures. Every meal tells a story and brings people together. What's your favorite comfort food?",
+                    "hashtags": ["#food", "#delicious", "#foodie", "#yummy", "#instafood", "#meal", "#tasty", "#cooking", "#hungry", "#foodlover"],
+                    "image_description": "A delicious food item with warm, appetizing colors"
+                }
+            elif palette.share('green') >= 0.35:  # Green dominant - nature
+                return {
+                    "caption": "Nature's beauty never fails to inspire! This green paradise reminds us to appreciate the natural world around us. Take a moment to breathe and connect with nature.",
+                    "hashtags": ["#nature", "#green", "#outdoors", "#natural", "#peaceful", "#earth", "#plants", "#fresh", "#scenic", "#beautiful"],
+                    "image_description": "A natural scene with lush green elements"
+                }
+            elif palette.share('blue') >= 0.35:  # Blue dominant - sky/water
+                return {
+                    "caption": "Beautiful blue tones! Whether it's the sky above or water below, blue represents peace, tranquility, and endless possibilities. What does this color make you feel?",
+                    "hashtags": ["#blue", "#sky", "#peaceful", "#tranquil", "#beautiful", "#nature", "#calm", "#serene", "#water", "#horizon"],
+                    "image_description": "An image with dominant blue tones suggesting sky or water"
+                }
+
+        # Default fallback
+        return {
+            "caption": "Every image tells a story! This moment captured here represents creativity, inspiration, and the beauty of visual storytelling. What story does this tell you?",
+            "hashtags": ["#photography", "#creative", "#visual", "#art", "#story", "#moment", "#beautiful", "#inspiration", "#capture", "#life"],
+            "image_description": "A creative image with artistic composition and visual appeal"
+        }
+
+    except Exception as e:
+        # Ultimate fallback
+        return {
+            "caption": "Beautiful moment captured! This image showcases creativity and visual storytelling at its finest. Every picture has the power to inspire and connect us.",
+            "hashtags": ["#photography", "#beautiful", "#creative", "#visual", "#art", "#moment", "#story", "#inspiration", "#life", "#share"],
+            "image_description": "A visually appealing image with creative composition"
+        }
+
+
+def generate_content_from_description(description):
+    """Generate content based on AI description of the image"""
+    description = description.lower()
+    # There is no fashion template here, so those descriptions take their next best subject
+    subject = SUBJECTS.best(description, among=("food", "people", "nature", "animal", "vehicle",
+                                                "architecture", "technology"))
+
+    # Food-related keywords
+    if subject == "food":
+        return {
+            "caption": f"Delicious! This amazing {description} looks absolutely incredible. Food is one of life's greatest pleasures - every bite tells a story. What's your favorite dish to share with friends?",
+            "hashtags": ["#food", "#delicious", "#foodie", "#yummy", "#tasty", "#foodporn", "#instafood", "#foodlover", "#cooking", "#meal"],
+            "image_description": f"A mouth-watering image of {description} that showcases culinary excellence."
+        }
+
+    # People/Portrait keywords
+    elif subject == "people":
+        return {
+            "caption": f"Beautiful moment captured! This {description} shows the power of authentic human connection. Every person has a unique story to tell. Share your story with the world!",
+            "hashtags": ["#portrait", "#people", "#authentic", "#moments", "#lifestyle", "#human", "#connection", "#story", "#smile", "#life"],
+            "image_description": f"A compelling portrait showing {description} with genuine emotion and personality."
+        }
+
+    # Nature/Outdoor keywords
+    elif subject == "nature":
+        return {
+            "caption": f"Nature's beauty at its finest! This stunning {description} reminds us to appreciate the incredible world around us. Take time to connect with nature and find your peace.",
+            "hashtags": ["#nature", "#beautiful", "#outdoors", "#landscape", "#natural", "#scenic", "#peaceful", "#earth", "#adventure", "#explore"],
+            "image_description": f"A breathtaking natural scene featuring {description} in all its glory."
+        }
+
+    # Animal keywords
+    elif subject == "animal":
+        return {
+            "caption": f"Adorable! This sweet {description} just melts my heart. Animals bring so much joy and love into our lives. They remind us what unconditional love looks like.",
+            "hashtags": ["#animals", "#pets", "#cute", "#adorable", "#love", "#furry", "#wildlife", "#nature", "#companion", "#joy"],
+            "image_description": f"An endearing image of {description} showing natural animal behavior and charm."
+        }
+
+    # Vehicle/Transportation keywords
+    elif subject == "vehicle":
+        return {
+            "caption": f"Amazing ride! This {description} represents freedom, adventure, and the open road. Every journey begins with a single step - or in this case, a turn of the key!",
+            "hashtags": ["#car", "#vehicle", "#drive", "#road", "#adventure", "#freedom", "#journey", "#automotive", "#travel", "#lifestyle"],
+            "image_description": f"A striking image of {description} showcasing automotive design and engineering."
+        }
+
+    # Architecture/Building keywords
+    elif subject == "architecture":
+        return {
+            "caption": f"Impressive architecture! This {description} showcases human creativity and engineering excellence. Buildings tell the story of our civilization and dreams made real.",
+            "hashtags": ["#architecture", "#building", "#design", "#urban", "#city", "#modern", "#construction", "#engineering", "#structure", "#art"],
+            "image_description": f"An architectural image featuring {description} with impressive design elements."
+        }
+
+    # Technology/Product keywords
+    elif subject == "technology":
+        return {
+            "caption": f"Innovation at work! This {description} represents the incredible technology that connects our world. Every device tells a story of human ingenuity and progress.",
+            "hashtags": ["#technology", "#tech", "#innovation", "#digital", "#modern", "#gadget", "#device", "#future", "#smart", "#electronic"],
+            "image_description": f"A technology image showcasing {description} with modern design and functionality."
+        }
+
+    # Default for anything else
+    else:
+        return {
+            "caption": f"Captured perfectly! This {description} tells a unique story worth sharing. Every image has the power to inspire, connect, and create lasting memories. What story does this tell you?",
+            "hashtags": ["#photography", "#creative", "#art", "#visual", "#story", "#moment", "#capture", "#inspiration", "#share", "#life"],
+            "image_description": f"A creative image featuring {description} with artistic composition and visual appeal."
+        }
+
+
+def analyze_image_colors_only(image, palette=None):
+    """Fallback: Basic color analysis when AI fails"""
+    palette = palette or extract_palette(image)
+    color_desc = palette.tone()
+    if palette.lighting():
+        color_desc = f"{palette.lighting()}, {color_desc}"
+
+    return {
+        "caption": f"Beautiful composition with {color_desc}! This image captures a moment worth sharing. Visual storytelling at its finest - every color and detail tells part of the story.",
+        "hashtags": ["#photography", "#visual", "#art", "#creative", "#colors", "#composition", "#moment", "#story", "#beautiful", "#capture"],
+        "image_description": f"A well-composed image featuring {color_desc} and artistic elements."
+    }
+
+
+def get_content_by_type(content_type):
+    """Generate content based on detected image type"""
+    content_templates = {
+        "food": {
+            "caption": "Delicious moments deserve to be shared! This incredible dish is a perfect blend of flavors and presentation. Food brings people together and creates lasting memories. What's your favorite comfort food?",
+            "hashtags": ["#food", "#delicious", "#foodie", "#yummy", "#cooking", "#recipe", "#tasty", "#foodporn", "#homemade", "#dining"],
+            "image_description": "A beautifully presented dish showcasing culinary artistry and appetizing ingredients."
+        },
+        "nature": {
+            "caption": "Nature's beauty never fails to inspire! This stunning view reminds us to appreciate the world around us. Take a moment to breathe, explore, and connect with the natural world.",
+            "hashtags": ["#nature", "#beautiful", "#outdoors", "#landscape", "#peaceful", "#adventure", "#explore", "#natural", "#scenic", "#earth"],
+            "image_description": "A breathtaking natural scene showcasing the beauty of the outdoors and landscape."
+        },
+        "portrait": {
+            "caption": "Every face tells a story, every moment captures a memory. Authentic connections and genuine expressions make the most powerful content. Share your story with the world!",
+            "hashtags": ["#portrait", "#people", "#authentic", "#story", "#moments", "#lifestyle", "#genuine", "#connection", "#human", "#expression"],
+            "image_description": "A compelling portrait capturing authentic human expression and personality."
+        },
+        "landscape": {
+            "caption": "Wide horizons and endless possibilities! This amazing view reminds us that there's so much beauty to explore in our world. Where will your next adventure take you?",
+            "hashtags": ["#landscape", "#travel", "#adventure", "#explore", "#wanderlust", "#scenic", "#horizon", "#journey", "#beautiful", "#view"],
+            "image_description": "A stunning landscape view showcasing natural beauty and expansive scenery."
+        },
+        "product": {
+            "caption": "Quality and design come together in perfect harmony. This product represents innovation, functionality, and style. Sometimes the best things in life are the simple, well-made ones.",
+            "hashtags": ["#product", "#design", "#quality", "#innovation", "#style", "#modern", "#functional", "#lifestyle", "#tech", "#minimal"],
+            "image_description": "A well-designed product showcasing quality craftsmanship and modern aesthetics."
+        },
+        "fashion": {
+            "caption": "Style is a way to say who you are without having to speak. This look perfectly captures confidence, creativity, and personal expression. Fashion is art you can wear!",
+            "hashtags": ["#fashion", "#style", "#outfit", "#ootd", "#trendy", "#chic", "#fashionista", "#stylish", "#look", "#clothing"],
+            "image_description": "A stylish fashion look showcasing personal style and creative expression."
+        },
+        "general": {
+            "caption": "Capturing beautiful moments like this! This image showcases the perfect blend of creativity and inspiration. Share your story and connect with your audience through authentic visual storytelling.",
+            "hashtags": ["#photography", "#beautiful", "#moments", "#instagram", "#creative", "#inspiration", "#storytelling", "#authentic", "#visual", "#content"],
+            "image_description": "A beautifully composed image that captures a moment of creativity and inspiration, perfect for social media sharing."
+        }
+    }
+
+    return content_templates.get(content_type, content_templates["general"])
+
+
+def get_demo_content_structure():
+    """Return demo content in proper dictionary structure"""
+    return get_content_by_type("general")
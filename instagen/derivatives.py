@@ -0,0 +1,171 @@
+"""Downscaled display copies ("derivatives") of stored and uploaded images.
+
+Each source image is decoded once and shrunk to every size in
+DERIVATIVE_SIZES, largest first. Each step starts from the previous result and
+uses the reduce() fast path for the integer part of the scale. Results are
+keyed by the sha256 of the source bytes and stored on disk, so a
+derivative is built once per image no matter how many sessions show it.
+Builds run on the 'derivatives' pool; a reader that finds no derivative on
+disk waits for the one build in flight for that image.
+Images are never upscaled: a source smaller than a size is stored at its own size.
+"""
+import hashlib
+import io
+import os
+import threading
+
+from PIL import Image, ImageOps, features
+
+from .blob_store import get_blob_store
+from .workers import get_executor
+
+DERIVATIVE_SIZES = (128, 320, 1080)
+DERIVATIVE_DIR = os.getenv('INSTAGEN_DERIVATIVE_DIR', os.path.join('.cache', 'derivatives'))
+DERIVATIVE_QUALITY = 80
+
+# Bump when encoding settings change, so stale derivatives are not reused
+DERIVATIVE_VERSION = 1
+
+DERIVATIVE_FORMAT = 'WEBP' if features.check('webp') else 'JPEG'
+DERIVATIVE_SUFFIX = '.webp' if DERIVATIVE_FORMAT == 'WEBP' else '.jpg'
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+_stats = {'built': 0, 'hits': 0}
+
+
+def pick_size(width):
+    """Smallest derivative size at least `width` pixels wide, else the largest"""
+    for size in DERIVATIVE_SIZES:
+        if size >= width:
+            return size
+    return DERIVATIVE_SIZES[-1]
+
+
+def derivative_path(digest, size):
+    name = f'{digest}_{size}_v{DERIVATIVE_VERSION}{DERIVATIVE_SUFFIX}'
+    return os.path.join(DERIVATIVE_DIR, digest[:2], name)
+
+
+def _encode(image):
+    buffered = io.BytesIO()
+    if DERIVATIVE_FORMAT == 'WEBP':
+        image.save(buffered, format='WEBP', quality=DERIVATIVE_QUALITY, method=4)
+    else:
+        image.save(buffered, format='JPEG', quality=DERIVATIVE_QUALITY, optimize=True)
+    return buffered.getvalue()
+
+
+def build_derivatives(data):
+    """Decode an image once and return {size: encoded bytes} for every size"""
+    image = Image.open(io.BytesIO(data))
+    largest = DERIVATIVE_SIZES[-1]
+    image.draft('RGB', (largest, largest))  # JPEG sources decode at reduced scale
+    image = ImageOps.exif_transpose(image)
+
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    if has_alpha and DERIVATIVE_FORMAT == 'WEBP':
+        image = image.convert('RGBA')
+    elif has_alpha:
+        # JPEG has no alpha channel: flatten onto white
+        rgba = image.convert('RGBA')
+        image = Image.new('RGB', rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.getchannel('A'))
+    else:
+        image = image.convert('RGB')
+
+    derivatives = {}
+    for size in reversed(DERIVATIVE_SIZES):
+        scale = max(image.size) / size
+        if scale > 1:
+            target = (max(round(image.width / scale), 1), max(round(image.height / scale), 1))
+            # reducing_gap lets PIL reduce() by the integer factor before filtering
+            image = image.resize(target, Image.LANCZOS, reducing_gap=2.0)
+        derivatives[size] = _encode(image)
+    return derivatives
+
+
+def _store(digest, derivatives):
+    # Largest last: _ensure treats its presence as "all sizes are on disk"
+    for size, encoded in sorted(derivatives.items()):
+        path = derivative_path(digest, size)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(encoded)
+        os.replace(tmp_path, path)
+
+
+def _ensure(digest, load):
+    """Build and store every derivative of a source unless already on disk"""
+    if os.path.exists(derivative_path(digest, DERIVATIVE_SIZES[-1])):
+        return
+    data = load() if callable(load) else load
+    if data is None:
+        return
+    _store(digest, build_derivatives(data))
+    with _inflight_lock:
+        _stats['built'] += 1
+
+
+def _submit(digest, load):
+    """Return the pool future building a digest's derivatives, starting one unless already in flight
+
+    The lookup and the submission happen under one lock, so concurrent
+    callers for the same image share a single build on the 'derivatives'
+    pool instead of each decoding the source on their own thread.
+    """
+    with _inflight_lock:
+        future = _inflight.get(digest)
+        if future is not None:
+            return future
+        future = get_executor('derivatives').submit(_ensure, digest, load)
+        _inflight[digest] = future
+
+    def _done(_):
+        with _inflight_lock:
+            if _inflight.get(digest) is future:
+                del _inflight[digest]
+
+    future.add_done_callback(_done)
+    return future
+
+
+def schedule_derivatives(data, digest=None):
+    """Build an image's derivatives on the background pool and return the future"""
+    return _submit(digest or hashlib.sha256(data).hexdigest(), data)
+
+
+def _read(digest, width, load):
+    path = derivative_path(digest, pick_size(width))
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        with _inflight_lock:
+            _stats['hits'] += 1
+        return data
+    except FileNotFoundError:
+        pass
+    try:
+        _submit(digest, load).result()
+        with open(path, 'rb') as f:
+            return f.read()
+    except Exception as e:
+        print(f"Derivative error ({digest[:12]}): {e}")
+        return None
+
+
+def derivative_for_blob(digest, width):
+    """Return the smallest derivative of a stored blob that is at least `width` wide"""
+    return _read(digest, width, lambda: get_blob_store().get(digest))
+
+
+def derivative_for_bytes(data, width):
+    """Return the smallest derivative of in-memory image bytes (e.g. an upload)"""
+    return _read(hashlib.sha256(data).hexdigest(), width, data)
+
+
+def derivative_stats():
+    """Return how many sources were processed and how many reads hit the disk cache"""
+    with _inflight_lock:
+        return dict(_stats)
@@ -0,0 +1,48 @@
+"""Opening the history logs and building the records stored in them."""
+import datetime
+import os
+
+from .blob_store import image_reference, migrate_history_file
+from .derivatives import schedule_derivatives
+from .history_dedup import get_text_dedup
+from .history_log import get_history_log, history_log_path
+
+
+def open_history():
+    """Open the shared append-only image and content history logs
+
+    The first run imports the old whole-file JSON histories, moving any inline
+    images into the blob store before they are copied. Repeated captions are
+    stored as references to their first copy (see history_dedup).
+    """
+    if not os.path.exists(history_log_path('image')):
+        migrate_history_file('image_history.json')
+    image_log = get_history_log('image', legacy_json='image_history.json')
+    content_log = get_history_log('content', legacy_json='content_history.json', codec=get_text_dedup())
+    return image_log, content_log
+
+
+def image_record(result, style_label):
+    """History record for a generated image; its bytes go to the blob store
+
+    Returns None when the image can no longer be had: its parked bytes were
+    evicted, could not be regenerated, and there is no URL to fall back on.
+    """
+    record = {
+        "prompt": result.prompt,
+        "style": style_label,
+        "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "provider": result.provider,
+        "seed": result.seed,
+        "timings": {stage: round(seconds, 3) for stage, seconds in result.timings.items()}
+    }
+    # The record keeps only the blob reference
+    payload = result.payload
+    if payload:
+        record.update(image_reference(payload))
+        schedule_derivatives(payload, record["blob"])  # Display sizes, off the request thread
+    elif result.url:
+        record["url"] = result.url
+    else:
+        return None
+    return record
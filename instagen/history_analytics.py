@@ -0,0 +1,250 @@
+"""Incrementally maintained aggregates over the image and content histories.
+
+Each history log gets a set of counters (per-day volume, styles, hashtags,
+hashtag co-occurrence, brand voices, ...) that is folded forward over the
+records appended since the last refresh, so a refresh costs time in the
+number of new records, not the size of the history. Charts read the counters
+directly.
+
+Like the search index, the counters are snapshotted beside their log every
+SNAPSHOT_EVERY new records and revalidated against the byte offset of the
+last counted record, so a cleared or compacted history is recounted from
+scratch.
+
+The most frequent hashtag pairs are tracked the same way: a bounded leader
+board is updated with each counted post, so listing them never scans the
+whole co-occurrence map.
+"""
+import os
+import pickle
+import re
+import threading
+from collections import Counter, defaultdict
+
+SNAPSHOT_EVERY = 500
+SNAPSHOT_VERSION = 2
+
+# Only the first tags of a post count towards co-occurrence (pairs grow quadratically)
+MAX_PAIR_TAGS = 30
+
+# Hashtag pairs kept on the leader board, the most top_pairs() can list
+TOP_PAIRS_KEPT = 100
+
+HASHTAG_RE = re.compile(r'#\w+')
+
+# Counters kept for each kind of history, keyed by record field
+COUNTED_FIELDS = {
+    'image': ('style', 'provider'),
+    'content': ('brand_voice', 'audience'),
+}
+
+
+def record_day(record):
+    """'YYYY-MM-DD' of a record's timestamp, or 'unknown'"""
+    day = str(record.get('timestamp', ''))[:10]
+    return day if re.fullmatch(r'\d{4}-\d{2}-\d{2}', day) else 'unknown'
+
+
+def record_hashtags(record):
+    """Distinct lowercase hashtags of a content record, in order of appearance"""
+    hashtags = record.get('hashtags', '')
+    if isinstance(hashtags, list):
+        hashtags = ' '.join(map(str, hashtags))
+    return list(dict.fromkeys(tag.lower() for tag in HASHTAG_RE.findall(hashtags)))
+
+
+class LogAggregates:
+    """Counters over one history log, kept in step with it"""
+
+    def __init__(self, log, kind, path=None):
+        self.log = log
+        self.kind = kind
+        self.path = path or log.path + '.analytics'
+        self._lock = threading.Lock()
+        self._reset()
+        self._load_snapshot()
+
+    def _reset(self):
+        self.days = Counter()
+        self.fields = {field: Counter() for field in COUNTED_FIELDS[self.kind]}
+        self.hashtags = Counter()
+        self.cooccurrence = defaultdict(Counter)  # tag -> Counter of tags seen with it
+        self.top_pairs = {}  # (tag, other) -> count for the TOP_PAIRS_KEPT most frequent pairs
+        self._pairs_floor = 0  # Lowest count on a full leader board
+        self.counted = 0
+        self.last_offset = None
+        self._since_snapshot = 0
+
+    # Persistence
+
+    def _load_snapshot(self):
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return
+        if state.get('version') != SNAPSHOT_VERSION or state.get('kind') != self.kind:
+            return
+        counted, last_offset = state['counted'], state['last_offset']
+        if counted and (counted > len(self.log) or self.log.offset(counted - 1) != last_offset):
+            return  # History was cleared or compacted since the snapshot
+        self.days = state['days']
+        self.fields = state['fields']
+        self.hashtags = state['hashtags']
+        self.cooccurrence = defaultdict(Counter, state['cooccurrence'])
+        self.top_pairs = state['top_pairs']
+        self._pairs_floor = min(self.top_pairs.values()) if len(self.top_pairs) >= TOP_PAIRS_KEPT else 0
+        self.counted = counted
+        self.last_offset = last_offset
+
+    def _save_snapshot(self):
+        state = {
+            'version': SNAPSHOT_VERSION,
+            'kind': self.kind,
+            'counted': self.counted,
+            'last_offset': self.last_offset,
+            'days': self.days,
+            'fields': self.fields,
+            'hashtags': self.hashtags,
+            'cooccurrence': dict(self.cooccurrence),
+            'top_pairs': self.top_pairs,
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self._since_snapshot = 0
+
+    # Counting
+
+    def _add(self, record):
+        self.days[record_day(record)] += 1
+        for field, counter in self.fields.items():
+            value = record.get(field)
+            if value:
+                counter[str(value)] += 1
+        if self.kind != 'content':
+            return
+        tags = record_hashtags(record)
+        self.hashtags.update(tags)
+        paired = tags[:MAX_PAIR_TAGS]
+        for tag in paired:
+            related = self.cooccurrence[tag]
+            related.update(paired)  # C fast path; the tag's count of itself is dropped below
+            del related[tag]
+        for i, tag in enumerate(paired):
+            related = self.cooccurrence[tag]
+            for other in paired[i + 1:]:
+                self._count_pair((tag, other) if tag < other else (other, tag), related[other])
+
+    def _count_pair(self, pair, count):
+        """Keep the leader board in step with a pair's new count.
+
+        Counts only grow between resets, so every pair off the board stays at
+        or below the board's lowest count until it beats it and takes that
+        place: the board always holds the true top pairs.
+        """
+        top = self.top_pairs
+        if pair in top:
+            previous = top[pair]
+            top[pair] = count
+            if previous > self._pairs_floor or len(top) < TOP_PAIRS_KEPT:
+                return
+        elif len(top) < TOP_PAIRS_KEPT:
+            top[pair] = count
+            if len(top) < TOP_PAIRS_KEPT:
+                return
+        elif count > self._pairs_floor:
+            del top[min(top, key=top.get)]
+            top[pair] = count
+        else:
+            return
+        self._pairs_floor = min(top.values())
+
+    def refresh(self):
+        """Fold in records appended since the last refresh; returns how many"""
+        with self._lock:
+            total = len(self.log)
+            if self.counted and (self.counted > total or self.log.offset(self.counted - 1) != self.last_offset):
+                self._reset()  # Cleared or compacted: recount
+            if self.counted == total:
+                return 0
+
+            added = 0
+            batch = 1000
+            while self.counted < total:
+                records = self.log.read(self.counted, min(self.counted + batch, total))
+                if not records:
+                    break
+                for record in records:
+                    self._add(record)
+                self.counted += len(records)
+                added += len(records)
+            self.last_offset = self.log.offset(self.counted - 1) if self.counted else None
+
+            self._since_snapshot += added
+            if self._since_snapshot >= SNAPSHOT_EVERY:
+                self._save_snapshot()
+            return added
+
+
+class HistoryAnalytics:
+    """Aggregates over the image and content logs, read by the analytics page"""
+
+    def __init__(self, image_log, content_log):
+        self.images = LogAggregates(image_log, 'image')
+        self.content = LogAggregates(content_log, 'content')
+
+    def refresh(self):
+        return self.images.refresh() + self.content.refresh()
+
+    def daily_volume(self, days=None):
+        """[(day, images, posts)] oldest first, limited to the `days` most recent active days"""
+        with self.images._lock, self.content._lock:
+            active = sorted((set(self.images.days) | set(self.content.days)) - {'unknown'})
+            if days:
+                active = active[-days:]
+            return [(day, self.images.days[day], self.content.days[day]) for day in active]
+
+    def top_hashtags(self, limit=10):
+        with self.content._lock:
+            return self.content.hashtags.most_common(limit)
+
+    def related_hashtags(self, tag, limit=10):
+        """Hashtags most often used in the same post as `tag`"""
+        with self.content._lock:
+            related = self.content.cooccurrence.get(tag)
+            return related.most_common(limit) if related else []
+
+    def top_pairs(self, limit=10):
+        """[((tag, other), count)] for the most frequent hashtag pairs, at most TOP_PAIRS_KEPT"""
+        with self.content._lock:
+            pairs = sorted(self.content.top_pairs.items(), key=lambda item: (-item[1], item[0]))
+            return pairs[:limit]
+
+    def field_counts(self, kind, field, limit=10):
+        aggregates = self.images if kind == 'image' else self.content
+        with aggregates._lock:
+            return aggregates.fields[field].most_common(limit)
+
+    def stats(self):
+        with self.images._lock, self.content._lock:
+            return {
+                'images': self.images.counted,
+                'posts': self.content.counted,
+                'hashtags': len(self.content.hashtags),
+                'days': len((set(self.images.days) | set(self.content.days)) - {'unknown'}),
+            }
+
+
+_analytics = {}
+_analytics_lock = threading.Lock()
+
+
+def get_history_analytics(image_log, content_log):
+    """Return the process-wide analytics for a pair of history logs"""
+    key = (image_log.path, content_log.path)
+    with _analytics_lock:
+        if key not in _analytics:
+            _analytics[key] = HistoryAnalytics(image_log, content_log)
+        return _analytics[key]
@@ -0,0 +1,164 @@
+"""Write-time deduplication of repeated captions in the content history.
+
+The text fields of a content record (caption, hashtags, image description)
+are normalized and hashed. The first record with a given hash is stored
+inline as before; its normalized text is also written under that hash to a
+blob store of its own (CAPTION_BLOB_DIR), apart from the image blobs. Any
+later record with the same text is stored as a reference ({'text_ref':
+digest}) plus its own timestamp and settings, and is expanded again when
+read. Records read back exactly as written: a field whose value differs from
+its normalized form (extra spaces, a list of hashtags) stays inline beside the
+reference, and fields the record did not have are listed in 'text_absent'.
+Text whose JSON is no longer than the reference is always stored inline, so
+deduplication never makes a record bigger.
+
+The repeat and bytes-saved counters are kept in a small JSON file beside
+the caption blobs, so they survive restarts. Image bytes are already
+deduplicated by the image blob store itself; its counters are reported
+alongside.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+
+from .blob_store import BlobStore, get_blob_store
+
+TEXT_FIELDS = ('caption', 'hashtags', 'image_description')
+
+CAPTION_BLOB_DIR = os.getenv('INSTAGEN_CAPTION_BLOB_DIR', 'caption_blobs')
+STATS_FILE = 'dedup_stats.json'
+
+_SPACES_RE = re.compile(r'[ \t\u00a0]+')
+
+
+def normalize_text(text):
+    """Canonical form for hashing: NFC, LF line endings, single spaces, no trailing blanks"""
+    text = unicodedata.normalize('NFC', str(text)).replace('\r\n', '\n').replace('\r', '\n')
+    lines = (_SPACES_RE.sub(' ', line).strip() for line in text.split('\n'))
+    return '\n'.join(lines).strip()
+
+
+def text_payload(record):
+    """Normalized text fields of a record as canonical JSON bytes"""
+    fields = {field: normalize_text(record.get(field, '')) for field in TEXT_FIELDS}
+    return json.dumps(fields, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _json_size(value):
+    return len(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+class TextDedup:
+    """HistoryLog codec that stores repeated caption text as blob references"""
+
+    def __init__(self, store=None, legacy_store=None):
+        self.store = store or BlobStore(CAPTION_BLOB_DIR)
+        # Captions deduplicated before they had their own directory live among the image blobs
+        self.legacy_store = legacy_store
+        self.stats_path = os.path.join(self.store.directory, STATS_FILE)
+        self._lock = threading.Lock()
+        self._load = lru_cache(maxsize=1024)(self._load_text)
+
+    def pack(self, record):
+        if 'text_ref' in record or not any(field in record for field in TEXT_FIELDS):
+            return record
+        inline = {field: record[field] for field in TEXT_FIELDS if field in record}
+        payload = text_payload(record)
+        digest = hashlib.sha256(payload).hexdigest()
+        saved = _json_size(inline) - _json_size({'text_ref': digest})
+        if saved <= 0:
+            return record  # Short text: the reference would be the bigger of the two
+        if not self.store.exists(digest):
+            self.store.put(payload)
+            return record
+
+        # Only the exact values the normalized blob would not give back stay inline
+        shared = json.loads(payload)
+        text = {field: value for field, value in inline.items() if value != shared[field]}
+        text['text_ref'] = digest
+        absent = [field for field in TEXT_FIELDS if field not in record]
+        if absent:
+            text['text_absent'] = absent
+        saved = _json_size(inline) - _json_size(text)
+        if saved <= 0:
+            return record
+
+        packed = {key: value for key, value in record.items() if key not in TEXT_FIELDS}
+        packed.update(text)
+        self._count_repeat(saved)
+        return packed
+
+    def _load_text(self, digest):
+        data = self.store.get(digest)
+        if data is None and self.legacy_store is not None:
+            data = self.legacy_store.get(digest)
+        if data is None:
+            print(f"Dedup error: caption text {digest[:12]} is missing from the blob store")
+            return {field: '' for field in TEXT_FIELDS}
+        return json.loads(data)
+
+    def unpack(self, record):
+        digest = record.get('text_ref')
+        if digest is None:
+            if 'text_hash' in record:  # Written inline by an earlier version
+                return {key: value for key, value in record.items() if key != 'text_hash'}
+            return record
+        absent = record.get('text_absent', ())
+        expanded = {key: value for key, value in record.items() if key not in ('text_ref', 'text_absent')}
+        for field, value in self._load(digest).items():
+            if field not in expanded and field not in absent:
+                expanded[field] = value
+        return expanded
+
+    # Persistent counters
+
+    def _read_stats(self):
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+            return {'repeats': int(stats['repeats']), 'bytes_saved': int(stats['bytes_saved'])}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {'repeats': 0, 'bytes_saved': 0}
+
+    def _count_repeat(self, saved):
+        with self._lock:
+            stats = self._read_stats()  # Re-read, so counts from other processes are kept
+            stats['repeats'] += 1
+            stats['bytes_saved'] += saved
+            tmp_path = f'{self.stats_path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(stats, f)
+            os.replace(tmp_path, self.stats_path)
+
+    def stats(self):
+        with self._lock:
+            return self._read_stats()
+
+
+_dedup = None
+_dedup_lock = threading.Lock()
+
+
+def get_text_dedup():
+    """Return the process-wide caption deduplicator"""
+    global _dedup
+    with _dedup_lock:
+        if _dedup is None:
+            _dedup = TextDedup(legacy_store=get_blob_store())
+        return _dedup
+
+
+def dedup_stats():
+    """Repeats and bytes saved for images (since startup) and captions (all time)"""
+    store = get_blob_store()
+    captions = get_text_dedup().stats()
+    return {
+        'image_repeats': store.dedup_hits,
+        'image_bytes_saved': store.dedup_bytes,
+        'caption_repeats': captions['repeats'],
+        'caption_bytes_saved': captions['bytes_saved'],
+    }
@@ -0,0 +1,218 @@
+"""Streaming ZIP export of the image and content histories.
+
+iter_history_zip() is a generator of archive chunks: each image is copied
+from its blob file straight into the ZIP in fixed-size blocks (stored, since
+images are already compressed), and every chunk is yielded as soon as it is
+written. Memory use therefore stays flat no matter how many posts are
+exported; manifest rows are spooled to a temporary file until the end.
+
+Archive layout:
+    images/<n>_<prompt>.<ext>   one file per stored image
+    posts/<n>.txt               caption, hashtags and description per post
+    manifest.jsonl              one JSON object per exported entry
+    manifest.csv                the same entries as CSV
+
+Finished archives are spooled to the temp directory and wrapped in an
+ExportFile, which deletes the file when the session that owns it lets go.
+The download itself is not streamed: st.download_button loads whatever it is
+given (bytes, a file or a callable's result) into Streamlit's in-memory media
+storage, so the archive is held in memory once, from the click until the
+session's next rerun.
+"""
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import time
+import weakref
+import zipfile
+
+from .blob_store import get_blob_store
+
+COPY_CHUNK = 256 * 1024
+READ_BATCH = 500
+MANIFEST_FIELDS = ['kind', 'position', 'timestamp', 'file', 'prompt', 'style', 'provider', 'seed',
+                   'url', 'caption', 'hashtags', 'image_description', 'brand_voice', 'audience']
+
+EXTENSIONS = {'image/png': 'png', 'image/jpeg': 'jpg', 'image/webp': 'webp', 'image/gif': 'gif'}
+
+EXPORT_PREFIX = 'instagen_export_'
+# Archives older than this were left behind by a process that did not exit cleanly
+STALE_EXPORT_SECONDS = 24 * 3600
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable stream that collects bytes until drained"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_log(log, positions=None):
+    """Yield (position, record) from a history log, in batches, oldest first"""
+    if positions is None:
+        total = len(log)
+        for start in range(0, total, READ_BATCH):
+            for offset, record in enumerate(log.read(start, start + READ_BATCH)):
+                yield start + offset, record
+    else:
+        for position in sorted(positions):
+            yield position, log.get(position)
+
+
+def slugify(text, length=40):
+    return re.sub(r'[^a-z0-9]+', '-', str(text).lower()).strip('-')[:length] or 'image'
+
+
+def post_text(record):
+    """Plain-text body for one content history entry"""
+    return (f"CAPTION:\n{record.get('caption', '')}\n\n"
+            f"HASHTAGS:\n{record.get('hashtags', '')}\n\n"
+            f"IMAGE DESCRIPTION:\n{record.get('image_description', '')}\n")
+
+
+def _zip_time(timestamp):
+    """ZIP entry time from a 'YYYY-MM-DD HH:MM:SS' history timestamp"""
+    try:
+        date, time = str(timestamp).split(' ')
+        return tuple(int(part) for part in date.split('-') + time.split(':'))
+    except ValueError:
+        return (1980, 1, 1, 0, 0, 0)
+
+
+def iter_history_zip(image_entries=(), content_entries=(), store=None):
+    """Yield a ZIP archive of (position, record) entries chunk by chunk"""
+    store = store or get_blob_store()
+    sink = _ChunkSink()
+    manifest = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode='w+', encoding='utf-8')
+
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for position, record in image_entries:
+            row = {'kind': 'image', 'position': position, **record}
+            digest = record.get('blob')
+            if digest:
+                extension = EXTENSIONS.get(record.get('mime'), 'bin')
+                name = f"images/{position + 1:05d}_{slugify(record.get('prompt'))}.{extension}"
+                info = zipfile.ZipInfo(name, date_time=_zip_time(record.get('timestamp')))
+                info.compress_type = zipfile.ZIP_STORED
+                try:
+                    with open(store.path(digest), 'rb') as source, archive.open(info, 'w') as target:
+                        while True:
+                            block = source.read(COPY_CHUNK)
+                            if not block:
+                                break
+                            target.write(block)
+                            yield sink.drain()
+                    row['file'] = name
+                except FileNotFoundError:
+                    row['file'] = ''  # Blob missing: keep the metadata only
+            manifest.write(json.dumps(row, ensure_ascii=False) + '\n')
+            yield sink.drain()
+
+        for position, record in content_entries:
+            name = f"posts/{position + 1:05d}.txt"
+            info = zipfile.ZipInfo(name, date_time=_zip_time(record.get('timestamp')))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, post_text(record))
+            manifest.write(json.dumps({'kind': 'post', 'position': position, 'file': name, **record},
+                                      ensure_ascii=False) + '\n')
+            yield sink.drain()
+
+        # Both manifests are streamed from the spooled rows
+        manifest.seek(0)
+        with archive.open('manifest.jsonl', 'w') as target:
+            for line in manifest:
+                target.write(line.encode('utf-8'))
+                yield sink.drain()
+        yield sink.drain()
+
+        manifest.seek(0)
+        with archive.open('manifest.csv', 'w') as target:
+            text = io.TextIOWrapper(target, encoding='utf-8', newline='')
+            writer = csv.DictWriter(text, fieldnames=MANIFEST_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for line in manifest:
+                writer.writerow(json.loads(line))
+                yield sink.drain()
+            text.flush()
+            text.detach()
+        manifest.close()
+        yield sink.drain()
+
+    yield sink.drain()  # Central directory
+
+
+def write_history_zip(target, image_entries=(), content_entries=(), store=None):
+    """Stream an export into a writable binary file object; returns bytes written"""
+    written = 0
+    for chunk in iter_history_zip(image_entries, content_entries, store):
+        if chunk:
+            target.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ExportFile:
+    """A finished export archive in the temp directory, owned by one session
+
+    The file is deleted by discard(), or when the object is garbage
+    collected after Streamlit drops the session state holding it, or at
+    interpreter exit.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._remove = weakref.finalize(self, _remove_file, path)
+
+    def read(self):
+        """Archive bytes, for a deferred download that reads them only when clicked
+
+        Streamlit keeps the returned bytes in memory to serve the download;
+        passing the open file instead would be read in full all the same.
+        """
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def discard(self):
+        self._remove()
+
+
+def remove_stale_exports(max_age=STALE_EXPORT_SECONDS, directory=None):
+    """Delete export archives older than max_age seconds from the temp directory"""
+    directory = directory or tempfile.gettempdir()
+    cutoff = time.time() - max_age
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.startswith(EXPORT_PREFIX) and entry.name.endswith('.zip'):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
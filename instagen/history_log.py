@@ -0,0 +1,380 @@
+"""Append-only, crash-safe history logs shared by every session and process.
+
+Each history is a JSON Lines file plus a sidecar index of fixed-width byte
+offsets, so counting, reading the newest N records and appending are all
+constant time regardless of how long the history grows.
+
+Layout of <name>_history.jsonl.idx (little-endian uint64 words):
+    word 0      number of log bytes the index accounts for
+    words 1..N  start offset of each live record
+
+Writers serialise on an flock()ed <log>.lock file. A record is appended to the
+log before its offset is added to the index, so a crash can only leave a torn
+tail that the index does not reference yet; the next writer (or opener)
+repairs it by re-scanning just the bytes past the accounted-for end. Lines
+that are not valid JSON (e.g. from a foreign writer) are skipped, never
+indexed. Several records appended together are preceded by a batch header
+line, and repair indexes them only if every one of them made it to disk.
+
+Clearing a history appends a marker line and empties the index, so it is also
+constant time. Dead bytes before the live records are reclaimed by compaction
+once they outweigh the live data.
+"""
+import json
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+HISTORY_DIR = os.getenv('INSTAGEN_HISTORY_DIR', '.')
+
+# Compact when dead bytes exceed both this floor and the live data size
+COMPACT_MIN_DEAD_BYTES = int(os.getenv('INSTAGEN_HISTORY_COMPACT_KB', '1024')) * 1024
+
+CLEAR_MARKER = {'_op': 'clear'}
+BATCH_OP = 'batch'  # {'_op': 'batch', 'records': n} precedes the n lines of one append_many
+WORD = struct.Struct('<Q')
+
+
+class HistoryLog:
+    """One JSON Lines history with an offset index
+
+    An optional codec transforms records on the way in (codec.pack) and out
+    (codec.unpack), e.g. to store repeated text as references.
+    """
+
+    def __init__(self, path, codec=None):
+        self.path = path
+        self.codec = codec
+        self.index_path = path + '.idx'
+        self.lock_path = path + '.lock'
+        self.appends = 0
+        self.compactions = 0
+        self._thread_lock = threading.Lock()
+        with self._locked(exclusive=True):
+            self._repair()
+
+    @contextmanager
+    def _locked(self, exclusive):
+        """Hold the cross-process lock (shared for readers, exclusive for writers)"""
+        if fcntl is None:
+            with self._thread_lock:
+                yield
+            return
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # Index access
+
+    def _read_covered(self, index):
+        index.seek(0)
+        header = index.read(WORD.size)
+        return WORD.unpack(header)[0] if len(header) == WORD.size else 0
+
+    def _count(self):
+        try:
+            size = os.path.getsize(self.index_path)
+        except FileNotFoundError:
+            return 0
+        return max(size // WORD.size - 1, 0)
+
+    def _offsets(self, start, stop):
+        """Read the record offsets for positions [start, stop)"""
+        if start >= stop:
+            return []
+        with open(self.index_path, 'rb') as index:
+            index.seek((start + 1) * WORD.size)
+            data = index.read((stop - start) * WORD.size)
+        return [offset for (offset,) in WORD.iter_unpack(data)]
+
+    # Writing
+
+    def _repair(self):
+        """Bring the index in line with the log after a crash or foreign write
+
+        Only the log bytes past the index's accounted-for end are scanned; a
+        missing or inconsistent index is rebuilt from the start of the log.
+        """
+        if not os.path.exists(self.path):
+            open(self.path, 'ab').close()
+        log_size = os.path.getsize(self.path)
+
+        mode = 'r+b' if os.path.exists(self.index_path) else 'w+b'
+        with open(self.index_path, mode) as index:
+            covered = self._read_covered(index)
+            if covered > log_size or os.path.getsize(self.index_path) < WORD.size:
+                # Index is ahead of the log or damaged: rebuild from scratch
+                index.truncate(0)
+                index.seek(0)
+                index.write(WORD.pack(0))
+                covered = 0
+            if covered == log_size:
+                return
+
+            with open(self.path, 'r+b') as log:
+                log.seek(covered)
+                offset = covered
+                complete = covered  # End of the last write that landed in full
+                expected, pending = 0, []  # Records still owed by an open batch, and their offsets
+                skip = 0  # Lines left of a damaged batch, dropped unread
+                for line in log:
+                    if not line.endswith(b'\n'):
+                        break  # Torn write from a crashed appender
+                    record = self._decode_line(line) if not skip else None
+                    if skip:
+                        skip -= 1
+                    elif expected:
+                        if record is None:
+                            # Damaged batch: drop all of it, including the lines still to come
+                            skip, expected, pending = expected - 1, 0, []
+                        else:
+                            pending.append(offset)
+                            expected -= 1
+                            if not expected:
+                                self._index_offsets(index, pending)
+                                pending = []
+                    elif record == CLEAR_MARKER:
+                        index.truncate(WORD.size)
+                    elif isinstance(record, dict) and record.get('_op') == BATCH_OP:
+                        expected = record['records']
+                    elif record is not None:
+                        self._index_offsets(index, [offset])
+                    offset += len(line)
+                    if not expected and not skip:
+                        complete = offset
+                # A batch cut short by a crash is removed along with its header
+                log.truncate(complete)
+
+            index.seek(0)
+            index.write(WORD.pack(complete))
+            index.flush()
+            os.fsync(index.fileno())
+
+    @staticmethod
+    def _decode_line(line):
+        """Parsed JSON of a log line, or None for blank or damaged lines"""
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _index_offsets(index, offsets):
+        index.seek(0, os.SEEK_END)
+        index.write(b''.join(WORD.pack(offset) for offset in offsets))
+
+    def _write_lines(self, lines, add_offsets):
+        """Append encoded lines to the log, then index them; caller holds the lock
+
+        Returns the position of the first appended record.
+        """
+        self._repair()
+        first = self._count()
+        header = self._encode({'_op': BATCH_OP, 'records': len(lines)}) if len(lines) > 1 else b''
+        payload = header + b''.join(lines)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        try:
+            start = os.fstat(fd).st_size
+            os.write(fd, payload)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        with open(self.index_path, 'r+b') as index:
+            if add_offsets:
+                offsets = []
+                offset = start + len(header)
+                for line in lines:
+                    offsets.append(offset)
+                    offset += len(line)
+                self._index_offsets(index, offsets)
+            else:
+                index.truncate(WORD.size)
+            index.seek(0)
+            index.write(WORD.pack(start + len(payload)))
+            index.flush()
+            os.fsync(index.fileno())
+        return first
+
+    @staticmethod
+    def _encode(record):
+        return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+    def append(self, record):
+        """Atomically append one record and return its position"""
+        return self.append_many([record])[0]
+
+    def append_many(self, records):
+        """Append several records as one batch, so they land together or not at all"""
+        if self.codec is not None:
+            records = [self.codec.pack(record) for record in records]
+        lines = [self._encode(record) for record in records]
+        if not lines:
+            return []
+        with self._locked(exclusive=True):
+            first = self._write_lines(lines, add_offsets=True)
+            self.appends += len(lines)
+        return list(range(first, first + len(lines)))
+
+    def clear(self):
+        """Drop every record; the space is reclaimed by a later compaction"""
+        with self._locked(exclusive=True):
+            self._write_lines([self._encode(CLEAR_MARKER)], add_offsets=False)
+            self._maybe_compact()
+
+    def _dead_bytes(self):
+        """Bytes before the first live record (cleared or torn data)"""
+        with open(self.index_path, 'rb') as index:
+            covered = self._read_covered(index)
+        first = self._offsets(0, 1)
+        return first[0] if first else covered, covered
+
+    def _maybe_compact(self):
+        dead, covered = self._dead_bytes()
+        if dead >= COMPACT_MIN_DEAD_BYTES and dead >= covered - dead:
+            self._compact()
+
+    def compact(self):
+        """Rewrite the log with only its live records"""
+        with self._locked(exclusive=True):
+            self._repair()
+            self._compact()
+
+    def _compact(self):
+        dead, covered = self._dead_bytes()
+        if dead == 0:
+            return
+        tmp_log, tmp_index = self.path + '.compact', self.index_path + '.compact'
+        with open(self.path, 'rb') as log, open(tmp_log, 'wb') as out:
+            log.seek(dead)
+            out.write(log.read(covered - dead))
+            out.flush()
+            os.fsync(out.fileno())
+
+        offsets = self._offsets(0, self._count())
+        with open(tmp_index, 'wb') as out:
+            out.write(WORD.pack(covered - dead))
+            out.write(b''.join(WORD.pack(offset - dead) for offset in offsets))
+            out.flush()
+            os.fsync(out.fileno())
+
+        # The log is swapped first: if we crash in between, the old index
+        # accounts for more bytes than the new log holds and is rebuilt
+        os.replace(tmp_log, self.path)
+        os.replace(tmp_index, self.index_path)
+        self.compactions += 1
+
+    # Reading
+
+    def __len__(self):
+        return self._count()
+
+    def read(self, start, stop=None):
+        """Return records [start, stop) in insertion order"""
+        with self._locked(exclusive=False):
+            count = self._count()
+            stop = count if stop is None else min(stop, count)
+            start = max(start, 0)
+            offsets = self._offsets(start, stop)
+            if not offsets:
+                return []
+            records = []
+            with open(self.path, 'rb') as log:
+                for offset in offsets:
+                    if log.tell() != offset:
+                        log.seek(offset)
+                    records.append(json.loads(log.readline()))
+        if self.codec is not None:
+            records = [self.codec.unpack(record) for record in records]
+        return records
+
+    def version(self):
+        """Cheap change marker: (log inode, bytes accounted for by the index)
+
+        Appends and clears grow the byte count; compaction replaces the file.
+        """
+        try:
+            inode = os.stat(self.path).st_ino
+            with open(self.index_path, 'rb') as index:
+                return inode, self._read_covered(index)
+        except FileNotFoundError:
+            return None, 0
+
+    def offset(self, position):
+        """Byte offset of a record in the log; changes when the history is cleared or compacted"""
+        offsets = self._offsets(position, position + 1) if 0 <= position < self._count() else []
+        return offsets[0] if offsets else None
+
+    def get(self, position):
+        """Return one record; negative positions count from the newest"""
+        count = self._count()
+        if position < 0:
+            position += count
+        records = self.read(position, position + 1) if 0 <= position < count else []
+        if not records:
+            raise IndexError('history position out of range')
+        return records[0]
+
+    def latest(self, limit=None, skip=0):
+        """Return up to `limit` records, newest first, after skipping the `skip` newest"""
+        count = self._count()
+        stop = max(count - skip, 0)
+        start = 0 if limit is None else max(stop - limit, 0)
+        return list(reversed(self.read(start, stop)))
+
+    def stats(self):
+        """Return record count, log size and reclaimable bytes"""
+        with self._locked(exclusive=False):
+            dead, covered = self._dead_bytes()
+            return {
+                'records': self._count(),
+                'bytes': covered,
+                'dead_bytes': dead,
+                'appends': self.appends,
+                'compactions': self.compactions,
+            }
+
+
+def import_legacy_json(log, json_path):
+    """Copy records from an old whole-file JSON history into an empty log"""
+    if len(log) or not os.path.exists(json_path):
+        return 0
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error importing {json_path}: {e}")
+        return 0
+    log.append_many(records)
+    return len(records)
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def history_log_path(name):
+    return os.path.join(HISTORY_DIR, f'{name}_history.jsonl')
+
+
+def get_history_log(name, legacy_json=None, codec=None):
+    """Return the process-wide log for a history, importing legacy JSON on creation"""
+    with _logs_lock:
+        if name not in _logs:
+            path = history_log_path(name)
+            is_new = not os.path.exists(path)
+            _logs[name] = HistoryLog(path, codec=codec)
+            if is_new and legacy_json:
+                imported = import_legacy_json(_logs[name], legacy_json)
+                if imported:
+                    print(f"Imported {imported} records from {legacy_json} into {path}")
+        return _logs[name]
@@ -0,0 +1,306 @@
+"""Incremental inverted index over the content history log.
+
+Every text field of a record is tokenized into lowercase words and hashtags.
+Hashtags are indexed both as "#tag" and as the plain word. Each term keeps a
+postings list of log positions and field-weighted term frequencies in compact
+arrays. Records are only ever appended to the log, so the lists stay sorted.
+
+The index catches up with the log (including appends by other processes)
+before each query, and saves a snapshot beside the log every
+SNAPSHOT_EVERY newly indexed records. After a restart, only records past
+the snapshot are indexed. A backlog larger than SYNC_REFRESH_LIMIT (a first
+build, or a snapshot far behind the log) is indexed on the 'search' pool in
+batches, while queries answer from the records indexed so far. A snapshot whose last indexed record no longer sits
+at the same byte offset (the history was cleared or compacted) is discarded
+and the index is rebuilt from the log.
+
+Query syntax: words are ANDed, "word*" matches any term with that prefix,
+"#tag" matches hashtags only. Results are ranked by tf-idf, newest first on ties.
+"""
+import bisect
+import math
+import os
+import pickle
+import re
+import threading
+from array import array
+
+from .workers import get_executor
+
+FIELD_WEIGHTS = {
+    'hashtags': 3.0,
+    'caption': 2.0,
+    'image_description': 1.0,
+    'brand_voice': 0.5,
+    'audience': 0.5,
+}
+
+SNAPSHOT_EVERY = 500
+SNAPSHOT_VERSION = 1
+
+# Larger backlogs are indexed in the background instead of before the query
+SYNC_REFRESH_LIMIT = 2000
+REFRESH_BATCH = 1000
+
+TOKEN_RE = re.compile(r'#?\w+')
+
+
+def tokenize(text):
+    """Split text into lowercase words and #hashtags"""
+    terms = []
+    for token in TOKEN_RE.findall(str(text).lower()):
+        terms.append(token)
+        if token.startswith('#') and len(token) > 1:
+            terms.append(token[1:])
+    return terms
+
+
+def timestamp_key(timestamp, fill='0'):
+    """Turn 'YYYY-MM-DD HH:MM:SS' (or a prefix of it) into a sortable integer
+
+    Missing trailing digits are padded with `fill`, so fill='9' turns a date
+    into the last moment of that day for inclusive upper bounds.
+    """
+    digits = re.sub(r'\D', '', str(timestamp or ''))[:14]
+    return int(digits.ljust(14, fill)) if digits else 0
+
+
+def parse_query(query):
+    """Split a query into index terms, keeping trailing '*' prefix markers"""
+    terms = []
+    for raw in query.lower().split():
+        words = TOKEN_RE.findall(raw)
+        if not words:
+            continue
+        if raw.endswith('*'):
+            words[-1] += '*'
+        terms.extend(words)
+    return terms
+
+
+class HistorySearchIndex:
+    """Inverted index over one HistoryLog, persisted beside it"""
+
+    def __init__(self, log, path=None):
+        self.log = log
+        self.path = path or log.path + '.search'
+        self._lock = threading.Lock()  # Guards the index; held per batch, not per refresh
+        self._refresh_lock = threading.Lock()  # One indexer at a time
+        self._background = None
+        self._reset()
+        self._load_snapshot()
+
+    def _reset(self):
+        self.postings = {}  # term -> (array('I') positions, array('f') weights)
+        self.vocabulary = []  # sorted terms, for prefix lookups
+        self.timestamps = array('q')
+        self.indexed = 0
+        self.last_offset = None  # Byte offset of the newest indexed record
+        self._since_snapshot = 0
+
+    # Persistence
+
+    def _load_snapshot(self):
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return
+        if state.get('version') != SNAPSHOT_VERSION:
+            return
+        indexed, last_offset = state['indexed'], state['last_offset']
+        if indexed and (indexed > len(self.log) or self.log.offset(indexed - 1) != last_offset):
+            return  # History was cleared or compacted since the snapshot
+        self.postings = state['postings']
+        self.vocabulary = sorted(self.postings)
+        self.timestamps = state['timestamps']
+        self.indexed = indexed
+        self.last_offset = last_offset
+
+    def _save_snapshot(self):
+        state = {
+            'version': SNAPSHOT_VERSION,
+            'indexed': self.indexed,
+            'last_offset': self.last_offset,
+            'postings': self.postings,
+            'timestamps': self.timestamps,
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self._since_snapshot = 0
+
+    # Indexing
+
+    def _add(self, position, record, new_terms):
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            value = record.get(field)
+            if isinstance(value, list):
+                value = ' '.join(map(str, value))
+            for term in tokenize(value or ''):
+                weights[term] = weights.get(term, 0.0) + weight
+
+        for term, weight in weights.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = (array('I'), array('f'))
+                new_terms.append(term)
+            entry[0].append(position)
+            entry[1].append(weight)
+        self.timestamps.append(timestamp_key(record.get('timestamp')))
+
+    def _stale(self, total):
+        """True if the indexed positions no longer line up with the log (cleared or compacted)"""
+        return bool(self.indexed) and (self.indexed > total or self.log.offset(self.indexed - 1) != self.last_offset)
+
+    def _index_batch(self):
+        """Index up to REFRESH_BATCH new records; caller holds self._lock. Returns how many."""
+        total = len(self.log)
+        if self._stale(total):
+            self._reset()
+        records = self.log.read(self.indexed, min(self.indexed + REFRESH_BATCH, total))
+        new_terms = []
+        for record in records:
+            self._add(self.indexed, record, new_terms)
+            self.indexed += 1
+
+        if len(new_terms) < 64:
+            for term in new_terms:
+                bisect.insort(self.vocabulary, term)
+        else:
+            self.vocabulary = sorted(self.vocabulary + new_terms)
+        self.last_offset = self.log.offset(self.indexed - 1) if self.indexed else None
+        self._since_snapshot += len(records)
+        return len(records)
+
+    def refresh(self):
+        """Index records appended to the log since the last refresh
+
+        The index lock is released between batches, so queries keep
+        answering (from the records indexed so far) during a long catch-up.
+        """
+        with self._refresh_lock:
+            added = 0
+            while True:
+                with self._lock:
+                    indexed = self._index_batch()
+                if not indexed:
+                    break
+                added += indexed
+            with self._lock:
+                if self._since_snapshot >= SNAPSHOT_EVERY:
+                    self._save_snapshot()
+            return added
+
+    def pending(self):
+        """Log records the index has not caught up with yet"""
+        total = len(self.log)
+        with self._lock:
+            return total if self._stale(total) else total - self.indexed
+
+    def refresh_in_background(self):
+        """Catch up with the log on the 'search' pool unless that is already under way; return the future"""
+        with self._lock:
+            if self._background is None or self._background.done():
+                self._background = get_executor('search').submit(self.refresh)
+            return self._background
+
+    # Querying
+
+    def _term_matches(self, token):
+        """Return (positions, weights) arrays for one query token"""
+        import numpy as np
+
+        if token.endswith('*') and len(token) > 1:
+            # Every term with the prefix: the sorted range [prefix, prefix + highest code point)
+            prefix = token[:-1]
+            start = bisect.bisect_left(self.vocabulary, prefix)
+            stop = bisect.bisect_left(self.vocabulary, prefix + '\U0010ffff', start)
+            terms = self.vocabulary[start:stop]
+        else:
+            terms = [token]
+
+        best = {}
+        for term in terms:
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            positions = np.frombuffer(entry[0], dtype=np.uint32)
+            weights = np.frombuffer(entry[1], dtype=np.float32)
+            idf = math.log(1 + self.indexed / len(positions))
+            best[term] = (positions, weights * idf)
+
+        if not best:
+            return np.empty(0, np.uint32), np.empty(0, np.float32)
+        if len(best) == 1:
+            return next(iter(best.values()))
+
+        # A document matching several expansions scores its best one
+        positions = np.concatenate([p for p, _ in best.values()])
+        scores = np.concatenate([s for _, s in best.values()])
+        unique, inverse = np.unique(positions, return_inverse=True)
+        merged = np.zeros(len(unique), np.float32)
+        np.maximum.at(merged, inverse, scores)
+        return unique, merged
+
+    def search(self, query, start=None, end=None, limit=20):
+        """Return [(position, score)] for records matching every query term
+
+        start and end are inclusive 'YYYY-MM-DD[ HH:MM:SS]' bounds on the timestamp.
+        An empty query matches every record, so dates alone can be filtered.
+        A large backlog is indexed in the background; see pending().
+        """
+        import numpy as np
+
+        if self.pending() > SYNC_REFRESH_LIMIT:
+            self.refresh_in_background()
+        else:
+            self.refresh()
+        with self._lock:
+            matches = None
+            if not parse_query(query):
+                matches = (np.arange(self.indexed, dtype=np.uint32), np.zeros(self.indexed, np.float32))
+            for term in parse_query(query):
+                positions, scores = self._term_matches(term)
+                if matches is None:
+                    matches = (positions, scores)
+                    continue
+                common, left, right = np.intersect1d(matches[0], positions,
+                                                     assume_unique=True, return_indices=True)
+                matches = (common, matches[1][left] + scores[right])
+
+            if matches is None or not len(matches[0]):
+                return []
+            positions, scores = matches
+
+            if start or end:
+                stamps = np.frombuffer(self.timestamps, dtype=np.int64)[positions]
+                keep = np.ones(len(positions), bool)
+                if start:
+                    keep &= stamps >= timestamp_key(start)
+                if end:
+                    keep &= stamps <= timestamp_key(end, fill='9')
+                positions, scores = positions[keep], scores[keep]
+
+            # Highest score first, newest record first among equal scores
+            order = np.lexsort((-positions.astype(np.int64), -scores))[:limit]
+            return [(int(positions[i]), float(scores[i])) for i in order]
+
+    def stats(self):
+        with self._lock:
+            return {'records': self.indexed, 'terms': len(self.postings)}
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(log):
+    """Return the process-wide search index for a history log"""
+    with _indexes_lock:
+        if log.path not in _indexes:
+            _indexes[log.path] = HistorySearchIndex(log)
+        return _indexes[log.path]
+
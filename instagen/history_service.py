@@ -0,0 +1,142 @@
+"""Process-wide, read-only view of the histories shared by every session.
+
+The service keeps the newest TAIL_SIZE records of each history log in
+memory. Each rerun calls refresh(), which costs one small index read per
+log. Appends (from this or any other process) are applied to the tail
+incrementally, after checking that the newest known record still sits at
+the same byte offset; anything else (a clear, even one followed by new
+appends, or a compaction) reloads it. Every observed change bumps
+`version`, so sessions can tell that the history moved on since they last
+looked without holding a copy of it.
+
+Sessions attach a SessionHandle (kept in their session state). Dropping the
+handle when Streamlit discards the session releases its reference, so
+`sessions` is the number of live sessions sharing the service.
+"""
+import threading
+import weakref
+from collections import deque
+
+TAIL_SIZE = 200
+
+
+class SessionHandle:
+    """Per-session token: the history version the session last displayed"""
+
+    def __init__(self, service):
+        self.seen_version = service.version
+        self._release = weakref.finalize(self, service._detach)
+
+
+class HistoryService:
+    """Shared tails of the image and content history logs"""
+
+    def __init__(self, logs, tail_size=TAIL_SIZE):
+        self.logs = logs  # name -> HistoryLog
+        self.tail_size = tail_size
+        self.version = 0
+        self.sessions = 0
+        self._lock = threading.Lock()
+        self._tails = {}
+        self._counts = {}
+        self._log_versions = {}
+        self._last_offsets = {}  # name -> byte offset of the newest record in the tail
+        for name in logs:
+            self._reload(name)
+
+    # Session reference counting
+
+    def attach(self):
+        """Register a session and return its handle"""
+        with self._lock:
+            self.sessions += 1
+        return SessionHandle(self)
+
+    def _detach(self):
+        with self._lock:
+            self.sessions -= 1
+
+    # Keeping the tails current
+
+    def _reload(self, name):
+        log = self.logs[name]
+        self._log_versions[name] = log.version()
+        self._counts[name] = len(log)
+        self._last_offsets[name] = log.offset(self._counts[name] - 1)
+        self._tails[name] = deque(log.latest(self.tail_size)[::-1], maxlen=self.tail_size)
+
+    def refresh(self):
+        """Apply changes made to the logs since the last call; returns True if any"""
+        changed = False
+        with self._lock:
+            for name, log in self.logs.items():
+                log_version = log.version()
+                if log_version == self._log_versions[name]:
+                    continue
+                count = len(log)
+                known = self._counts[name]
+                same_file = log_version[0] == self._log_versions[name][0]
+                # A clear followed by enough appends also grows the count, so
+                # check that the newest known record has not moved
+                if (same_file and count >= known and log_version[1] > self._log_versions[name][1]
+                        and log.offset(known - 1) == self._last_offsets[name]):
+                    # Only appends happened: read just the new records
+                    self._tails[name].extend(log.read(max(known, count - self.tail_size), count))
+                    self._counts[name] = count
+                    self._last_offsets[name] = log.offset(count - 1)
+                    self._log_versions[name] = log_version
+                else:
+                    self._reload(name)
+                changed = True
+            if changed:
+                self.version += 1
+        return changed
+
+    # Writing through the service
+
+    def append(self, name, record, handle=None):
+        """Append a record and fold it in, so the writing session is not notified of its own change"""
+        self.logs[name].append(record)
+        self.refresh()
+        if handle is not None:
+            handle.seen_version = self.version
+
+    def append_many(self, name, records, handle=None):
+        """Append several records in one transactional write"""
+        positions = self.logs[name].append_many(records)
+        self.refresh()
+        if handle is not None:
+            handle.seen_version = self.version
+        return positions
+
+    def clear(self, name, handle=None):
+        self.logs[name].clear()
+        self.refresh()
+        if handle is not None:
+            handle.seen_version = self.version
+
+    # Reading
+
+    def count(self, name):
+        with self._lock:
+            return self._counts[name]
+
+    def latest(self, name, limit, skip=0):
+        """Newest-first page of records, served from memory when it lies within the tail"""
+        with self._lock:
+            tail = self._tails[name]
+            if skip + limit <= len(tail) or len(tail) == self._counts[name]:
+                stop = max(len(tail) - skip, 0)
+                return [tail[i] for i in range(stop - 1, max(stop - limit, 0) - 1, -1)]
+        return self.logs[name].latest(limit, skip=skip)
+
+    def get(self, name, position):
+        """One record by log position; negative positions count from the newest"""
+        with self._lock:
+            count = self._counts[name]
+            if position < 0:
+                position += count
+            offset = count - position
+            if 0 < offset <= len(self._tails[name]):
+                return self._tails[name][-offset]
+        return self.logs[name].get(position)
@@ -0,0 +1,160 @@
+"""Persistent, size-bounded LRU cache for generated images.
+
+Entries are keyed by a stable digest of the generation parameters and stored
+as one file per image, so the cache survives restarts and is shared by every
+Streamlit session (and every process) pointing at the same directory.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# Cache configuration (overridable from .env)
+IMAGE_CACHE_DIR = os.getenv('INSTAGEN_IMAGE_CACHE_DIR', os.path.join('.cache', 'images'))
+IMAGE_CACHE_MAX_MB = int(os.getenv('INSTAGEN_IMAGE_CACHE_MB', '256'))
+
+# Fraction of the budget kept after an eviction pass, so evictions are batched
+EVICTION_LOW_WATER = 0.9
+
+ENTRY_SUFFIX = '.img'
+
+
+def stable_seed(prompt, modulo=10000):
+    """Derive a seed from a prompt that is identical across processes"""
+    digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % modulo
+
+
+def cache_key(prompt, style, width, height, seed, provider):
+    """Build the content-addressed key for one generation request"""
+    payload = json.dumps([prompt, style, width, height, seed, provider],
+                         ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def sniff_mime(data):
+    """Guess the image MIME type from its magic bytes"""
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    return 'application/octet-stream'
+
+
+class ImageCache:
+    """Directory-backed LRU cache; recency is tracked through file mtimes"""
+
+    def __init__(self, directory=IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def _entries(self):
+        """List (mtime, size, path) for every cache entry on disk"""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another process
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def get(self, key):
+        """Return cached bytes for a key, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # Mark as most recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Store bytes under a key, evicting least recently used entries if needed"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))  # Atomic, so readers never see partial files
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop the oldest entries until the cache is under its low-water mark"""
+        # Rescan so entries written by other processes are accounted for
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * EVICTION_LOW_WATER)
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+        self._total_bytes = total
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current disk usage"""
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """Return the process-wide image cache shared by all sessions"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ImageCache()
+        return _cache
@@ -0,0 +1,427 @@
+"""Image generation: provider fan-out, caching, variants and stock fallbacks.
+
+generate_image() races the remote providers against the local renderer under
+a latency budget and returns a GenerationResult holding the winning image.
+Every provider goes through the shared image cache.
+"""
+import base64
+import hashlib
+import io
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, as_completed, wait
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from PIL import Image
+
+from .classify import KEYWORDS_VERSION, THEMES, get_colors_from_prompt
+from .image_cache import cache_key, get_image_cache, sniff_mime, stable_seed
+from .openai_client import get_client
+from .payload_cache import get_payload_cache
+from .provider_client import get_provider_client
+from .workers import get_executor
+
+
+# Output size for generated images
+IMAGE_WIDTH = 512
+IMAGE_HEIGHT = 512
+
+
+# Provider endpoints (overridable to point at the local stub server)
+POLLINATIONS_BASE_URL = os.getenv('POLLINATIONS_BASE_URL', 'https://image.pollinations.ai')
+PICSUM_BASE_URL = os.getenv('PICSUM_BASE_URL', 'https://picsum.photos')
+
+# Providers whose image is fixed by prompt, style and seed, so a lost payload can be made again
+REPRODUCIBLE_PROVIDERS = ("local", "pollinations")
+
+
+def to_data_url(data):
+    """Encode image bytes as a data URL with the correct MIME type"""
+    return f"data:{sniff_mime(data)};base64,{base64.b64encode(data).decode()}"
+
+
+def fetch_pollinations_image(prompt, style, seed):
+    """Fetch an image from Pollinations.ai, returning raw bytes or None"""
+    style_prompts = {
+        "realistic": "photorealistic, high quality, detailed, professional photography",
+        "artistic": "artistic, painting style, beautiful colors, creative, digital art",
+        "cartoon": "cartoon style, animated, colorful, fun, illustration",
+        "vintage": "vintage style, retro, classic, film photography, nostalgic",
+        "modern": "modern, contemporary, sleek, minimalist, clean design"
+    }
+
+    enhanced_prompt = f"{prompt}, {style_prompts.get(style, style_prompts['realistic'])}"
+    clean_prompt = enhanced_prompt.replace(" ", "%20").replace(",", "%2C")
+
+    api_url = f"{POLLINATIONS_BASE_URL}/prompt/{clean_prompt}?width={IMAGE_WIDTH}&height={IMAGE_HEIGHT}&seed={seed}"
+    response = get_provider_client().get(api_url, timeout=(3.05, 15))
+
+    if response.status_code == 200 and len(response.content) > 1000:  # Valid image
+        return response.content
+    return None
+
+
+def render_local_image(prompt, style, seed):
+    """Render an AI-style image locally with the NumPy renderer, returning PNG bytes"""
+    from .renderer import render_background
+
+    # Generate colors based on prompt keywords
+    colors = get_colors_from_prompt(prompt, style)
+
+    # Create AI-style abstract/artistic background
+    img = render_background(colors, style, IMAGE_WIDTH, IMAGE_HEIGHT, seed)
+
+    buffered = io.BytesIO()
+    img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def provider_cache_tag(provider):
+    """Cache namespace of a provider; the local renderer's output can change between releases"""
+    if provider == "local":
+        from .renderer import RENDERER_VERSION  # Loads NumPy, which the local render needs anyway
+
+        return f"local-v{RENDERER_VERSION}-k{KEYWORDS_VERSION}"
+    return provider
+
+
+def generate_with_cache(provider, generate_fn, prompt, style, seed):
+    """Run a provider through the shared image cache"""
+    cache = get_image_cache()
+    key = cache_key(prompt, style, IMAGE_WIDTH, IMAGE_HEIGHT, seed, provider_cache_tag(provider))
+    cached = cache.get(key)
+    if cached:
+        return cached
+
+    data = generate_fn(prompt, style, seed)
+    if data:
+        cache.put(key, data)
+    return data
+
+
+# AI-style image generation using multiple free services
+def generate_image_with_ai_services(prompt, style="realistic"):
+    """Generate image using multiple AI services with fallbacks"""
+    seed = stable_seed(prompt)
+
+    # Method 1: Try Pollinations.ai
+    try:
+        data = generate_with_cache("pollinations", fetch_pollinations_image, prompt, style, seed)
+        if data:
+            return to_data_url(data)
+    except Exception as e:
+        print(f"Pollinations error: {e}")
+
+    # Method 2: Create AI-style generated image using PIL
+    try:
+        return to_data_url(generate_with_cache("local", render_local_image, prompt, style, seed))
+    except Exception as e:
+        print(f"AI-style generation error: {e}")
+        return None
+
+
+# Alternative: Generate using Replicate API (another free option)
+def generate_image_with_replicate_style(prompt, style="realistic"):
+    """Generate AI-style image using a simple approach"""
+    try:
+        # Create a more sophisticated prompt based on style
+        style_enhancements = {
+            "realistic": "ultra realistic, 8k, high definition, photographic, professional lighting",
+            "artistic": "digital art, concept art, trending on artstation, beautiful composition",
+            "cartoon": "cartoon illustration, vibrant colors, animated style, cute, friendly",
+            "vintage": "vintage photography, film grain, retro aesthetic, classic composition",
+            "modern": "modern design, clean lines, contemporary art, minimalist, sophisticated"
+        }
+
+        # Combine prompt with style
+        full_prompt = f"{prompt}, {style_enhancements.get(style, style_enhancements['realistic'])}"
+
+        # Use a different free service - ThisPersonDoesNotExist style but for general images
+        # This is a placeholder that will show a generated-looking image
+        seed = stable_seed(full_prompt)
+
+        # Use Lorem Picsum with a specific seed for consistency
+        api_url = f"{PICSUM_BASE_URL}/512/512?random={seed}"
+
+        return api_url
+
+    except Exception as e:
+        print(f"Image generation error: {e}")
+        return None
+
+
+def get_relevant_image_smart(prompt):
+    """Smart image retrieval - try AI generation first, then fallback"""
+    # First try AI services (free and reliable)
+    ai_image = generate_image_with_ai_services(prompt)
+    if ai_image:
+        return ai_image
+
+    # Fallback to curated images if AI fails
+    return get_curated_image_url(prompt)
+
+
+def get_curated_image_url(prompt):
+    """Pick a curated stock image URL matching the prompt"""
+    search_query = prompt.lower().strip()
+
+    # Define curated image collections for different categories
+    image_collections = {
+        # Nature & Landscapes
+        "sunset": "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=512&h=512&fit=crop",
+        "sunrise": "https://images.unsplash.com/photo-1560707303-4e980ce876ad?w=512&h=512&fit=crop",
+        "mountain": "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=512&h=512&fit=crop",
+        "ocean": "https://images.unsplash.com/photo-1505142468610-359e7d316be0?w=512&h=512&fit=crop",
+        "coffee": "https://images.unsplash.com/photo-1495474472287-4d71bcdd2085?w=512&h=512&fit=crop",
+        "cat": "https://images.unsplash.com/photo-1514888286974-6c03e2ca1dba?w=512&h=512&fit=crop",
+        "flower": "https://images.unsplash.com/photo-1490750967868-88aa4486c946?w=512&h=512&fit=crop",
+    }
+
+    # Find the best matching image
+    theme = THEMES.best(search_query, among=image_collections)
+    if theme:
+        return image_collections[theme]
+
+    # Final fallback
+    return "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=512&h=512&fit=crop"
+
+
+def fetch_remote_image(url):
+    """Download an image through the shared provider client, returning bytes or None"""
+    try:
+        response = get_provider_client().get(url, timeout=(3.05, 10))
+        if response.status_code == 200 and len(response.content) > 1000:
+            return response.content
+    except Exception as e:
+        print(f"Image fetch error ({url}): {e}")
+    return None
+
+
+@dataclass
+class GenerationResult:
+    """A single generated image shared by the display, history and caption stages"""
+    prompt: str
+    style: str
+    provider: str
+    seed: int
+    image_bytes: Optional[bytes] = None
+    mime: Optional[str] = None
+    url: Optional[str] = None  # Remote URL when no bytes were fetched
+    timings: Dict[str, float] = field(default_factory=dict)
+    attempts: Dict[str, dict] = field(default_factory=dict)
+    payload_digest: Optional[str] = None  # Set once the bytes are parked in the payload cache
+
+    @property
+    def payload(self):
+        """Image bytes, held directly or fetched back from the payload cache
+
+        A parked image whose spilled copy has since been evicted is generated
+        again from its seed; None when that is not possible.
+        """
+        if self.image_bytes is None and self.payload_digest:
+            return get_payload_cache().get(self.payload_digest) or self._regenerate()
+        return self.image_bytes
+
+    def _regenerate(self):
+        """Re-run a reproducible provider for a lost payload, if it yields the same bytes"""
+        if self.provider not in REPRODUCIBLE_PROVIDERS:
+            return None
+        try:
+            data = generate_with_cache(self.provider, IMAGE_PROVIDERS[self.provider], self.prompt, self.style, self.seed)
+        except Exception as e:
+            print(f"{self.provider} regeneration error: {e}")
+            return None
+        if not data or hashlib.sha256(data).hexdigest() != self.payload_digest:
+            return None  # Not the image that was shown
+        get_payload_cache().put(data)
+        return data
+
+    @property
+    def src(self):
+        """Data URL for generated bytes, otherwise the remote URL"""
+        payload = self.payload
+        return to_data_url(payload) if payload else self.url
+
+    def park(self):
+        """Move the bytes into the shared payload cache so long-lived holders keep only a digest"""
+        if self.image_bytes:
+            self.payload_digest = get_payload_cache().put(self.image_bytes)
+            self.image_bytes = None
+        return self
+
+
+def generate_dalle_image(prompt, style, seed):
+    """Generate an image with DALL-E 3, returning raw bytes"""
+    response = get_client().images.generate(
+        model="dall-e-3",
+        prompt=f"{prompt}, {style} style, high quality, Instagram-worthy",
+        size="1024x1024",
+        quality="standard",
+        n=1,
+        response_format="b64_json",
+    )
+    return base64.b64decode(response.data[0].b64_json)
+
+
+# Latency budget and hedging for the provider fan-out (overridable from .env)
+IMAGE_DEADLINE_SECONDS = float(os.getenv('INSTAGEN_IMAGE_DEADLINE_SECONDS', '12'))
+HEDGE_DELAY_SECONDS = float(os.getenv('INSTAGEN_HEDGE_DELAY_SECONDS', '4'))
+REMOTE_PROVIDERS = [p.strip() for p in os.getenv('INSTAGEN_REMOTE_PROVIDERS', 'pollinations,dall-e').split(',') if p.strip()]
+
+
+IMAGE_PROVIDERS = {
+    "pollinations": fetch_pollinations_image,
+    "dall-e": generate_dalle_image,
+    "local": render_local_image,
+}
+
+
+def generate_image(prompt, style="realistic", seed=None, deadline=None, hedge_delay=None, remote_providers=None):
+    """Race the image providers under a latency budget and return a GenerationResult
+
+    Remote providers are started in order, each one hedge_delay after the
+    previous (or immediately when the previous fails), and the first valid
+    image wins. The local renderer starts right away so its image is ready
+    when the deadline expires or every remote provider fails. How each
+    provider ended is recorded in result.attempts.
+    """
+    if seed is None:
+        seed = stable_seed(prompt)
+    deadline = IMAGE_DEADLINE_SECONDS if deadline is None else deadline
+    hedge_delay = HEDGE_DELAY_SECONDS if hedge_delay is None else hedge_delay
+
+    pool = get_executor("providers")
+    started = time.perf_counter()
+    timings = {}
+    attempts = {}
+
+    def run(provider):
+        provider_started = time.perf_counter()
+        try:
+            data = generate_with_cache(provider, IMAGE_PROVIDERS[provider], prompt, style, seed)
+        except Exception as e:
+            print(f"{provider} generation error: {e}")
+            data = None
+        return data, time.perf_counter() - provider_started
+
+    local_future = pool.submit(run, "local")
+    queue = [p for p in (REMOTE_PROVIDERS if remote_providers is None else remote_providers)
+             if p in IMAGE_PROVIDERS and p != "local"]
+    running = {}
+    winner = None
+    next_start = started
+
+    while winner is None:
+        now = time.perf_counter()
+        if now - started >= deadline:
+            break
+
+        # Start the next provider when its hedge delay is up or nothing is left in flight
+        if queue and (not running or now >= next_start):
+            provider = queue.pop(0)
+            running[pool.submit(run, provider)] = provider
+            attempts[provider] = {"status": "running", "started": now - started}
+            next_start = now + hedge_delay
+            continue
+        if not running:
+            break
+
+        wait_until = min(started + deadline, next_start) if queue else started + deadline
+        done, _ = wait(running, timeout=max(wait_until - now, 0), return_when=FIRST_COMPLETED)
+        for future in done:
+            provider = running.pop(future)
+            data, seconds = future.result()
+            timings[provider] = seconds
+            attempts[provider]["seconds"] = seconds
+            if data and winner is None:
+                attempts[provider]["status"] = "won"
+                winner = (provider, data)
+            elif data:
+                attempts[provider]["status"] = "lost"
+            else:
+                attempts[provider]["status"] = "failed"
+                next_start = time.perf_counter()  # Hedge immediately on failure
+
+    # Cancel providers still in flight; running calls finish in the background and still warm the cache
+    for future, provider in running.items():
+        cancelled = future.cancel()
+        attempts[provider]["status"] = "cancelled" if cancelled else ("abandoned" if winner else "timed_out")
+
+    if winner is None:
+        data, seconds = local_future.result()
+        timings["local"] = seconds
+        attempts["local"] = {"status": "won" if data else "failed", "started": 0.0, "seconds": seconds}
+        if data:
+            winner = ("local", data)
+    else:
+        attempts["local"] = {"status": "unused", "started": 0.0}
+
+    if winner:
+        provider, data = winner
+        timings["total"] = time.perf_counter() - started
+        return GenerationResult(prompt, style, provider, seed, image_bytes=data,
+                                mime=sniff_mime(data), timings=timings, attempts=attempts)
+
+    # Final fallback to stock images, fetched server-side when reachable
+    stock_sources = [
+        ("curated", get_curated_image_url(prompt)),
+        ("picsum", f"{PICSUM_BASE_URL}/{IMAGE_WIDTH}/{IMAGE_HEIGHT}?random={seed}"),
+    ]
+    for provider, url in stock_sources:
+        provider_started = time.perf_counter()
+        data = fetch_remote_image(url)
+        timings[provider] = time.perf_counter() - provider_started
+        if data:
+            timings["total"] = time.perf_counter() - started
+            return GenerationResult(prompt, style, provider, seed, image_bytes=data,
+                                    mime=sniff_mime(data), url=url, timings=timings, attempts=attempts)
+
+    timings["total"] = time.perf_counter() - started
+    return GenerationResult(prompt, style, "curated", seed, url=stock_sources[0][1],
+                            timings=timings, attempts=attempts)
+
+
+# Variants only use the free provider; hedging 16 seeds into DALL-E would be costly
+VARIANT_PROVIDERS = ["pollinations"]
+
+
+def variant_seeds(prompt, count):
+    """Return `count` distinct, reproducible seeds for one prompt (the first is the default seed)"""
+    seeds = [stable_seed(prompt)]
+    attempt = 1
+    while len(seeds) < count:
+        seed = stable_seed(f"{prompt}#variant{attempt}")
+        if seed not in seeds:
+            seeds.append(seed)
+        attempt += 1
+    return seeds
+
+
+def generate_variants(prompt, style, count):
+    """Generate several seeds of one prompt in parallel, yielding (index, result) as each finishes"""
+    pool = get_executor("variants")
+    futures = {
+        pool.submit(generate_image, prompt, style, seed, remote_providers=VARIANT_PROVIDERS): index
+        for index, seed in enumerate(variant_seeds(prompt, count))
+    }
+    for future in as_completed(futures):
+        yield futures[future], future.result()
+
+
+def build_variant_contact_sheet(results, columns=4):
+    """Composite variant results into one PNG contact sheet"""
+    from .renderer import build_contact_sheet
+
+    payloads = [result.payload for result in results]
+    images = [Image.open(io.BytesIO(payload)) for payload in payloads if payload]
+    if not images:
+        return None
+    buffered = io.BytesIO()
+    build_contact_sheet(images, columns=columns).save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def generate_image_from_text(prompt, style="realistic"):
+    """Generate image from text using AI services or DALL-E"""
+    return generate_image(prompt, style).src
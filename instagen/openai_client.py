@@ -0,0 +1,37 @@
+"""Process-wide OpenAI client for the core library.
+
+The client is created on first use instead of at import time, so the core
+can be imported (by the CLI, workers or benchmarks) without an API key and
+callers decide how to report a missing one. The openai package itself
+(about a second to import) is only loaded by the first get_client() call.
+"""
+import os
+import threading
+
+
+class MissingAPIKeyError(RuntimeError):
+    """OPENAI_API_KEY is not set"""
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def require_api_key():
+    """Return OPENAI_API_KEY, raising MissingAPIKeyError if it is not set"""
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        raise MissingAPIKeyError('Set OPENAI_API_KEY in the environment or the .env file')
+    return api_key
+
+
+def get_client():
+    """Return the shared OpenAI client, raising MissingAPIKeyError without a key"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            api_key = require_api_key()
+            from openai import OpenAI
+
+            _client = OpenAI(api_key=api_key)
+        return _client
@@ -0,0 +1,195 @@
+"""Dominant colours and tone statistics of uploaded images.
+
+extract_palette() works on a thumbnail no larger than PALETTE_SIZE px. For
+uploads, palette_for_upload() also decodes JPEGs at reduced scale, so a
+12 MP photo costs one 1/8-scale decode and a few kilobytes of arrays rather
+than a float copy of every pixel. Pixels are binned into a coarse RGB
+histogram with np.bincount. The most populated bins, each represented by the
+mean colour of its pixels, form the palette.
+Every pixel is also assigned to a hue family (warm, green, blue, purple or
+neutral), which the fallback captions use instead of a single average colour.
+
+palette_for_upload() caches palettes by the sha256 of the upload bytes, so
+every path that looks at one upload shares a single extraction. The content
+fallbacks take that palette as an argument and only extract one themselves
+when called without it.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from PIL import Image
+
+PALETTE_SIZE = int(os.getenv('INSTAGEN_PALETTE_SIZE', '96'))  # Long side of the analysed thumbnail
+PALETTE_COLORS = 5
+PALETTE_BITS = 3  # Histogram bits per channel: 8 levels, 512 bins
+PALETTE_CACHE_ENTRIES = 256
+
+# Hue ranges in degrees for each colour family; saturation or value below the
+# thresholds counts as neutral (greys, blacks, washed-out whites)
+HUE_FAMILIES = (('warm', 0, 70), ('green', 70, 170), ('blue', 170, 260), ('purple', 260, 330), ('warm', 330, 360))
+NEUTRAL_SATURATION = 0.15
+NEUTRAL_VALUE = 0.12
+
+TONE_NAMES = {
+    'warm': 'warm red tones',
+    'green': 'natural green tones',
+    'blue': 'cool blue tones',
+    'purple': 'vivid purple tones',
+}
+
+
+@dataclass
+class Palette:
+    """Dominant colours of an image with brightness, saturation and hue-family shares"""
+    colors: list  # [((r, g, b), proportion)], most common first
+    mean: tuple  # Average (r, g, b)
+    brightness: float  # Mean luma, 0-1
+    saturation: float  # Mean HSV saturation, 0-1
+    families: dict = field(default_factory=dict)  # {'warm'|'green'|'blue'|'purple'|'neutral': proportion}
+    extract_ms: float = 0.0
+
+    @property
+    def dominant(self):
+        return self.colors[0][0]
+
+    def hex_colors(self):
+        return [('#%02x%02x%02x' % color, proportion) for color, proportion in self.colors]
+
+    def share(self, family):
+        return self.families.get(family, 0.0)
+
+    def lighting(self):
+        """'dark', 'bright' or '' for a mid-range image"""
+        if self.brightness < 0.3:
+            return 'dark'
+        if self.brightness > 0.75:
+            return 'bright'
+        return ''
+
+    def tone(self):
+        """Short description of the colour character, e.g. 'cool blue tones'"""
+        if self.share('neutral') >= 0.7:
+            return 'monochrome tones'
+        first, second = sorted(TONE_NAMES, key=self.share, reverse=True)[:2]
+        # No clear leader: a weak top family, or a runner-up nearly as large
+        if self.share(first) < 0.35 or self.share(second) >= 0.75 * self.share(first):
+            return 'balanced colors'
+        return TONE_NAMES[first]
+
+
+def thumbnail(image, size=PALETTE_SIZE):
+    """RGB copy of an image no larger than size x size
+
+    Orientation is ignored since it cannot change a palette. The image
+    passed in is never modified.
+    """
+    if image.mode in ('P', 'PA'):
+        image = image.convert('RGBA')  # Resizing palette images would use nearest neighbour
+    if max(image.size) > size:
+        scale = size / max(image.size)
+        target = (max(round(image.width * scale), 1), max(round(image.height * scale), 1))
+        image = image.resize(target, Image.BILINEAR, reducing_gap=2.0)
+    if image.mode in ('RGBA', 'LA'):
+        # Flatten transparency onto white, as the previews do
+        rgba = image.convert('RGBA')
+        image = Image.new('RGB', rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.getchannel('A'))
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+
+def hue_families(pixels):
+    """Proportion of pixels in each hue family, for an (N, 3) uint8 array"""
+    import numpy as np
+
+    rgb = pixels.astype(np.float32) / 255
+    value = rgb.max(axis=1)
+    chroma = value - rgb.min(axis=1)
+    saturation = np.divide(chroma, value, out=np.zeros_like(value), where=value > 0)
+
+    r, g, b = rgb.T
+    safe_chroma = np.where(chroma > 0, chroma, 1)
+    hue = np.select(
+        [value == r, value == g],
+        [((g - b) / safe_chroma) % 6, (b - r) / safe_chroma + 2],
+        (r - g) / safe_chroma + 4,
+    ) * 60
+
+    neutral = (saturation < NEUTRAL_SATURATION) | (value < NEUTRAL_VALUE)
+    families = {'neutral': float(neutral.mean())}
+    for name, start, end in HUE_FAMILIES:
+        in_family = ~neutral & (hue >= start) & (hue < end)
+        families[name] = families.get(name, 0.0) + float(in_family.mean())
+    return families, float(saturation.mean())
+
+
+def extract_palette(image, colors=PALETTE_COLORS):
+    """Palette of a PIL image, computed on a thumbnail; the image itself is left untouched"""
+    import numpy as np
+
+    started = time.perf_counter()
+    pixels = np.asarray(thumbnail(image)).reshape(-1, 3)
+    count = len(pixels)
+
+    # One histogram pass: bin index per pixel, then pixel count and colour sums per bin
+    shift = 8 - PALETTE_BITS
+    quantized = (pixels >> shift).astype(np.int32)
+    bins = (quantized[:, 0] << (2 * PALETTE_BITS)) | (quantized[:, 1] << PALETTE_BITS) | quantized[:, 2]
+    size = 1 << (3 * PALETTE_BITS)
+    counts = np.bincount(bins, minlength=size)
+    sums = np.stack([np.bincount(bins, weights=pixels[:, channel], minlength=size) for channel in range(3)], axis=1)
+
+    top = np.argsort(counts)[::-1][:colors]
+    top = top[counts[top] > 0]
+    palette_colors = [(tuple(int(round(v)) for v in sums[index] / counts[index]), float(counts[index] / count))
+                      for index in top]
+
+    families, saturation = hue_families(pixels)
+    mean = pixels.mean(axis=0)
+    brightness = float((mean @ np.array([0.299, 0.587, 0.114])) / 255)
+    return Palette(
+        colors=palette_colors,
+        mean=tuple(int(round(v)) for v in mean),
+        brightness=brightness,
+        saturation=saturation,
+        families=families,
+        extract_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+_palettes = OrderedDict()
+_palettes_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def palette_for_upload(data):
+    """Palette of uploaded image bytes, extracted once per distinct upload"""
+    digest = hashlib.sha256(data).hexdigest()
+    with _palettes_lock:
+        palette = _palettes.get(digest)
+        if palette is not None:
+            _palettes.move_to_end(digest)
+            _stats['hits'] += 1
+            return palette
+        _stats['misses'] += 1
+
+    image = Image.open(io.BytesIO(data))
+    image.draft('RGB', (PALETTE_SIZE, PALETTE_SIZE))  # JPEG only: decode at reduced scale
+    palette = extract_palette(image)
+    with _palettes_lock:
+        _palettes[digest] = palette
+        while len(_palettes) > PALETTE_CACHE_ENTRIES:
+            _palettes.popitem(last=False)
+    return palette
+
+
+def palette_stats():
+    """Return cache hits and misses of palette_for_upload"""
+    with _palettes_lock:
+        return dict(_stats, entries=len(_palettes))
@@ -0,0 +1,140 @@
+"""Memory-bounded LRU cache for image payloads, backed by a scratch spill directory.
+
+Sessions and history records refer to images by sha256 digest; the bytes
+themselves live here while they are hot. When the resident size exceeds the
+budget, the least recently used payloads are dropped from memory. Payloads
+that are not in the history blob store are spilled to a size-capped scratch
+directory first (an ImageCache keyed by digest), so unpicked variants and
+contact sheets can be read back for a while without ever entering the
+history. A payload only reaches the blob store when a history record
+references it (see history.image_record). Digests of stored blobs can
+always be read back; a spilled payload may eventually be evicted.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from .blob_store import get_blob_store
+from .image_cache import ImageCache
+
+PAYLOAD_CACHE_MAX_MB = int(os.getenv('INSTAGEN_PAYLOAD_CACHE_MB', '64'))
+PAYLOAD_SPILL_DIR = os.getenv('INSTAGEN_PAYLOAD_SPILL_DIR', os.path.join('.cache', 'payloads'))
+PAYLOAD_SPILL_MAX_MB = int(os.getenv('INSTAGEN_PAYLOAD_SPILL_MB', '256'))
+
+
+class PayloadCache:
+    """Byte-budgeted LRU of image payloads with write-back to a scratch ImageCache
+
+    store is the history BlobStore, only ever read from; spill receives
+    evicted payloads that the store does not hold.
+    """
+
+    def __init__(self, store, spill, max_bytes=PAYLOAD_CACHE_MAX_MB * 1024 * 1024):
+        self.store = store
+        self.spill = spill
+        self.max_bytes = max_bytes
+        self.resident_bytes = 0
+        self.peak_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spills = 0
+        self._entries = OrderedDict()  # digest -> [data, on_disk]; on_disk: held by the blob store
+        self._spilling = {}  # digest -> data evicted but not yet on disk
+        self._lock = threading.Lock()
+
+    def put(self, data, on_disk=False):
+        """Hold bytes in memory and return their digest; on_disk marks them as already in the blob store"""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                entry[1] = entry[1] or on_disk
+                self._entries.move_to_end(digest)
+                return digest
+            self._entries[digest] = [data, on_disk]
+            self.resident_bytes += len(data)
+            self.peak_bytes = max(self.peak_bytes, self.resident_bytes)
+            spill = self._evict()
+        self._spill(spill)
+        return digest
+
+    def get(self, digest):
+        """Return the bytes for a digest from memory or disk, or None if unknown"""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return entry[0]
+            if digest in self._spilling:
+                self.hits += 1
+                return self._spilling[digest]
+            self.misses += 1
+
+        data = self.store.get(digest)
+        if data is not None:
+            self.put(data, on_disk=True)
+            return data
+        data = self.spill.get(digest)
+        if data is not None:
+            self.put(data)  # Spilled again on eviction, which also refreshes its recency
+        return data
+
+    def _evict(self):
+        """Drop LRU entries over budget; returns payloads that still need spilling"""
+        spill = []
+        while self.resident_bytes > self.max_bytes and len(self._entries) > 1:
+            digest, (data, on_disk) = self._entries.popitem(last=False)
+            self.resident_bytes -= len(data)
+            self.evictions += 1
+            if not on_disk:
+                self._spilling[digest] = data
+                spill.append(digest)
+        return spill
+
+    def _spill(self, digests):
+        # Disk writes happen outside the lock so readers are not blocked
+        for digest in digests:
+            with self._lock:
+                data = self._spilling.get(digest)
+            if data is None:
+                continue  # A concurrent eviction of the same digest already wrote it
+            self.spill.put(digest, data)
+            with self._lock:
+                if self._spilling.pop(digest, None) is not None:
+                    self.spills += 1
+
+    def stats(self):
+        """Return resident size, budget, hit/miss/eviction counters and scratch usage"""
+        spill_stats = self.spill.stats()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'resident_bytes': self.resident_bytes,
+                'peak_bytes': self.peak_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'spills': self.spills,
+                'spill_bytes': spill_stats['bytes'],
+                'spill_max_bytes': spill_stats['max_bytes'],
+                'spill_evictions': spill_stats['evictions'],
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_payload_cache():
+    """Return the process-wide payload cache shared by all sessions"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PayloadCache(get_blob_store(), ImageCache(PAYLOAD_SPILL_DIR, PAYLOAD_SPILL_MAX_MB * 1024 * 1024))
+        return _cache
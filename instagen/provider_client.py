@@ -0,0 +1,199 @@
+"""Shared HTTP client for outbound image fetches.
+
+All provider calls (Pollinations, picsum, Unsplash) go through one pooled
+requests.Session so connections are kept alive between requests. Transient
+failures are retried with jittered exponential backoff, and a per-host
+circuit breaker stops calling a provider that keeps failing so requests fall
+straight through to the local renderer instead of waiting on timeouts.
+
+requests is imported when the first client is built, not at import time,
+so pages that never fetch an image do not pay for it.
+"""
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Connection pool sizing (overridable from .env)
+POOL_HOSTS = int(os.getenv('INSTAGEN_HTTP_POOL_HOSTS', '8'))
+POOL_PER_HOST = int(os.getenv('INSTAGEN_HTTP_POOL_PER_HOST', '4'))
+POOL_TIMEOUT = float(os.getenv('INSTAGEN_HTTP_POOL_TIMEOUT', '10'))  # Seconds to wait for a free connection
+
+# Retry policy: connection and 5xx/429 errors only; read timeouts are not
+# retried because image providers are slow and each retry would cost the full timeout
+MAX_RETRIES = int(os.getenv('INSTAGEN_HTTP_RETRIES', '2'))
+BACKOFF_FACTOR = 0.3
+BACKOFF_JITTER = 0.3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Circuit breaker: open after this many consecutive failures, probe again after the cooldown
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('INSTAGEN_BREAKER_FAILURES', '3'))
+BREAKER_RESET_SECONDS = float(os.getenv('INSTAGEN_BREAKER_RESET_SECONDS', '30'))
+
+USER_AGENT = 'InstaGen-AI/1.0'
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a half-open probe"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a request may be sent now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True  # Let exactly one probe through
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """Forget a half-open probe that ended without a verdict, so the next request probes"""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+def _timed_pool_classes(pool_timeout):
+    """urllib3 pool classes that wait at most pool_timeout seconds for a free connection
+
+    requests never passes urllib3's pool_timeout, so with pool_block a
+    saturated pool would otherwise park the calling thread indefinitely.
+    """
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    classes = {}
+    for scheme, base in (('http', HTTPConnectionPool), ('https', HTTPSConnectionPool)):
+        def _get_conn(self, timeout=None, _base=base):
+            return _base._get_conn(self, timeout=pool_timeout if timeout is None else timeout)
+        classes[scheme] = type(f'Timed{base.__name__}', (base,), {'_get_conn': _get_conn})
+    return classes
+
+
+class ProviderClient:
+    """Pooled, retrying HTTP client with one circuit breaker per host"""
+
+    def __init__(self, pool_hosts=POOL_HOSTS, pool_per_host=POOL_PER_HOST, max_retries=MAX_RETRIES,
+                 pool_timeout=POOL_TIMEOUT):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.exceptions import EmptyPoolError
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            backoff_factor=BACKOFF_FACTOR,
+            backoff_jitter=BACKOFF_JITTER,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # pool_block caps concurrent connections per host instead of opening extras
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_per_host,
+                              max_retries=retry, pool_block=True)
+        adapter.poolmanager.pool_classes_by_scheme = _timed_pool_classes(pool_timeout)
+
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._request_error = requests.RequestException
+        self._connection_error = requests.ConnectionError
+        self._pool_exhausted = EmptyPoolError
+        self.pool_timeout = pool_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url):
+        """Return the circuit breaker for the host of a URL"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker()
+            return self._breakers[host]
+
+    def get(self, url, timeout=15, **kwargs):
+        """GET a URL through the pool, honouring the host's circuit breaker"""
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+
+        recorded = False
+        try:
+            response = self.session.get(url, timeout=timeout, **kwargs)
+            if response.status_code >= 500 or response.status_code == 429:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            recorded = True
+            return response
+        except self._pool_exhausted as e:
+            # Our own pool is saturated; says nothing about the host, so no failure is recorded
+            raise self._connection_error(
+                f"No free connection to {urlsplit(url).netloc} within {self.pool_timeout:g}s") from e
+        except self._request_error:
+            breaker.record_failure()
+            recorded = True
+            raise
+        finally:
+            if not recorded:
+                breaker.release_probe()  # Otherwise an unexpected error would wedge a half-open breaker
+
+    def stats(self):
+        """Return breaker state per host"""
+        with self._lock:
+            return {
+                host: {'state': b.state, 'failures': b.failures, 'rejected': b.rejected}
+                for host, b in self._breakers.items()
+            }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_provider_client():
+    """Return the process-wide provider client shared by all sessions"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ProviderClient()
+        return _client
@@ -0,0 +1,100 @@
+"""Token-bucket throttling for OpenAI requests shared by every session.
+
+OpenAI enforces two limits per model: requests per minute and tokens per
+minute. Each limit is a bucket that refills continuously at its per-minute
+rate. A caller reserves one request plus its estimated tokens before calling
+the API and sleeps until both are available, so batch jobs slow down to what
+the account allows instead of running into 429s. When a 429 still happens,
+penalize() pauses every caller for the time the API asked for.
+"""
+import os
+import threading
+import time
+
+OPENAI_RPM = int(os.getenv('INSTAGEN_OPENAI_RPM', '500'))
+OPENAI_TPM = int(os.getenv('INSTAGEN_OPENAI_TPM', '200000'))
+
+
+class TokenBucket:
+    """Continuously refilling bucket of `capacity` units, `rate` units per second"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.available = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available (0 if they are now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket
+        return max(amount - self.available, 0) / self.rate
+
+    def take(self, amount):
+        self.available -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets acquired together"""
+
+    def __init__(self, requests_per_minute=OPENAI_RPM, tokens_per_minute=OPENAI_TPM):
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute)
+        self.acquired = 0
+        self.throttled = 0
+        self.waited_seconds = 0.0
+        self.penalties = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        """Block until one request and `tokens` tokens may be spent; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = max(self._paused_until - now,
+                            self.requests.wait_time(1, now),
+                            self.tokens.wait_time(tokens, now))
+                if delay <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    self.acquired += 1
+                    if waited:
+                        self.throttled += 1
+                        self.waited_seconds += waited
+                    return waited
+            time.sleep(delay)
+            waited += delay
+
+    def penalize(self, seconds):
+        """Hold back every caller after the API answered 429"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.penalties += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'acquired': self.acquired,
+                'throttled': self.throttled,
+                'waited_seconds': self.waited_seconds,
+                'penalties': self.penalties,
+            }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_openai_limiter():
+    """Return the process-wide OpenAI rate limiter"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
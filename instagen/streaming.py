@@ -0,0 +1,82 @@
+"""Helpers for consuming streamed chat completions as they arrive.
+
+The model answers the social content prompt as loosely numbered sections
+(caption, hashtags, posting tip). SocialContentParser splits that text while it
+streams so each section can be shown before the completion ends, and gives the
+same final result as parsing the whole completion at once.
+"""
+import queue
+
+SECTIONS = ("caption", "hashtags", "tips")
+
+
+def iter_text(stream):
+    """Yield the non-empty text deltas of a streamed chat completion"""
+    for chunk in stream:
+        if chunk.choices:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+
+def section_header(line):
+    """Return the section a header line starts, or None for content lines"""
+    lowered = line.lower()
+    if "caption" in lowered or line.startswith("1)"):
+        return "caption"
+    if "hashtag" in lowered or line.startswith("2)"):
+        return "hashtags"
+    if "tip" in lowered or line.startswith("3)"):
+        return "tips"
+    return None
+
+
+class SocialContentParser:
+    """Incrementally split caption, hashtags and tips out of streamed text"""
+
+    def __init__(self):
+        self.text = ""
+        self.sections = {name: "" for name in SECTIONS}
+        self.current_section = ""
+        self._pending = ""  # Unterminated last line
+
+    def feed(self, chunk):
+        """Add a text delta and parse every line it completes"""
+        self.text += chunk
+        *lines, self._pending = (self._pending + chunk).split('\n')
+        for line in lines:
+            self._consume(line)
+
+    def close(self):
+        """Parse the final unterminated line once the stream has ended"""
+        if self._pending:
+            self._consume(self._pending)
+            self._pending = ""
+
+    def _consume(self, line):
+        line = line.strip()
+        if not line:
+            return
+        header = section_header(line)
+        if header:
+            self.current_section = header
+        elif self.current_section:
+            self.sections[self.current_section] += line + " "
+
+    def snapshot(self):
+        """Sections parsed so far, including the line still being written"""
+        view = dict(self.sections)
+        pending = self._pending.strip()
+        if pending and self.current_section and not section_header(pending):
+            view[self.current_section] += pending
+        return {name: value.strip() for name, value in view.items()}
+
+
+def latest_update(updates):
+    """Drain a queue of snapshots and return the newest one, or None"""
+    latest = None
+    while True:
+        try:
+            latest = updates.get_nowait()
+        except queue.Empty:
+            return latest
@@ -0,0 +1,157 @@
+"""Cache of vision analysis results keyed by a perceptual hash of the image.
+
+The key is a 64-bit difference hash (dHash) of the upload plus the generation
+parameters. A re-upload of the same photo, or a recompressed, resized or
+lightly cropped copy, hashes to the same or a nearby value. A lookup
+therefore matches any entry with the same parameters within
+VISION_CACHE_MAX_DISTANCE differing bits. Entries expire after a TTL and are
+kept in one JSON file, rewritten atomically, so they survive restarts and
+are shared between processes.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+from PIL import Image
+
+VISION_CACHE_PATH = os.getenv('INSTAGEN_VISION_CACHE_PATH', os.path.join('.cache', 'vision_results.json'))
+VISION_CACHE_TTL_HOURS = float(os.getenv('INSTAGEN_VISION_CACHE_TTL_HOURS', '72'))
+VISION_CACHE_MAX_DISTANCE = int(os.getenv('INSTAGEN_VISION_CACHE_DISTANCE', '6'))
+VISION_CACHE_MAX_ENTRIES = 2000
+
+HASH_SIZE = 8
+
+
+def dhash(image, hash_size=HASH_SIZE):
+    """64-bit difference hash: brightness gradients of a 9x8 grayscale thumbnail"""
+    import numpy as np
+
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR, reducing_gap=2.0)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def params_key(*params):
+    """Stable string for the generation parameters an entry was produced with"""
+    return json.dumps(params, ensure_ascii=False, separators=(',', ':'))
+
+
+class VisionCache:
+    """Near-duplicate lookup of earlier vision results, persisted to one file"""
+
+    def __init__(self, path=VISION_CACHE_PATH, ttl_seconds=VISION_CACHE_TTL_HOURS * 3600,
+                 max_distance=VISION_CACHE_MAX_DISTANCE, max_entries=VISION_CACHE_MAX_ENTRIES):
+        import numpy as np
+
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = []  # [{'hash', 'params', 'created', 'result'}], oldest first
+        self._hashes = np.empty(0, np.uint64)
+        self._mtime = None
+
+    def _reload(self):
+        """Pick up the file again if another process rewrote it"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Vision cache error: {e}")
+            return
+        self._mtime = mtime
+        self._set_entries(entries)
+
+    def _set_entries(self, entries):
+        import numpy as np
+
+        cutoff = time.time() - self.ttl_seconds
+        self._entries = [entry for entry in entries if entry['created'] >= cutoff][-self.max_entries:]
+        self._hashes = np.array([entry['hash'] for entry in self._entries], dtype=np.uint64)
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._mtime = os.stat(self.path).st_mtime_ns
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, image_hash, params):
+        """Return (result, distance) of the closest live match, or (None, None)"""
+        import numpy as np
+
+        with self._lock:
+            self._reload()
+            if len(self._hashes):
+                distances = np.bitwise_count(self._hashes ^ np.uint64(image_hash))
+                cutoff = time.time() - self.ttl_seconds
+                best = None
+                for i in np.flatnonzero(distances <= self.max_distance):
+                    entry = self._entries[i]
+                    if entry['params'] != params or entry['created'] < cutoff:
+                        continue
+                    if best is None or distances[i] < distances[best]:
+                        best = i
+                if best is not None:
+                    distance = int(distances[best])
+                    if distance:
+                        self.near_hits += 1
+                    else:
+                        self.hits += 1
+                    return self._entries[best]['result'], distance
+            self.misses += 1
+            return None, None
+
+    def put(self, image_hash, params, result):
+        with self._lock:
+            self._reload()
+            entry = {'hash': image_hash, 'params': params, 'created': time.time(), 'result': result}
+            self._set_entries(self._entries + [entry])
+            try:
+                self._save()
+            except OSError as e:
+                print(f"Vision cache error: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'near_hits': self.near_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_vision_cache():
+    """Return the process-wide vision result cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = VisionCache()
+        return _cache
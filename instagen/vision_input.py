@@ -0,0 +1,96 @@
+"""Preparing uploaded images for vision model requests.
+
+Vision models never look at more than a bounded resolution: at high detail
+the image is fit into 2048x2048 and then scaled so its short side is at most
+768 px before being cut into 512 px tiles. Sending a full-size phone photo
+therefore only costs encode time and upload bytes. prepare_vision_image()
+applies EXIF orientation, shrinks to that size (decoding JPEGs at reduced
+scale where possible) and re-encodes as JPEG or WebP.
+"""
+import base64
+import io
+import math
+import os
+import time
+from dataclasses import dataclass, field
+
+from PIL import Image, ImageOps
+
+VISION_LONG_SIDE = 2048
+VISION_SHORT_SIDE = int(os.getenv('INSTAGEN_VISION_SHORT_SIDE', '768'))
+VISION_FORMAT = os.getenv('INSTAGEN_VISION_FORMAT', 'JPEG').upper()
+VISION_QUALITY = int(os.getenv('INSTAGEN_VISION_QUALITY', '85'))
+
+# (base tokens, tokens per 512 px tile) for high-detail image inputs
+VISION_TOKEN_COSTS = {
+    'gpt-4o': (85, 170),
+    'gpt-4o-mini': (2833, 5667),
+}
+
+
+@dataclass
+class VisionImage:
+    """Encoded image ready to send, with what it cost to produce"""
+    data_url: str
+    mime: str
+    width: int
+    height: int
+    bytes: int
+    original_size: tuple
+    encode_ms: float
+    image: Image.Image = field(default=None, repr=False, compare=False)  # Oriented, downscaled source
+
+    def tokens(self, model='gpt-4o'):
+        return estimate_vision_tokens(self.width, self.height, model)
+
+
+def vision_size(width, height, long_side=VISION_LONG_SIDE, short_side=VISION_SHORT_SIDE):
+    """Largest size the model will actually use for an image of this size"""
+    scale = min(1.0, long_side / max(width, height))
+    scale = min(scale, short_side / min(width, height))
+    return max(round(width * scale), 1), max(round(height * scale), 1)
+
+
+def estimate_vision_tokens(width, height, model='gpt-4o'):
+    """Estimated input tokens for a high-detail image of this size"""
+    base, per_tile = VISION_TOKEN_COSTS.get(model, VISION_TOKEN_COSTS['gpt-4o'])
+    width, height = vision_size(width, height, VISION_LONG_SIDE, 768)
+    return base + per_tile * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def prepare_vision_image(image, image_format=VISION_FORMAT, quality=VISION_QUALITY):
+    """Orient, downscale and re-encode a PIL image for a vision request"""
+    started = time.perf_counter()
+    original_size = image.size
+    image.draft('RGB', vision_size(*image.size))  # JPEG only: decode at reduced scale
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        # Flatten transparency onto white, as the previews do
+        rgba = image.convert('RGBA')
+        image = Image.new('RGB', rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.getchannel('A'))
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    target = vision_size(*image.size)
+    if target != image.size:
+        image = image.resize(target, Image.LANCZOS, reducing_gap=2.0)
+
+    buffered = io.BytesIO()
+    if image_format == 'WEBP':
+        image.save(buffered, format='WEBP', quality=quality, method=4)
+        mime = 'image/webp'
+    else:
+        image.save(buffered, format='JPEG', quality=quality, optimize=True)
+        mime = 'image/jpeg'
+    data = buffered.getvalue()
+    return VisionImage(
+        data_url=f"data:{mime};base64,{base64.b64encode(data).decode()}",
+        mime=mime,
+        width=image.width,
+        height=image.height,
+        bytes=len(data),
+        original_size=original_size,
+        encode_ms=(time.perf_counter() - started) * 1000,
+        image=image,
+    )
@@ -0,0 +1,46 @@
+"""Shared worker pool for running independent generation stages concurrently.
+
+The pool lives at module level so every Streamlit session and rerun in the
+process submits to the same bounded set of threads.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = int(os.getenv('INSTAGEN_WORKERS', '8'))
+PROVIDER_WORKERS = int(os.getenv('INSTAGEN_PROVIDER_WORKERS', '16'))
+VARIANT_WORKERS = int(os.getenv('INSTAGEN_VARIANT_WORKERS', '4'))
+DERIVATIVE_WORKERS = int(os.getenv('INSTAGEN_DERIVATIVE_WORKERS', '2'))
+BATCH_WORKERS = int(os.getenv('INSTAGEN_BATCH_WORKERS', '8'))
+SEARCH_WORKERS = 1  # Index catch-up is one sequential scan per history
+
+# Provider calls get their own pool: stages running on the default pool wait on
+# provider futures, and sharing one pool could deadlock once it is saturated
+POOL_SIZES = {
+    'default': MAX_WORKERS,
+    'providers': PROVIDER_WORKERS,
+    'variants': VARIANT_WORKERS,
+    'derivatives': DERIVATIVE_WORKERS,
+    'batch': BATCH_WORKERS,
+    'search': SEARCH_WORKERS,
+}
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def get_executor(name='default'):
+    """Return a named process-wide thread pool"""
+    with _executor_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers=POOL_SIZES[name],
+                                                  thread_name_prefix=f'instagen-{name}')
+        return _executors[name]
+
+
+def timed(fn, *args, **kwargs):
+    """Call fn and return (result, elapsed seconds)"""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
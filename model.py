@@ -1,15 +1,39 @@
 import streamlit as st
-from openai import OpenAI
 import base64
 from PIL import Image
 import io
 import json
 import datetime
-import requests
-import os
-import numpy as np
-from typing import Dict, List
+import time
+import queue
+import tempfile
+from concurrent.futures import wait
 from dotenv import load_dotenv
+from instagen.classify import get_themed_placeholder
+from instagen.content import (VISION_DESCRIBE_MAX_TOKENS, create_content_from_text_description,
+                              create_generic_content_with_image_analysis, analyze_image_colors_only,
+                              generate_content_from_description, generate_content_from_user_description,
+                              generate_social_media_content, vision_describe_messages)
+from instagen.images import build_variant_contact_sheet, generate_image, generate_variants
+from instagen.image_cache import get_image_cache
+from instagen.trends import get_personalized_recommendations, get_trending_content, get_trending_examples
+from instagen.openai_client import MissingAPIKeyError, get_client, require_api_key
+from instagen.workers import BATCH_WORKERS, get_executor, timed
+from instagen.streaming import iter_text, latest_update
+from instagen.vision_input import prepare_vision_image
+from instagen.palette import palette_for_upload
+from instagen.vision_cache import dhash, get_vision_cache, params_key
+from instagen.rate_limit import get_openai_limiter
+from instagen.batch import batch_records, collect_batch_images, run_batch
+from instagen.derivatives import derivative_for_blob, derivative_for_bytes
+from instagen.payload_cache import get_payload_cache
+from instagen.history import image_record, open_history
+from instagen.history_dedup import dedup_stats
+from instagen.history_analytics import get_history_analytics
+from instagen.history_export import (EXPORT_PREFIX, ExportFile, iter_log, post_text, remove_stale_exports,
+                                     write_history_zip)
+from instagen.history_search import get_search_index
+from instagen.history_service import HistoryService
 # Remove heavy dependencies for now
 # from diffusers import StableDiffusionPipeline
 # import torch
@@ -17,874 +41,54 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize OpenAI client with environment variable
-def get_openai_client():
-    """Initialize OpenAI client with API key from environment variables"""
-    api_key = os.getenv('OPENAI_API_KEY')
-
-    if not api_key:
-        st.error("🚨 **OpenAI API Key Missing!**")
-        st.error("Please set your OPENAI_API_KEY in the .env file")
-        st.info("📝 **Setup Instructions:**")
-        st.code("""
+def stop_for_missing_api_key():
+    """Explain how to set the OpenAI API key and stop the script"""
+    st.error("🚨 **OpenAI API Key Missing!**")
+    st.error("Please set your OPENAI_API_KEY in the .env file")
+    st.info("📝 **Setup Instructions:**")
+    st.code("""
 1. Create a .env file in your project directory
 2. Add this line: OPENAI_API_KEY=your_actual_api_key_here
 3. Get your API key from: https://platform.openai.com/api-keys
 4. Restart the application
-        """)
-        st.stop()
-
-    return OpenAI(api_key=api_key)
-
-# Initialize OpenAI client
-client = get_openai_client()
-# AI-style image generation using multiple free services
-def generate_image_with_ai_services(prompt, style="realistic"):
-    """Generate image using multiple AI services with fallbacks"""
-
-    # Method 1: Try Pollinations.ai
-    try:
-        style_prompts = {
-            "realistic": "photorealistic, high quality, detailed, professional photography",
-            "artistic": "artistic, painting style, beautiful colors, creative, digital art",
-            "cartoon": "cartoon style, animated, colorful, fun, illustration",
-            "vintage": "vintage style, retro, classic, film photography, nostalgic",
-            "modern": "modern, contemporary, sleek, minimalist, clean design"
-        }
-
-        enhanced_prompt = f"{prompt}, {style_prompts.get(style, style_prompts['realistic'])}"
-        clean_prompt = enhanced_prompt.replace(" ", "%20").replace(",", "%2C")
-
-        # Try Pollinations.ai
-        api_url = f"https://image.pollinations.ai/prompt/{clean_prompt}?width=512&height=512&seed={abs(hash(prompt)) % 10000}"
-        response = requests.get(api_url, timeout=15)
-
-        if response.status_code == 200 and len(response.content) > 1000:  # Valid image
-            img_str = base64.b64encode(response.content).decode()
-            return f"data:image/png;base64,{img_str}"
-
-    except Exception as e:
-        print(f"Pollinations error: {e}")
-
-    # Method 2: Create AI-style generated image using PIL
-    try:
-        from PIL import Image, ImageDraw, ImageFont
-        import random
-        import math
-
-        # Create a 512x512 image with AI-style generation
-        img = Image.new('RGB', (512, 512), color='white')
-        draw = ImageDraw.Draw(img)
-
-        # Generate colors based on prompt keywords
-        colors = get_colors_from_prompt(prompt, style)
-
-        # Create AI-style abstract/artistic background
-        create_ai_style_background(draw, colors, prompt, style)
-
-        # Convert to base64
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        return f"data:image/png;base64,{img_str}"
-
-    except Exception as e:
-        print(f"AI-style generation error: {e}")
-        return None
-
-def get_colors_from_prompt(prompt, style):
-    """Extract colors based on prompt keywords"""
-    prompt_lower = prompt.lower()
-
-    # Color mappings based on keywords
-    color_map = {
-        "sunset": [(255, 165, 0), (255, 69, 0), (255, 20, 147), (138, 43, 226)],
-        "ocean": [(0, 119, 190), (0, 168, 204), (127, 219, 255), (173, 216, 230)],
-        "forest": [(34, 139, 34), (50, 205, 50), (144, 238, 144), (0, 100, 0)],
-        "fire": [(255, 0, 0), (255, 165, 0), (255, 255, 0), (220, 20, 60)],
-        "sky": [(135, 206, 235), (176, 224, 230), (173, 216, 230), (240, 248, 255)],
-        "flower": [(255, 192, 203), (255, 20, 147), (255, 105, 180), (219, 112, 147)],
-        "night": [(25, 25, 112), (72, 61, 139), (106, 90, 205), (123, 104, 238)],
-        "gold": [(255, 215, 0), (255, 223, 0), (255, 255, 224), (240, 230, 140)]
-    }
-
-    # Default colors based on style
-    style_colors = {
-        "realistic": [(100, 100, 100), (150, 150, 150), (200, 200, 200), (250, 250, 250)],
-        "artistic": [(255, 99, 71), (255, 165, 0), (255, 215, 0), (50, 205, 50)],
-        "cartoon": [(255, 20, 147), (0, 191, 255), (50, 205, 50), (255, 165, 0)],
-        "vintage": [(139, 69, 19), (160, 82, 45), (210, 180, 140), (245, 245, 220)],
-        "modern": [(70, 130, 180), (100, 149, 237), (176, 196, 222), (230, 230, 250)]
-    }
-
-    # Find matching colors
-    for keyword, colors in color_map.items():
-        if keyword in prompt_lower:
-            return colors
-
-    return style_colors.get(style, style_colors["realistic"])
-
-def create_ai_style_background(draw, colors, prompt, style):
-    """Create AI-style background based on prompt and style"""
-    import random
-    import math
-
-    # Set seed based on prompt for consistency
-    random.seed(hash(prompt) % 10000)
-
-    if style == "realistic":
-        # Create gradient background
-        for y in range(512):
-            color_ratio = y / 512
-            color = blend_colors(colors[0], colors[1], color_ratio)
-            draw.line([(0, y), (512, y)], fill=color)
-
-    elif style == "artistic":
-        # Create abstract art style
-        for _ in range(20):
-            x = random.randint(0, 512)
-            y = random.randint(0, 512)
-            size = random.randint(20, 100)
-            color = random.choice(colors)
-            draw.ellipse([x-size//2, y-size//2, x+size//2, y+size//2], fill=color)
-
-    elif style == "cartoon":
-        # Create fun, colorful shapes
-        for _ in range(15):
-            x = random.randint(50, 462)
-            y = random.randint(50, 462)
-            size = random.randint(30, 80)
-            color = random.choice(colors)
-            # Draw various shapes
-            shape_type = random.choice(['circle', 'square', 'triangle'])
-            if shape_type == 'circle':
-                draw.ellipse([x-size//2, y-size//2, x+size//2, y+size//2], fill=color)
-            elif shape_type == 'square':
-                draw.rectangle([x-size//2, y-size//2, x+size//2, y+size//2], fill=color)
-
-    elif style == "vintage":
-        # Create vintage texture
-        base_color = colors[0]
-        for y in range(0, 512, 4):
-            for x in range(0, 512, 4):
-                noise = random.randint(-20, 20)
-                color = (
-                    max(0, min(255, base_color[0] + noise)),
-                    max(0, min(255, base_color[1] + noise)),
-                    max(0, min(255, base_color[2] + noise))
-                )
-                draw.rectangle([x, y, x+4, y+4], fill=color)
-
-    else:  # modern
-        # Create clean, geometric patterns
-        for i in range(8):
-            y = i * 64
-            color = colors[i % len(colors)]
-            draw.rectangle([0, y, 512, y+64], fill=color)
-
-def blend_colors(color1, color2, ratio):
-    """Blend two colors based on ratio"""
-    return (
-        int(color1[0] * (1 - ratio) + color2[0] * ratio),
-        int(color1[1] * (1 - ratio) + color2[1] * ratio),
-        int(color1[2] * (1 - ratio) + color2[2] * ratio)
-    )
-
-def generate_social_media_content(prompt, style):
-    """Generate caption, hashtags, and tips based on image prompt and style"""
-    try:
-        # First try AI generation with OpenAI
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a social media expert. Generate engaging captions, relevant hashtags, and posting tips for images."
-                },
-                {
-                    "role": "user",
-                    "content": f"Create social media content for this specific image: '{prompt}' in {style} style. The caption should be about the ACTUAL IMAGE CONTENT (what's shown: {prompt}), not about AI generation. Provide: 1) An engaging caption about the image subject (2-3 sentences), 2) 10-15 relevant hashtags, 3) One posting tip. Focus on the image content, not the AI aspect."
-                }
-            ],
-            max_tokens=300
-        )
-
-        content = response.choices[0].message.content
-
-        # Parse the AI response (basic parsing)
-        lines = content.split('\n')
-        caption = ""
-        hashtags = ""
-        tips = ""
-
-        current_section = ""
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            if "caption" in line.lower() or line.startswith("1)"):
-                current_section = "caption"
-                continue
-            elif "hashtag" in line.lower() or line.startswith("2)"):
-                current_section = "hashtags"
-                continue
-            elif "tip" in line.lower() or line.startswith("3)"):
-                current_section = "tips"
-                continue
-
-            if current_section == "caption":
-                caption += line + " "
-            elif current_section == "hashtags":
-                hashtags += line + " "
-            elif current_section == "tips":
-                tips += line + " "
-
-        # Clean up the content
-        caption = caption.strip()
-        hashtags = hashtags.strip()
-        tips = tips.strip()
-
-        # If parsing failed, use the whole content as caption
-        if not caption:
-            caption = content[:200] + "..."
-
-        return {
-            'caption': caption,
-            'hashtags': hashtags if hashtags else generate_fallback_hashtags(prompt, style),
-            'tips': tips if tips else generate_fallback_tips(style)
-        }
-
-    except Exception as e:
-        print(f"AI content generation error: {e}")
-        # Fallback to rule-based generation
-        return generate_fallback_social_content(prompt, style)
-
-def generate_fallback_social_content(prompt, style):
-    """Generate social media content using rule-based approach"""
-
-    # Generate caption based on prompt keywords - MORE SPECIFIC TO THE ACTUAL PROMPT
-    caption_templates = {
-        "sunset": [
-            f"Captured this stunning sunset moment 🌅 {prompt[:30]}... absolutely breathtaking!",
-            f"Golden hour magic never gets old ✨ This {prompt.lower()} scene is pure perfection 🧡",
-            f"When nature paints the sky like this... {prompt[:40]} 🌅 Simply magical!"
-        ],
-        "ocean": [
-            f"Ocean vibes hitting different today 🌊 This {prompt.lower()} view is everything 💙",
-            f"Lost in the beauty of {prompt[:30]}... �️ Ocean therapy at its finest!",
-            f"The sea always knows how to calm the soul 🌊 {prompt[:40]} perfection!"
-        ],
-        "forest": [
-            f"Into the wild we go 🌲 This {prompt.lower()} scene speaks to my soul �",
-            f"Finding peace in nature's embrace � {prompt[:40]} is pure magic!",
-            f"Forest therapy session complete ✅ {prompt[:30]} vibes are unmatched �"
-        ],
-        "mountain": [
-            f"Peak vibes only! 🏔️ This {prompt.lower()} view is absolutely stunning ⛰️",
-            f"Mountains are calling and I must go... {prompt[:40]} adventure awaits! 🗻",
-            f"Elevated perspectives, elevated mood � {prompt[:30]} perfection!"
-        ],
-        "flower": [
-            f"Bloom where you are planted 🌸 This {prompt.lower()} beauty is incredible!",
-            f"Nature's confetti is the prettiest 🌼 {prompt[:40]} magic ✨",
-            f"Petals and positivity 🌺 {prompt[:30]} bringing all the good vibes!"
-        ],
-        "coffee": [
-            f"But first, coffee ☕ This {prompt.lower()} setup is my morning mood!",
-            f"Brewing up some good vibes ☕ {prompt[:40]} perfection in a cup!",
-            f"Life happens, coffee helps ☕ {prompt[:30]} aesthetic is everything!"
-        ],
-        "city": [
-            f"Urban adventures await 🏙️ This {prompt.lower()} scene is pure energy!",
-            f"City lights and endless possibilities ✨ {prompt[:40]} vibes are unmatched!",
-            f"Concrete jungle where dreams are made 🌃 {prompt[:30]} magic!"
-        ],
-        "cat": [
-            f"Feline fine with this adorable moment 🐱 {prompt[:40]} cuteness overload!",
-            f"Cat vibes are the best vibes 😻 This {prompt.lower()} scene melts my heart!",
-            f"Purrfection captured in one frame � {prompt[:30]} is everything!"
-        ],
-        "dog": [
-            f"Puppy love at its finest 🐕 This {prompt.lower()} moment is pure joy!",
-            f"Dogs make everything better 🐶 {prompt[:40]} happiness captured!",
-            f"Unconditional love in one frame 🐾 {prompt[:30]} perfection!"
-        ],
-        "food": [
-            f"Food is love, food is life 🍽️ This {prompt.lower()} looks absolutely delicious!",
-            f"Feast your eyes on this beauty 😋 {prompt[:40]} is making me hungry!",
-            f"Good food, good mood 🤤 {prompt[:30]} perfection on a plate!"
-        ]
-    }
-
-    # Find matching caption - check multiple keywords
-    caption = f"Absolutely loving this {prompt.lower()} moment ✨ AI art that captures the essence perfectly! 🎨"
-
-    for keyword, templates in caption_templates.items():
-        if keyword in prompt.lower():
-            import random
-            caption = random.choice(templates)
-            break
-
-    # If no specific keyword found, create a custom caption based on the prompt
-    if "AI art that captures" in caption:  # Default wasn't changed
-        # Create a more personalized caption
-        prompt_words = prompt.lower().split()
-        if len(prompt_words) > 0:
-            main_subject = prompt_words[0] if len(prompt_words) == 1 else " ".join(prompt_words[:2])
-            caption = f"Mesmerized by this {main_subject} creation ✨ {prompt[:50]}... pure artistic magic! 🎨"
-
-    # Generate hashtags
-    hashtags = generate_fallback_hashtags(prompt, style)
-
-    # Generate tips
-    tips = generate_fallback_tips(style)
-
-    return {
-        'caption': caption,
-        'hashtags': hashtags,
-        'tips': tips
-    }
-
-def generate_fallback_hashtags(prompt, style):
-    """Generate hashtags based on prompt and style"""
-
-    # Base hashtags
-    base_tags = ["#AIart", "#DigitalArt", "#CreativeAI", "#ArtificialIntelligence", "#GeneratedArt"]
-
-    # Style-specific hashtags
-    style_tags = {
-        "realistic": ["#PhotoRealistic", "#DigitalPhotography", "#AIPhotography"],
-        "artistic": ["#AbstractArt", "#DigitalPainting", "#ConceptualArt"],
-        "cartoon": ["#CartoonArt", "#Animation", "#DigitalIllustration"],
-        "vintage": ["#VintageArt", "#RetroStyle", "#ClassicArt"],
-        "modern": ["#ModernArt", "#ContemporaryArt", "#MinimalArt"]
-    }
+    """)
+    st.stop()
 
-    # Keyword-specific hashtags
-    keyword_tags = {
-        "sunset": ["#Sunset", "#GoldenHour", "#SkyArt", "#NatureArt"],
-        "ocean": ["#Ocean", "#Seascape", "#BlueArt", "#WaterArt"],
-        "forest": ["#Forest", "#NatureArt", "#TreeArt", "#GreenArt"],
-        "mountain": ["#Mountain", "#Landscape", "#PeakViews", "#NaturePhotography"],
-        "flower": ["#FlowerArt", "#Botanical", "#NatureArt", "#BloomArt"],
-        "coffee": ["#CoffeeArt", "#CafeVibes", "#MorningArt"],
-        "city": ["#CityArt", "#UrbanArt", "#Skyline", "#ArchitectureArt"]
-    }
-
-    # Combine hashtags
-    all_tags = base_tags.copy()
-    all_tags.extend(style_tags.get(style, []))
-
-    # Add keyword-specific tags
-    for keyword, tags in keyword_tags.items():
-        if keyword in prompt.lower():
-            all_tags.extend(tags)
-            break
-
-    # Add general popular tags
-    popular_tags = ["#Art", "#Creative", "#Digital", "#Design", "#Beautiful", "#Amazing", "#Cool", "#Awesome"]
-    all_tags.extend(popular_tags[:3])  # Add first 3
-
-    return " ".join(all_tags[:15])  # Limit to 15 hashtags
-
-def generate_fallback_tips(style):
-    """Generate posting tips based on style"""
-
-    tips = {
-        "realistic": "💡 Post during peak hours (7-9 PM) for maximum engagement. Realistic AI art performs well on LinkedIn and Facebook!",
-        "artistic": "💡 Share the creative process in your stories! Artistic content gets great engagement on Instagram and Pinterest.",
-        "cartoon": "💡 Perfect for TikTok and Instagram Reels! Add fun music and watch the engagement soar 🚀",
-        "vintage": "💡 Vintage content performs amazingly on Pinterest! Consider creating a vintage art board for better reach.",
-        "modern": "💡 Modern art resonates well on professional platforms. Great for LinkedIn posts about creativity and innovation!"
-    }
-
-    return tips.get(style, "💡 Post consistently and engage with your audience for the best results! AI art is trending right now 🔥")
-
-# Alternative: Generate using Replicate API (another free option)
-def generate_image_with_replicate_style(prompt, style="realistic"):
-    """Generate AI-style image using a simple approach"""
-    try:
-        # Create a more sophisticated prompt based on style
-        style_enhancements = {
-            "realistic": "ultra realistic, 8k, high definition, photographic, professional lighting",
-            "artistic": "digital art, concept art, trending on artstation, beautiful composition",
-            "cartoon": "cartoon illustration, vibrant colors, animated style, cute, friendly",
-            "vintage": "vintage photography, film grain, retro aesthetic, classic composition",
-            "modern": "modern design, clean lines, contemporary art, minimalist, sophisticated"
-        }
-
-        # Combine prompt with style
-        full_prompt = f"{prompt}, {style_enhancements.get(style, style_enhancements['realistic'])}"
-
-        # Use a different free service - ThisPersonDoesNotExist style but for general images
-        # This is a placeholder that will show a generated-looking image
-        seed = abs(hash(full_prompt)) % 10000
-
-        # Use Lorem Picsum with a specific seed for consistency
-        api_url = f"https://picsum.photos/512/512?random={seed}"
-
-        return api_url
-
-    except Exception as e:
-        print(f"Image generation error: {e}")
-        return None
-
-# Trending content function
-def get_real_time_trending_data():
-    """Get real-time trending data from multiple sources"""
-    # Always use enhanced trending data with real links
-    return get_enhanced_trending_data()
-
-def fetch_real_trending_urls():
-    """Fetch real trending URLs from social media platforms"""
-    try:
-        # Method 1: Try to get trending content from Instagram's public API
-        instagram_trends = fetch_instagram_trending()
-        if instagram_trends:
-            return instagram_trends
-    except Exception as e:
-        print(f"Instagram trending fetch error: {e}")
-
-    try:
-        # Method 2: Try to get trending from TikTok's public data
-        tiktok_trends = fetch_tiktok_trending()
-        if tiktok_trends:
-            return tiktok_trends
-    except Exception as e:
-        print(f"TikTok trending fetch error: {e}")
-
-    # Method 3: Use curated real trending content (manually updated)
-    return get_curated_real_trending_urls()
-
-def fetch_instagram_trending():
-    """Fetch trending Instagram content using public methods"""
-    try:
-        # This would use Instagram's public hashtag pages
-        # For now, return None to use curated content
-        return None
-    except:
-        return None
-
-def fetch_tiktok_trending():
-    """Fetch trending TikTok content using public methods"""
+def get_openai_client():
+    """Return the shared OpenAI client, built on first use rather than on every rerun"""
     try:
-        # This would use TikTok's trending page data
-        # For now, return None to use curated content
-        return None
-    except:
-        return None
-
-def get_curated_real_trending_urls():
-    """Get manually curated real trending URLs (updated regularly)"""
-    # These are REAL trending posts that are manually verified and updated
-    current_date = datetime.datetime.now().strftime("%Y-%m-%d")
-
-    real_trending_urls = {
-        "#AI2024": [
-            {
-                "url": "https://www.instagram.com/explore/tags/ai2024/",
-                "title": "Browse AI2024 Hashtag on Instagram",
-                "engagement": "3.2M posts",
-                "platform": "Instagram",
-                "type": "hashtag_page"
-            },
-            {
-                "url": "https://www.tiktok.com/tag/ai2024",
-                "title": "AI2024 Trending Videos on TikTok",
-                "engagement": "2.5M videos",
-                "platform": "TikTok",
-                "type": "hashtag_page"
-            },
-            {
-                "url": "https://www.linkedin.com/feed/hashtag/ai2024/",
-                "title": "AI2024 Professional Posts on LinkedIn",
-                "engagement": "950K posts",
-                "platform": "LinkedIn",
-                "type": "hashtag_page"
-            }
-        ],
-        "#ContentCreator": [
-            {
-                "url": "https://www.instagram.com/explore/tags/contentcreator/",
-                "title": "Content Creator Posts on Instagram",
-                "engagement": "6.1M posts",
-                "platform": "Instagram",
-                "type": "hashtag_page"
-            },
-            {
-                "url": "https://www.tiktok.com/tag/contentcreator",
-                "title": "Content Creator Videos on TikTok",
-                "engagement": "4.2M videos",
-                "platform": "TikTok",
-                "type": "hashtag_page"
-            },
-            {
-                "url": "https://www.youtube.com/results?search_query=content+creator+2024",
-                "title": "Content Creator Videos on YouTube",
-                "engagement": "2.8M results",
-                "platform": "YouTube",
-                "type": "search_results"
-            }
-        ],
-        "#DigitalArt": [
-            {
-                "url": "https://www.instagram.com/explore/tags/digitalart/",
-                "title": "Digital Art Showcase on Instagram",
-                "engagement": "3.8M posts",
-                "platform": "Instagram",
-                "type": "hashtag_page"
-            },
-            {
-                "url": "https://www.artstation.com/search?sort_by=trending&query=digital%20art",
-                "title": "Trending Digital Art on ArtStation",
-                "engagement": "1.9M artworks",
-                "platform": "ArtStation",
-                "type": "trending_page"
-            },
-            {
-                "url": "https://www.deviantart.com/tag/digitalart",
-                "title": "Digital Art Community on DeviantArt",
-                "engagement": "2.1M pieces",
-                "platform": "DeviantArt",
-                "type": "tag_page"
-            }
-        ]
-    }
-
-    return real_trending_urls
-
-def fetch_live_trends():
-    """Fetch live trending data with real URLs"""
-    return fetch_real_trending_urls()
-
-def get_enhanced_trending_data():
-    """Enhanced trending data with real-time context and working links"""
-    current_month = datetime.datetime.now().strftime("%B")
-    current_year = datetime.datetime.now().year
-    current_day = datetime.datetime.now().strftime("%A")
-    current_hour = datetime.datetime.now().hour
-
-    # Time-based trending adjustments
-    if current_hour < 12:
-        time_hashtags = [{"tag": "#MorningMotivation", "posts": "1.2M", "growth": "+25%", "real_trending_links": [
-            {"url": "https://www.instagram.com/explore/tags/morningmotivation/", "title": "Morning Motivation on Instagram", "engagement": "1.2M posts", "platform": "Instagram"}
-        ]}]
-        time_ideas = ["Share your morning routine", "Post motivational quotes"]
-    elif current_hour < 17:
-        time_hashtags = [{"tag": "#AfternoonVibes", "posts": "800K", "growth": "+18%", "real_trending_links": [
-            {"url": "https://www.instagram.com/explore/tags/afternoonvibes/", "title": "Afternoon Vibes on Instagram", "engagement": "800K posts", "platform": "Instagram"}
-        ]}]
-        time_ideas = ["Share your lunch break activities", "Post productivity tips"]
-    else:
-        time_hashtags = [{"tag": "#EveningReflection", "posts": "950K", "growth": "+22%", "real_trending_links": [
-            {"url": "https://www.instagram.com/explore/tags/eveningreflection/", "title": "Evening Reflection on Instagram", "engagement": "950K posts", "platform": "Instagram"}
-        ]}]
-        time_ideas = ["Share your evening routine", "Post about daily achievements"]
-
-    trending_data = {
-        "trending_hashtags": [
-            {
-                "tag": "#AI2024",
-                "posts": "3.2M",
-                "growth": "+35%",
-                "real_trending_links": [
-                    {"url": "https://www.instagram.com/explore/tags/ai2024/", "title": "Browse #AI2024 on Instagram", "engagement": "3.2M posts", "platform": "Instagram"},
-                    {"url": "https://www.tiktok.com/tag/ai2024", "title": "AI2024 Videos on TikTok", "engagement": "2.5M videos", "platform": "TikTok"},
-                    {"url": "https://www.youtube.com/results?search_query=AI+2024+trending", "title": "AI 2024 Trending Videos", "engagement": "1.8M results", "platform": "YouTube"}
-                ]
-            },
-            {
-                "tag": "#ContentCreator",
-                "posts": "6.1M",
-                "growth": "+18%",
-                "real_trending_links": [
-                    {"url": "https://www.instagram.com/explore/tags/contentcreator/", "title": "Content Creator Posts on Instagram", "engagement": "6.1M posts", "platform": "Instagram"},
-                    {"url": "https://www.tiktok.com/tag/contentcreator", "title": "Content Creator Videos on TikTok", "engagement": "4.2M videos", "platform": "TikTok"},
-                    {"url": "https://www.youtube.com/results?search_query=content+creator+tips+2024", "title": "Content Creator Tips 2024", "engagement": "2.8M results", "platform": "YouTube"}
-                ]
-            },
-            {
-                "tag": "#DigitalArt",
-                "posts": "3.8M",
-                "growth": "+25%",
-                "real_trending_links": [
-                    {"url": "https://www.instagram.com/explore/tags/digitalart/", "title": "Digital Art Showcase on Instagram", "engagement": "3.8M posts", "platform": "Instagram"},
-                    {"url": "https://www.artstation.com/search?sort_by=trending&query=digital%20art", "title": "Trending Digital Art on ArtStation", "engagement": "1.9M artworks", "platform": "ArtStation"},
-                    {"url": "https://www.deviantart.com/tag/digitalart", "title": "Digital Art Community on DeviantArt", "engagement": "2.1M pieces", "platform": "DeviantArt"}
-                ]
-            },
-            {
-                "tag": "#TechTrends",
-                "posts": "2.3M",
-                "growth": "+28%",
-                "real_trending_links": [
-                    {"url": "https://www.instagram.com/explore/tags/techtrends/", "title": "Tech Trends on Instagram", "engagement": "2.3M posts", "platform": "Instagram"},
-                    {"url": "https://www.tiktok.com/tag/techtrends", "title": "Tech Trends Videos on TikTok", "engagement": "1.8M videos", "platform": "TikTok"},
-                    {"url": "https://www.linkedin.com/feed/hashtag/techtrends/", "title": "Tech Trends Professional Posts", "engagement": "950K posts", "platform": "LinkedIn"}
-                ]
-            },
-            {
-                "tag": "#CreativeAI",
-                "posts": "1.2M",
-                "growth": "+45%",
-                "real_trending_links": [
-                    {"url": "https://www.instagram.com/explore/tags/creativeai/", "title": "Creative AI Posts on Instagram", "engagement": "1.2M posts", "platform": "Instagram"},
-                    {"url": "https://www.reddit.com/r/artificial/", "title": "AI Community on Reddit", "engagement": "950K members", "platform": "Reddit"},
-                    {"url": "https://www.youtube.com/results?search_query=creative+AI+2024", "title": "Creative AI Videos 2024", "engagement": "800K results", "platform": "YouTube"}
-                ]
-            },
-            {
-                "tag": f"#{current_month}Vibes",
-                "posts": "1.5M",
-                "growth": "+30%",
-                "real_trending_links": [
-                    {"url": f"https://www.instagram.com/explore/tags/{current_month.lower()}vibes/", "title": f"{current_month} Vibes on Instagram", "engagement": "1.5M posts", "platform": "Instagram"},
-                    {"url": f"https://www.pinterest.com/search/pins/?q={current_month.lower()}%20vibes", "title": f"{current_month} Inspiration on Pinterest", "engagement": "1.2M pins", "platform": "Pinterest"},
-                    {"url": f"https://www.tiktok.com/tag/{current_month.lower()}vibes", "title": f"{current_month} Aesthetic on TikTok", "engagement": "900K videos", "platform": "TikTok"}
-                ]
-            },
-            {
-                "tag": "#InstagramReels",
-                "posts": "15.2M",
-                "growth": "+12%",
-                "real_trending_links": [
-                    {"url": "https://www.instagram.com/explore/tags/instagramreels/", "title": "Instagram Reels Trending", "engagement": "15.2M posts", "platform": "Instagram"},
-                    {"url": "https://www.instagram.com/reels/", "title": "Instagram Reels Explore Page", "engagement": "Live trending", "platform": "Instagram"},
-                    {"url": "https://www.youtube.com/results?search_query=instagram+reels+viral+trends+2024", "title": "Viral Reels Trends 2024", "engagement": "2.8M results", "platform": "YouTube"}
-                ]
-            },
-            {
-                "tag": f"#{current_day}Motivation",
-                "posts": "2.1M",
-                "growth": "+20%",
-                "real_trending_links": [
-                    {"url": f"https://www.instagram.com/explore/tags/{current_day.lower()}motivation/", "title": f"{current_day} Motivation on Instagram", "engagement": "2.1M posts", "platform": "Instagram"},
-                    {"url": f"https://www.tiktok.com/tag/{current_day.lower()}motivation", "title": f"{current_day} Motivation on TikTok", "engagement": "1.5M videos", "platform": "TikTok"},
-                    {"url": f"https://www.linkedin.com/feed/hashtag/{current_day.lower()}motivation/", "title": f"{current_day} Professional Motivation", "engagement": "750K posts", "platform": "LinkedIn"}
-                ]
-            }
-        ] + time_hashtags,
-        "trending_topics": [
-            {"topic": f"AI Tools {current_year}", "engagement": "Very High", "trend": "🔥"},
-            {"topic": "Sustainable Living", "engagement": "Very High", "trend": "📈"},
-            {"topic": f"{current_month} Content Ideas", "engagement": "High", "trend": "�"},
-            {"topic": "Digital Wellness", "engagement": "High", "trend": "💚"},
-            {"topic": "Creative Process", "engagement": "Very High", "trend": "🔥"},
-            {"topic": "Personal Branding", "engagement": "High", "trend": "⚡"}
-        ],
-        "content_ideas": [
-            f"Share your favorite AI tools for {current_month} {current_year}",
-            f"Create a '{current_day} Check-in' post with your goals",
-            f"Post about trending topics in {current_month}",
-            "Share your AI-powered creative workflow",
-            "Create educational content about current innovations",
-            "Post behind-the-scenes of your content creation"
-        ] + time_ideas,
-        "last_updated": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "data_source": "Dynamic Contextual Analysis + Real Platform Links",
-        "update_frequency": "Hashtags/topics update dynamically, URLs link to live content"
-    }
-    return trending_data
-
-def get_trending_content():
-    """Main function to get trending content (backwards compatibility)"""
-    return get_real_time_trending_data()
-
-def get_personalized_recommendations(niche, content_type, audience_size, posting_frequency):
-    """Generate personalized content recommendations based on user preferences"""
-
-    # Niche-specific recommendations
-    niche_strategies = {
-        "Tech & AI": {
-            "hashtags": ["#AI", "#TechTrends", "#Innovation", "#MachineLearning", "#FutureOfWork"],
-            "best_times": ["9-11 AM", "2-4 PM", "7-9 PM"],
-            "content_focus": "Educational, cutting-edge insights, tool reviews"
-        },
-        "Lifestyle & Wellness": {
-            "hashtags": ["#Wellness", "#SelfCare", "#Mindfulness", "#HealthyLiving", "#LifestyleGoals"],
-            "best_times": ["6-8 AM", "12-2 PM", "6-8 PM"],
-            "content_focus": "Daily routines, wellness tips, motivational content"
-        },
-        "Business & Entrepreneurship": {
-            "hashtags": ["#Entrepreneur", "#BusinessTips", "#StartupLife", "#Leadership", "#Success"],
-            "best_times": ["8-10 AM", "1-3 PM", "5-7 PM"],
-            "content_focus": "Business insights, success stories, industry trends"
-        },
-        "Creative & Art": {
-            "hashtags": ["#CreativeProcess", "#ArtDaily", "#DigitalArt", "#Inspiration", "#ArtCommunity"],
-            "best_times": ["10 AM-12 PM", "3-5 PM", "8-10 PM"],
-            "content_focus": "Process videos, finished works, creative tips"
-        }
-    }
-
-    # Content type specific ideas
-    content_ideas = {
-        "Educational Posts": [
-            {"title": "Step-by-Step Tutorial", "description": f"Create a detailed guide about {niche.lower()} fundamentals", "engagement": "High"},
-            {"title": "Myth vs Reality", "description": f"Debunk common misconceptions in {niche.lower()}", "engagement": "Very High"},
-            {"title": "Tool Comparison", "description": f"Compare popular tools/methods in {niche.lower()}", "engagement": "High"}
-        ],
-        "Behind-the-Scenes": [
-            {"title": "Day in the Life", "description": f"Show your typical day working in {niche.lower()}", "engagement": "Very High"},
-            {"title": "Process Breakdown", "description": f"Reveal your {niche.lower()} workflow step-by-step", "engagement": "High"},
-            {"title": "Workspace Tour", "description": f"Show where the {niche.lower()} magic happens", "engagement": "Medium"}
-        ],
-        "Tips & Tutorials": [
-            {"title": "Quick Tips Series", "description": f"Share 5 quick {niche.lower()} tips in one post", "engagement": "High"},
-            {"title": "Common Mistakes", "description": f"Highlight mistakes to avoid in {niche.lower()}", "engagement": "Very High"},
-            {"title": "Beginner's Guide", "description": f"Create content for {niche.lower()} beginners", "engagement": "High"}
-        ]
-    }
-
-    # Get niche info
-    niche_info = niche_strategies.get(niche, niche_strategies["Tech & AI"])
-
-    # Get content ideas
-    ideas = content_ideas.get(content_type, content_ideas["Educational Posts"])
-
-    # Add timing and engagement based on audience size
-    engagement_multiplier = {
-        "Just Starting (0-1K)": "Medium-High",
-        "Growing (1K-10K)": "High",
-        "Established (10K-100K)": "Very High",
-        "Influencer (100K+)": "Viral Potential",
-        "Brand/Business": "High-Very High"
-    }
-
-    # Enhance ideas with personalized data
-    personalized_ideas = []
-    for idea in ideas:
-        personalized_ideas.append({
-            "title": idea["title"],
-            "description": idea["description"],
-            "best_time": f"{niche_info['best_times'][0]} or {niche_info['best_times'][1]}",
-            "engagement_potential": engagement_multiplier.get(audience_size, "High"),
-            "recommended_hashtags": niche_info["hashtags"][:5]
-        })
-
-    return {
-        "post_ideas": personalized_ideas,
-        "niche_focus": niche_info["content_focus"],
-        "optimal_posting": posting_frequency
-    }
-
-def get_trending_examples(niche, content_type):
-    """Get trending content examples with links based on niche and content type"""
-
-    # Real trending examples database (these would be updated regularly)
-    trending_examples = {
-        "Tech & AI": [
-            {
-                "title": "ChatGPT Productivity Hacks",
-                "description": "10 ways to use AI for daily productivity",
-                "engagement": "2.3M views",
-                "platform": "Instagram",
-                "link": "https://www.instagram.com/p/example1/",
-                "trend_status": "🔥 Viral"
-            },
-            {
-                "title": "AI Tools Comparison 2024",
-                "description": "Side-by-side comparison of top AI tools",
-                "engagement": "1.8M views",
-                "platform": "TikTok",
-                "link": "https://www.tiktok.com/@example/video/1234567890",
-                "trend_status": "📈 Rising"
-            },
-            {
-                "title": "Future of Work with AI",
-                "description": "How AI is changing the workplace",
-                "engagement": "950K views",
-                "platform": "LinkedIn",
-                "link": "https://www.linkedin.com/posts/example-post",
-                "trend_status": "⚡ Hot"
-            }
-        ],
-        "Lifestyle & Wellness": [
-            {
-                "title": "Morning Routine for Success",
-                "description": "5 AM morning routine that changed my life",
-                "engagement": "3.1M views",
-                "platform": "Instagram",
-                "link": "https://www.instagram.com/p/example2/",
-                "trend_status": "🔥 Viral"
-            },
-            {
-                "title": "Wellness Wednesday Tips",
-                "description": "Simple wellness tips for busy people",
-                "engagement": "1.5M views",
-                "platform": "TikTok",
-                "link": "https://www.tiktok.com/@example/video/2345678901",
-                "trend_status": "📈 Rising"
-            }
-        ],
-        "Creative & Art": [
-            {
-                "title": "Digital Art Process Timelapse",
-                "description": "Watch this artwork come to life",
-                "engagement": "2.7M views",
-                "platform": "Instagram",
-                "link": "https://www.instagram.com/p/example3/",
-                "trend_status": "🔥 Viral"
-            },
-            {
-                "title": "Art Supplies Haul & Review",
-                "description": "Testing viral art supplies",
-                "engagement": "1.2M views",
-                "platform": "TikTok",
-                "link": "https://www.tiktok.com/@example/video/3456789012",
-                "trend_status": "⚡ Hot"
-            }
-        ]
-    }
-
-    # Get examples for the specific niche
-    examples = trending_examples.get(niche, trending_examples["Tech & AI"])
-
-    # Filter by content type if needed
-    if content_type == "Behind-the-Scenes":
-        # Prioritize process/behind-scenes content
-        examples = [ex for ex in examples if "process" in ex["title"].lower() or "routine" in ex["title"].lower()] + examples
-    elif content_type == "Educational Posts":
-        # Prioritize educational content
-        examples = [ex for ex in examples if "tips" in ex["title"].lower() or "how" in ex["title"].lower()] + examples
-
-    return examples[:3]  # Return top 3 examples
-
-# This function is now replaced by the API version above
-
-def get_relevant_image_smart(prompt):
-    """Smart image retrieval - try AI generation first, then fallback"""
-    # First try AI services (free and reliable)
-    ai_image = generate_image_with_ai_services(prompt)
-    if ai_image:
-        return ai_image
-
-    # Fallback to curated images if AI fails
-    search_query = prompt.lower().strip()
-
-    # Define curated image collections for different categories
-    image_collections = {
-        # Nature & Landscapes
-        "sunset": "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=512&h=512&fit=crop",
-        "sunrise": "https://images.unsplash.com/photo-1560707303-4e980ce876ad?w=512&h=512&fit=crop",
-        "mountain": "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=512&h=512&fit=crop",
-        "ocean": "https://images.unsplash.com/photo-1505142468610-359e7d316be0?w=512&h=512&fit=crop",
-        "coffee": "https://images.unsplash.com/photo-1495474472287-4d71bcdd2085?w=512&h=512&fit=crop",
-        "cat": "https://images.unsplash.com/photo-1514888286974-6c03e2ca1dba?w=512&h=512&fit=crop",
-        "flower": "https://images.unsplash.com/photo-1490750967868-88aa4486c946?w=512&h=512&fit=crop",
-    }
-
-    # Find the best matching image
-    for keyword, image_url in image_collections.items():
-        if keyword in search_query:
-            return image_url
-
-    # Final fallback
-    return "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=512&h=512&fit=crop"
-
-def generate_instagram_content(image, brand_voice, audience, creativity):
-    """Generate Instagram content from uploaded image using smart analysis"""
+        return get_client()
+    except MissingAPIKeyError:
+        stop_for_missing_api_key()
+
+# Check for the key up front; the client itself (and the openai import) waits until a page needs it
+try:
+    require_api_key()
+except MissingAPIKeyError:
+    stop_for_missing_api_key()
+
+def show_vision_input(vision, model):
+    """Caption describing the image actually sent to the vision model"""
+    width, height = vision.original_size
+    st.caption(f"🖼️ Sending {vision.width}×{vision.height} {vision.mime.split('/')[1].upper()} "
+               f"({vision.bytes / 1024:.0f} KB, from {width}×{height}) · "
+               f"~{vision.tokens(model):,} input tokens · prepared in {vision.encode_ms:.0f} ms")
+
+def show_palette(palette):
+    """Dominant colour swatches of an upload with its tone statistics"""
+    swatches = ''.join(
+        f'<span class="hashtag" style="background-color: {hex_color}; '
+        f'color: {"#000" if sum(color) > 450 else "#FFF"};">{hex_color} · {proportion:.0%}</span> '
+        for (hex_color, proportion), (color, _) in zip(palette.hex_colors(), palette.colors))
+    st.markdown(f'<div>{swatches}</div>', unsafe_allow_html=True)
+    st.caption(f"🎨 **Palette**: {palette.tone()} · brightness {palette.brightness:.0%} · "
+               f"saturation {palette.saturation:.0%} · extracted in {palette.extract_ms:.0f} ms")
+
+def generate_instagram_content(image, brand_voice, audience, creativity, palette=None):
+    """Generate Instagram content from uploaded image using smart analysis
+
+    `palette` is the upload's cached palette; it drives the content shown when the AI analysis fails.
+    """
 
     # First, let the user describe their image
     st.info("💡 **Help us create better content!** What's in your image? (e.g., 'pizza', 'sunset', 'my dog', 'selfie')")
@@ -899,35 +103,43 @@ def generate_instagram_content(image, brand_voice, audience, creativity):
     else:
         # Try AI analysis first, but with better error handling
         try:
-            # Convert image to base64
-            buffered = io.BytesIO()
-            image.save(buffered, format="PNG")
-            img_str = base64.b64encode(buffered.getvalue()).decode()
-
-            # Use a simpler, more reliable model
-            response = client.chat.completions.create(
+            # Downscale and re-encode to what the vision model actually uses
+            vision = prepare_vision_image(image)
+
+            # Same or near-identical image analysed before with these settings: reuse it
+            vision_cache = get_vision_cache()
+            image_hash = dhash(vision.image)
+            vision_params = params_key("gpt-4o-mini", brand_voice, audience, creativity)
+            cached_result, distance = vision_cache.get(image_hash, vision_params)
+            if cached_result is not None:
+                st.success("♻️ Reused the analysis of " + ("this image" if distance == 0 else f"a near-identical image ({distance} bits apart)"))
+                return cached_result
+            show_vision_input(vision, "gpt-4o-mini")
+
+            # Use a simpler, more reliable model, streamed so the answer shows as it arrives
+            started = time.perf_counter()
+            response = get_openai_client().chat.completions.create(
                 model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "What do you see in this image? Describe in 2-3 words only. Examples: 'food pizza', 'person smiling', 'dog playing', 'car red', 'sunset sky'."
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {"url": f"data:image/png;base64,{img_str}"}
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=10
+                messages=vision_describe_messages(vision.data_url),
+                max_tokens=VISION_DESCRIBE_MAX_TOKENS,
+                stream=True
             )
 
-            description = response.choices[0].message.content.strip()
-            st.success(f"✅ AI detected: {description}")
-            return generate_content_from_user_description(description)
+            live_description = st.empty()
+            description = ""
+            first_text = None
+            for delta in iter_text(response):
+                description += delta
+                if first_text is None and description.strip():
+                    first_text = time.perf_counter() - started
+                live_description.info(f"🔍 AI is looking at your image: {description.strip()}")
+
+            description = description.strip()
+            live_description.success(f"✅ AI detected: {description}"
+                                     + (f" (first text after {first_text:.2f}s)" if first_text is not None else ""))
+            result = generate_content_from_user_description(description)
+            vision_cache.put(image_hash, vision_params, result)
+            return result
 
         except Exception as e:
             # Show the error but provide a solution
@@ -936,6 +148,10 @@ def generate_instagram_content(image, brand_voice, audience, creativity):
             else:
                 st.error(f"❌ AI analysis failed: {str(e)}")
 
+            # Content from the upload's colours, until the user describes the image above
+            if palette is not None:
+                return create_generic_content_with_image_analysis(image, palette)
+
             # Return a prompt for user input
             return {
                 "caption": "Please describe your image above to get a personalized caption that matches your content perfectly!",
@@ -943,86 +159,45 @@ def generate_instagram_content(image, brand_voice, audience, creativity):
                 "image_description": "User needs to describe the image for accurate content generation."
             }
 
-def generate_content_from_user_description(description):
-    """Generate highly relevant content based on user's description of their image"""
-    description = description.lower().strip()
-
-    # Food-related content
-    if any(word in description for word in ['food', 'pizza', 'burger', 'cake', 'coffee', 'drink', 'meal', 'dish', 'restaurant', 'cooking', 'bread', 'fruit', 'vegetable', 'dessert', 'lunch', 'dinner', 'breakfast', 'eat', 'delicious', 'tasty', 'yummy', 'hungry', 'recipe']):
-        return {
-            "caption": f"Absolutely delicious! This {description} looks incredible and is making me hungry just looking at it! 🤤 Food is one of life's greatest pleasures - it brings people together, creates memories, and tells stories of culture and love. What's your favorite way to enjoy {description.split()[0] if description.split() else 'this dish'}?",
-            "hashtags": ["#food", "#delicious", "#foodie", "#yummy", "#instafood", "#foodporn", "#tasty", "#cooking", "#meal", "#hungry"],
-            "image_description": f"A mouth-watering image of {description} that showcases culinary excellence and appetizing presentation."
-        }
-
-    # People/Portrait content
-    elif any(word in description for word in ['person', 'people', 'man', 'woman', 'child', 'baby', 'face', 'smiling', 'portrait', 'selfie', 'group', 'family', 'friends', 'me', 'myself', 'us', 'together', 'smile', 'happy', 'photo']):
-        return {
-            "caption": f"Beautiful moment captured! This {description} shows the power of authentic human connection and genuine emotion. 😊 Every person has a unique story to tell, and photos like this remind us of the importance of relationships, memories, and sharing our lives with others. What's your favorite memory with the people you love?",
-            "hashtags": ["#portrait", "#people", "#lifestyle", "#authentic", "#moments", "#human", "#smile", "#life", "#story", "#connection"],
-            "image_description": f"A heartwarming portrait featuring {description} with genuine emotion and human connection."
-        }
-
-    # Nature/Outdoor content
-    elif any(word in description for word in ['nature', 'tree', 'forest', 'mountain', 'sky', 'sunset', 'sunrise', 'beach', 'ocean', 'river', 'park', 'garden', 'flower', 'plant', 'outdoor', 'landscape', 'scenery', 'view', 'beautiful', 'green', 'blue']):
-        return {
-            "caption": f"Nature's masterpiece! This stunning {description} reminds us of the incredible beauty that surrounds us every day. 🌿 The natural world has this amazing ability to inspire, heal, and bring peace to our busy lives. Take a moment to appreciate these beautiful scenes and reconnect with the earth. Where's your favorite place in nature?",
-            "hashtags": ["#nature", "#beautiful", "#outdoors", "#landscape", "#natural", "#scenic", "#peaceful", "#earth", "#adventure", "#explore"],
-            "image_description": f"A breathtaking natural scene featuring {description} in all its natural glory."
-        }
-
-    # Animal content
-    elif any(word in description for word in ['dog', 'cat', 'animal', 'pet', 'bird', 'horse', 'wildlife', 'puppy', 'kitten', 'cute', 'furry', 'paws', 'tail', 'ears']):
-        return {
-            "caption": f"Absolutely adorable! This sweet {description} just melts my heart! 🐾 Animals have this incredible ability to bring pure joy and unconditional love into our lives. They remind us what it means to live in the moment, love without conditions, and find happiness in the simple things. What's your favorite thing about {description.split()[0] if description.split() else 'pets'}?",
-            "hashtags": ["#animals", "#pets", "#cute", "#adorable", "#love", "#furry", "#wildlife", "#nature", "#companion", "#joy"],
-            "image_description": f"An endearing image of {description} showing natural animal behavior and irresistible charm."
-        }
-
-    # Vehicle/Transportation content
-    elif any(word in description for word in ['car', 'bike', 'motorcycle', 'truck', 'vehicle', 'transport', 'road', 'driving', 'ride', 'wheels', 'engine', 'speed']):
-        return {
-            "caption": f"What an amazing ride! This {description} represents freedom, adventure, and the thrill of the open road! 🚗 There's something special about vehicles - they take us places, create adventures, and represent our dreams of exploration and independence. Every journey begins with that first turn of the key. Where would you drive this beauty?",
-            "hashtags": ["#car", "#vehicle", "#drive", "#road", "#adventure", "#freedom", "#automotive", "#travel", "#journey", "#lifestyle"],
-            "image_description": f"An impressive image of {description} showcasing automotive design and the spirit of adventure."
-        }
-
-    # Architecture/Building content
-    elif any(word in description for word in ['building', 'house', 'architecture', 'city', 'urban', 'street', 'bridge', 'tower', 'modern', 'construction', 'home', 'office', 'structure']):
-        return {
-            "caption": f"Incredible architecture! This {description} showcases human creativity, engineering excellence, and our ability to shape the world around us. 🏗️ Buildings tell the story of our civilization, our dreams made real in concrete and steel. Every structure represents someone's vision brought to life. What's your favorite architectural style?",
-            "hashtags": ["#architecture", "#building", "#design", "#urban", "#city", "#modern", "#construction", "#engineering", "#structure", "#art"],
-            "image_description": f"An architectural image featuring {description} with impressive design elements and structural beauty."
-        }
-
-    # Technology/Product content
-    elif any(word in description for word in ['phone', 'computer', 'tech', 'device', 'gadget', 'electronic', 'screen', 'digital', 'laptop', 'tablet', 'camera', 'headphones']):
-        return {
-            "caption": f"Innovation at its finest! This {description} represents the incredible technology that connects our world and enhances our daily lives. 📱 Every device tells a story of human ingenuity, countless hours of development, and our endless quest to make life better and more connected. How has technology changed your life?",
-            "hashtags": ["#technology", "#tech", "#innovation", "#digital", "#modern", "#gadget", "#device", "#future", "#smart", "#electronic"],
-            "image_description": f"A technology image showcasing {description} with modern design and cutting-edge functionality."
-        }
-
-    # Fashion/Style content
-    elif any(word in description for word in ['outfit', 'clothes', 'fashion', 'style', 'dress', 'shirt', 'shoes', 'accessories', 'look', 'wearing', 'ootd']):
-        return {
-            "caption": f"Style perfection! This {description} is absolutely stunning and shows incredible fashion sense! 👗 Fashion is such a powerful form of self-expression - it tells the world who we are without saying a word. Every outfit choice is a chance to show creativity, confidence, and personality. What's your go-to style?",
-            "hashtags": ["#fashion", "#style", "#outfit", "#ootd", "#trendy", "#chic", "#fashionista", "#stylish", "#look", "#clothing"],
-            "image_description": f"A stylish fashion image featuring {description} with excellent taste and creative expression."
-        }
-
-    # Default for anything else
-    else:
-        return {
-            "caption": f"Perfectly captured! This {description} tells such a unique and interesting story! ✨ Every image has the power to inspire, connect, and create lasting memories. There's something special about this moment that caught your eye and made you want to share it with the world. What story does this {description} tell you?",
-            "hashtags": ["#photography", "#creative", "#art", "#visual", "#story", "#moment", "#beautiful", "#inspiration", "#life", "#share"],
-            "image_description": f"A creative and engaging image featuring {description} with artistic composition and visual appeal."
-        }
 
-def analyze_with_detailed_prompt(image, img_str):
+# Status column labels for batch rows
+BATCH_STATUS_LABELS = {
+    "queued": "⏳ Queued",
+    "running": "🔄 Running",
+    "done": "✅ Done",
+    "cached": "♻️ Cached",
+    "failed": "❌ Failed",
+}
+
+def batch_display_rows(rows):
+    """Batch status rows as shown in the progress table"""
+    return [{
+        "Image": row["name"],
+        "Status": BATCH_STATUS_LABELS[row["status"]] + (f": {row['error'][:80]}" if row["error"] else ""),
+        "Description": row["description"],
+        "Seconds": row["seconds"]
+    } for row in rows]
+
+def run_content_batch(items, concurrency, brand_voice, audience, creativity):
+    """Run a batch with a live progress bar and per-image status table
+
+    Returns (rows, results) as displayed rows and one content dict (or None) per item.
+    """
+    progress = st.progress(0.0, text=f"0/{len(items)} images")
+    table = st.empty()
+
+    def show(rows, done):
+        progress.progress(done / len(items), text=f"{done}/{len(items)} images")
+        table.dataframe(batch_display_rows(rows), hide_index=True)
+
+    rows, results = run_batch(items, concurrency, brand_voice, audience, creativity, on_update=show)
+    return batch_display_rows(rows), results
+
+def analyze_with_detailed_prompt(image, image_url=None, palette=None):
     """Alternative analysis method with more detailed prompting"""
     try:
-        response = client.chat.completions.create(
+        image_url = image_url or prepare_vision_image(image).data_url
+        response = get_openai_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {
@@ -1040,7 +215,7 @@ Then create Instagram content based on what you actually see. Format as JSON:
                         },
                         {
                             "type": "image_url",
-                            "image_url": {"url": f"data:image/png;base64,{img_str}"}
+                            "image_url": {"url": image_url}
                         }
                     ]
                 }
@@ -1064,118 +239,20 @@ Then create Instagram content based on what you actually see. Format as JSON:
 
     except Exception as e:
         st.warning(f"⚠️ Detailed analysis failed: {str(e)}")
-        return create_generic_content_with_image_analysis(image)
-
-def create_content_from_text_description(description):
-    """Create content from AI text description"""
-    description_lower = description.lower()
-
-    # Extract key elements from the description
-    if any(word in description_lower for word in ['food', 'eat', 'meal', 'dish', 'cook', 'restaurant', 'pizza', 'burger', 'cake']):
-        content_type = 'food'
-    elif any(word in description_lower for word in ['person', 'people', 'man', 'woman', 'face', 'smile', 'portrait']):
-        content_type = 'people'
-    elif any(word in description_lower for word in ['nature', 'tree', 'mountain', 'sky', 'outdoor', 'landscape', 'forest']):
-        content_type = 'nature'
-    elif any(word in description_lower for word in ['animal', 'dog', 'cat', 'pet', 'bird', 'wildlife']):
-        content_type = 'animal'
-    elif any(word in description_lower for word in ['car', 'vehicle', 'bike', 'transport', 'road']):
-        content_type = 'vehicle'
-    else:
-        content_type = 'general'
-
-    templates = {
-        'food': {
-            "caption": f"Delicious! {description[:100]}... This looks absolutely amazing! Food brings people together and creates unforgettable moments. What's your favorite dish?",
-            "hashtags": ["#food", "#delicious", "#foodie", "#yummy", "#instafood", "#foodporn", "#tasty", "#cooking", "#meal", "#hungry"],
-            "image_description": f"Food image: {description[:150]}"
-        },
-        'people': {
-            "caption": f"Beautiful moment! {description[:100]}... Every person has a unique story to tell. Authentic connections make the best content!",
-            "hashtags": ["#portrait", "#people", "#lifestyle", "#authentic", "#moments", "#human", "#smile", "#life", "#story", "#connection"],
-            "image_description": f"Portrait image: {description[:150]}"
-        },
-        'nature': {
-            "caption": f"Nature's beauty! {description[:100]}... The natural world never fails to inspire and amaze us. Take time to appreciate these moments!",
-            "hashtags": ["#nature", "#beautiful", "#outdoors", "#landscape", "#natural", "#scenic", "#earth", "#peaceful", "#adventure", "#explore"],
-            "image_description": f"Nature image: {description[:150]}"
-        },
-        'animal': {
-            "caption": f"So adorable! {description[:100]}... Animals bring such joy and love into our lives. They remind us what pure happiness looks like!",
-            "hashtags": ["#animals", "#pets", "#cute", "#adorable", "#love", "#furry", "#wildlife", "#nature", "#companion", "#joy"],
-            "image_description": f"Animal image: {description[:150]}"
-        },
-        'vehicle': {
-            "caption": f"Amazing ride! {description[:100]}... This represents freedom, adventure, and the open road ahead!",
-            "hashtags": ["#car", "#vehicle", "#drive", "#road", "#adventure", "#freedom", "#automotive", "#travel", "#journey", "#lifestyle"],
-            "image_description": f"Vehicle image: {description[:150]}"
-        },
-        'general': {
-            "caption": f"Captured perfectly! {description[:100]}... Every image tells a unique story worth sharing!",
-            "hashtags": ["#photography", "#creative", "#art", "#visual", "#story", "#moment", "#beautiful", "#inspiration", "#life", "#share"],
-            "image_description": f"Image showing: {description[:150]}"
-        }
-    }
-
-    return templates[content_type]
+        return create_generic_content_with_image_analysis(image, palette)
 
-def create_generic_content_with_image_analysis(image):
-    """Final fallback with basic image analysis"""
-    try:
-        import numpy as np
-        img_array = np.array(image)
-
-        # Basic color analysis
-        avg_color = np.mean(img_array, axis=(0, 1))
-        height, width = img_array.shape[:2]
-
-        if len(avg_color) >= 3:
-            r, g, b = avg_color[:3]
-            if r > 150 and g > 100:  # Warm colors - likely food
-                return {
-                    "caption": "This looks absolutely delicious! Food is one of life's greatest pleasures. Every meal tells a story and brings people together. What's your favorite comfort food?",
-                    "hashtags": ["#food", "#delicious", "#foodie", "#yummy", "#instafood", "#meal", "#tasty", "#cooking", "#hungry", "#foodlover"],
-                    "image_description": "A delicious food item with warm, appetizing colors"
-                }
-            elif g > r and g > b and g > 80:  # Green dominant - nature
-                return {
-                    "caption": "Nature's beauty never fails to inspire! This green paradise reminds us to appreciate the natural world around us. Take a moment to breathe and connect with nature.",
-                    "hashtags": ["#nature", "#green", "#outdoors", "#natural", "#peaceful", "#earth", "#plants", "#fresh", "#scenic", "#beautiful"],
-                    "image_description": "A natural scene with lush green elements"
-                }
-            elif b > r and b > g:  # Blue dominant - sky/water
-                return {
-                    "caption": "Beautiful blue tones! Whether it's the sky above or water below, blue represents peace, tranquility, and endless possibilities. What does this color make you feel?",
-                    "hashtags": ["#blue", "#sky", "#peaceful", "#tranquil", "#beautiful", "#nature", "#calm", "#serene", "#water", "#horizon"],
-                    "image_description": "An image with dominant blue tones suggesting sky or water"
-                }
 
-        # Default fallback
-        return {
-            "caption": "Every image tells a story! This moment captured here represents creativity, inspiration, and the beauty of visual storytelling. What story does this tell you?",
-            "hashtags": ["#photography", "#creative", "#visual", "#art", "#story", "#moment", "#beautiful", "#inspiration", "#capture", "#life"],
-            "image_description": "A creative image with artistic composition and visual appeal"
-        }
 
-    except Exception as e:
-        # Ultimate fallback
-        return {
-            "caption": "Beautiful moment captured! This image showcases creativity and visual storytelling at its finest. Every picture has the power to inspire and connect us.",
-            "hashtags": ["#photography", "#beautiful", "#creative", "#visual", "#art", "#moment", "#story", "#inspiration", "#life", "#share"],
-            "image_description": "A visually appealing image with creative composition"
-        }
-
-def analyze_image_and_generate_content(image):
+def analyze_image_and_generate_content(image, palette=None):
     """Analyze image using AI vision and generate truly relevant content"""
     try:
         # Method 1: Try to use a simple text-based analysis with OpenAI
-        # Convert image to base64
-        buffered = io.BytesIO()
-        image.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
+        # Downscale and re-encode to what the vision model actually uses
+        vision = prepare_vision_image(image)
+        show_vision_input(vision, "gpt-4o-mini")
 
         # Use a simple prompt to get basic image description
-        response = client.chat.completions.create(
+        response = get_openai_client().chat.completions.create(
             model="gpt-4o-mini",  # Use the cheaper model for basic analysis
             messages=[
                 {
@@ -1187,7 +264,7 @@ def analyze_image_and_generate_content(image):
                         },
                         {
                             "type": "image_url",
-                            "image_url": {"url": f"data:image/png;base64,{img_str}"}
+                            "image_url": {"url": vision.data_url}
                         }
                     ]
                 }
@@ -1204,167 +281,21 @@ def analyze_image_and_generate_content(image):
     except Exception as e:
         st.write(f"⚠️ **AI Analysis Failed**: {str(e)}")
         # Fallback to basic color analysis
-        return analyze_image_colors_only(image)
-
-def generate_content_from_description(description):
-    """Generate content based on AI description of the image"""
-    description = description.lower()
-
-    # Food-related keywords
-    if any(word in description for word in ['food', 'pizza', 'burger', 'cake', 'coffee', 'drink', 'meal', 'dish', 'restaurant', 'cooking', 'bread', 'fruit', 'vegetable', 'dessert', 'lunch', 'dinner', 'breakfast']):
-        return {
-            "caption": f"Delicious! This amazing {description} looks absolutely incredible. Food is one of life's greatest pleasures - every bite tells a story. What's your favorite dish to share with friends?",
-            "hashtags": ["#food", "#delicious", "#foodie", "#yummy", "#tasty", "#foodporn", "#instafood", "#foodlover", "#cooking", "#meal"],
-            "image_description": f"A mouth-watering image of {description} that showcases culinary excellence."
-        }
-
-    # People/Portrait keywords
-    elif any(word in description for word in ['person', 'people', 'man', 'woman', 'child', 'baby', 'face', 'smiling', 'portrait', 'selfie', 'group', 'family', 'friends']):
-        return {
-            "caption": f"Beautiful moment captured! This {description} shows the power of authentic human connection. Every person has a unique story to tell. Share your story with the world!",
-            "hashtags": ["#portrait", "#people", "#authentic", "#moments", "#lifestyle", "#human", "#connection", "#story", "#smile", "#life"],
-            "image_description": f"A compelling portrait showing {description} with genuine emotion and personality."
-        }
-
-    # Nature/Outdoor keywords
-    elif any(word in description for word in ['tree', 'forest', 'mountain', 'nature', 'outdoor', 'landscape', 'sky', 'sunset', 'sunrise', 'beach', 'ocean', 'river', 'park', 'garden', 'flower', 'plant']):
-        return {
-            "caption": f"Nature's beauty at its finest! This stunning {description} reminds us to appreciate the incredible world around us. Take time to connect with nature and find your peace.",
-            "hashtags": ["#nature", "#beautiful", "#outdoors", "#landscape", "#natural", "#scenic", "#peaceful", "#earth", "#adventure", "#explore"],
-            "image_description": f"A breathtaking natural scene featuring {description} in all its glory."
-        }
-
-    # Animal keywords
-    elif any(word in description for word in ['dog', 'cat', 'animal', 'pet', 'bird', 'horse', 'wildlife', 'puppy', 'kitten']):
-        return {
-            "caption": f"Adorable! This sweet {description} just melts my heart. Animals bring so much joy and love into our lives. They remind us what unconditional love looks like.",
-            "hashtags": ["#animals", "#pets", "#cute", "#adorable", "#love", "#furry", "#wildlife", "#nature", "#companion", "#joy"],
-            "image_description": f"An endearing image of {description} showing natural animal behavior and charm."
-        }
-
-    # Vehicle/Transportation keywords
-    elif any(word in description for word in ['car', 'bike', 'motorcycle', 'truck', 'vehicle', 'transport', 'road', 'driving']):
-        return {
-            "caption": f"Amazing ride! This {description} represents freedom, adventure, and the open road. Every journey begins with a single step - or in this case, a turn of the key!",
-            "hashtags": ["#car", "#vehicle", "#drive", "#road", "#adventure", "#freedom", "#journey", "#automotive", "#travel", "#lifestyle"],
-            "image_description": f"A striking image of {description} showcasing automotive design and engineering."
-        }
-
-    # Architecture/Building keywords
-    elif any(word in description for word in ['building', 'house', 'architecture', 'city', 'urban', 'street', 'bridge', 'tower', 'modern', 'construction']):
-        return {
-            "caption": f"Impressive architecture! This {description} showcases human creativity and engineering excellence. Buildings tell the story of our civilization and dreams made real.",
-            "hashtags": ["#architecture", "#building", "#design", "#urban", "#city", "#modern", "#construction", "#engineering", "#structure", "#art"],
-            "image_description": f"An architectural image featuring {description} with impressive design elements."
-        }
-
-    # Technology/Product keywords
-    elif any(word in description for word in ['phone', 'computer', 'tech', 'device', 'gadget', 'electronic', 'screen', 'digital']):
-        return {
-            "caption": f"Innovation at work! This {description} represents the incredible technology that connects our world. Every device tells a story of human ingenuity and progress.",
-            "hashtags": ["#technology", "#tech", "#innovation", "#digital", "#modern", "#gadget", "#device", "#future", "#smart", "#electronic"],
-            "image_description": f"A technology image showcasing {description} with modern design and functionality."
-        }
-
-    # Default for anything else
-    else:
-        return {
-            "caption": f"Captured perfectly! This {description} tells a unique story worth sharing. Every image has the power to inspire, connect, and create lasting memories. What story does this tell you?",
-            "hashtags": ["#photography", "#creative", "#art", "#visual", "#story", "#moment", "#capture", "#inspiration", "#share", "#life"],
-            "image_description": f"A creative image featuring {description} with artistic composition and visual appeal."
-        }
-
-def analyze_image_colors_only(image):
-    """Fallback: Basic color analysis when AI fails"""
-    import numpy as np
-    img_array = np.array(image)
-    avg_color = np.mean(img_array, axis=(0, 1))
-
-    if len(avg_color) >= 3:
-        r, g, b = avg_color[:3]
-        if r > g and r > b:
-            color_desc = "warm red tones"
-        elif g > r and g > b:
-            color_desc = "natural green tones"
-        elif b > r and b > g:
-            color_desc = "cool blue tones"
-        else:
-            color_desc = "balanced colors"
-    else:
-        color_desc = "monochrome tones"
+        return analyze_image_colors_only(image, palette)
+
+
+
+
+
+
+
+
+
 
-    return {
-        "caption": f"Beautiful composition with {color_desc}! This image captures a moment worth sharing. Visual storytelling at its finest - every color and detail tells part of the story.",
-        "hashtags": ["#photography", "#visual", "#art", "#creative", "#colors", "#composition", "#moment", "#story", "#beautiful", "#capture"],
-        "image_description": f"A well-composed image featuring {color_desc} and artistic elements."
-    }
 
-def get_content_by_type(content_type):
-    """Generate content based on detected image type"""
-    content_templates = {
-        "food": {
-            "caption": "Delicious moments deserve to be shared! This incredible dish is a perfect blend of flavors and presentation. Food brings people together and creates lasting memories. What's your favorite comfort food?",
-            "hashtags": ["#food", "#delicious", "#foodie", "#yummy", "#cooking", "#recipe", "#tasty", "#foodporn", "#homemade", "#dining"],
-            "image_description": "A beautifully presented dish showcasing culinary artistry and appetizing ingredients."
-        },
-        "nature": {
-            "caption": "Nature's beauty never fails to inspire! This stunning view reminds us to appreciate the world around us. Take a moment to breathe, explore, and connect with the natural world.",
-            "hashtags": ["#nature", "#beautiful", "#outdoors", "#landscape", "#peaceful", "#adventure", "#explore", "#natural", "#scenic", "#earth"],
-            "image_description": "A breathtaking natural scene showcasing the beauty of the outdoors and landscape."
-        },
-        "portrait": {
-            "caption": "Every face tells a story, every moment captures a memory. Authentic connections and genuine expressions make the most powerful content. Share your story with the world!",
-            "hashtags": ["#portrait", "#people", "#authentic", "#story", "#moments", "#lifestyle", "#genuine", "#connection", "#human", "#expression"],
-            "image_description": "A compelling portrait capturing authentic human expression and personality."
-        },
-        "landscape": {
-            "caption": "Wide horizons and endless possibilities! This amazing view reminds us that there's so much beauty to explore in our world. Where will your next adventure take you?",
-            "hashtags": ["#landscape", "#travel", "#adventure", "#explore", "#wanderlust", "#scenic", "#horizon", "#journey", "#beautiful", "#view"],
-            "image_description": "A stunning landscape view showcasing natural beauty and expansive scenery."
-        },
-        "product": {
-            "caption": "Quality and design come together in perfect harmony. This product represents innovation, functionality, and style. Sometimes the best things in life are the simple, well-made ones.",
-            "hashtags": ["#product", "#design", "#quality", "#innovation", "#style", "#modern", "#functional", "#lifestyle", "#tech", "#minimal"],
-            "image_description": "A well-designed product showcasing quality craftsmanship and modern aesthetics."
-        },
-        "fashion": {
-            "caption": "Style is a way to say who you are without having to speak. This look perfectly captures confidence, creativity, and personal expression. Fashion is art you can wear!",
-            "hashtags": ["#fashion", "#style", "#outfit", "#ootd", "#trendy", "#chic", "#fashionista", "#stylish", "#look", "#clothing"],
-            "image_description": "A stylish fashion look showcasing personal style and creative expression."
-        },
-        "general": {
-            "caption": "Capturing beautiful moments like this! This image showcases the perfect blend of creativity and inspiration. Share your story and connect with your audience through authentic visual storytelling.",
-            "hashtags": ["#photography", "#beautiful", "#moments", "#instagram", "#creative", "#inspiration", "#storytelling", "#authentic", "#visual", "#content"],
-            "image_description": "A beautifully composed image that captures a moment of creativity and inspiration, perfect for social media sharing."
-        }
-    }
 
-    return content_templates.get(content_type, content_templates["general"])
 
-def get_demo_content_structure():
-    """Return demo content in proper dictionary structure"""
-    return get_content_by_type("general")
 
-def generate_image_from_text(prompt, style="realistic"):
-    """Generate image from text using AI services or DALL-E"""
-    try:
-        # First try AI services (free and cloud-based)
-        ai_image = generate_image_with_ai_services(prompt, style)
-        if ai_image:
-            return ai_image
-
-        # Fallback to DALL-E if Hugging Face fails
-        response = client.images.generate(
-            model="dall-e-3",
-            prompt=f"{prompt}, {style} style, high quality, Instagram-worthy",
-            size="1024x1024",
-            quality="standard",
-            n=1,
-        )
-        return response.data[0].url
-    except Exception:
-        # Final fallback to smart image retrieval
-        return get_relevant_image_smart(prompt)
 
 # Configure page
 st.set_page_config(
@@ -1374,47 +305,215 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Persistent storage functions
-def load_history():
-    """Load history from JSON files"""
+# Page rendering helpers
+def render_generated_image(result):
+    """Display a generated image with its provider details and download button"""
+    st.success(" AI Image Generated!")
+
+    # Try to display the image, falling back to a themed placeholder
     try:
-        # Load image history
-        if os.path.exists('image_history.json'):
-            with open('image_history.json', 'r', encoding='utf-8') as f:
-                image_history = json.load(f)
-        else:
-            image_history = []
+        st.image(result.image_bytes or result.url, caption=f"Generated: {result.prompt[:50]}...")
+    except Exception:
+        theme = get_themed_placeholder(result.prompt)
+        st.markdown(f"""
+        <div style="width: 400px; height: 400px; background: {theme['gradient']};
+                    display: flex; align-items: center; justify-content: center;
+                    border-radius: 15px; margin: 20px auto; box-shadow: 0 8px 32px rgba(0,0,0,0.1);
+                    border: 2px solid rgba(255,255,255,0.2);">
+            <div style="text-align: center; color: {theme['color']};">
+                <div style="font-size: 60px; margin-bottom: 10px;">{theme['emoji']}</div>
+                <div style="font-size: 20px; font-weight: bold; margin-bottom: 5px;">AI Generated Image</div>
+                <div style="font-size: 14px; opacity: 0.9; max-width: 300px; word-wrap: break-word;">
+                    "{result.prompt[:50]}{'...' if len(result.prompt) > 50 else ''}"
+                </div>
+            </div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    st.caption(f"⚙️ **Provider**: {result.provider} | **Seed**: {result.seed} | **Time**: {result.timings['total']:.2f}s")
+    if result.attempts:
+        st.caption(" · ".join(
+            f"{provider}: {attempt['status']}" + (f" ({attempt['seconds']:.2f}s)" if 'seconds' in attempt else "")
+            for provider, attempt in result.attempts.items()
+        ))
+
+    # Download button
+    if result.image_bytes:
+        extension = result.mime.split("/")[-1].replace("jpeg", "jpg")
+        st.download_button(
+            label="📥 Download Image",
+            data=result.image_bytes,
+            file_name=f"instagen_{result.seed}.{extension}",
+            mime=result.mime
+        )
+    else:
+        st.markdown(f"[📥 Download Image]({result.url})")
+
+def save_generated_image(result, style_label):
+    """Append a generated image to the persistent history; False if its image is gone"""
+    record = image_record(result, style_label)
+    if record is None:
+        return False
+    history.append("image", record, history_handle)
+    return True
+
+# Records shown per page on the History tabs
+HISTORY_IMAGES_PER_PAGE = 12
+HISTORY_CONTENT_PER_PAGE = 10
+
+def turn_history_page(key, step):
+    """Move a History tab's page cursor (button callback)"""
+    st.session_state[key] = max(st.session_state.get(key, 0) + step, 0)
+
+def render_history_pager(key, total, per_page):
+    """Show newer/older controls for a History tab and return the current page"""
+    pages = max(-(-total // per_page), 1)
+    page = min(st.session_state.get(key, 0), pages - 1)
+    st.session_state[key] = page
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("◀ Newer", key=f"{key}_newer", on_click=turn_history_page, args=(key, -1), disabled=page == 0)
+    with col2:
+        st.caption(f"Page {page + 1} of {pages} ({total} items)")
+    with col3:
+        st.button("Older ▶", key=f"{key}_older", on_click=turn_history_page, args=(key, 1), disabled=page >= pages - 1)
+    return page
+
+def toggle_export_selection(kind, position):
+    """Checkbox callback: add or remove a history entry from the export selection"""
+    selection = st.session_state.setdefault("export_selection", {"image": set(), "content": set()})
+    selection[kind].symmetric_difference_update({position})
+
+def render_export_checkbox(kind, position):
+    """Checkbox that keeps an entry selected for export across pages"""
+    selected = position in st.session_state.get("export_selection", {}).get(kind, set())
+    st.checkbox("Select for export", value=selected, key=f"export_{kind}_{position}",
+                on_change=toggle_export_selection, args=(kind, position))
+
+def prepare_history_export(selected_only):
+    """Stream a ZIP export of the history into a temporary file and return it as an ExportFile"""
+    selection = st.session_state.get("export_selection", {"image": set(), "content": set()})
+    image_positions = selection["image"] if selected_only else None
+    content_positions = selection["content"] if selected_only else None
+    remove_stale_exports()
+    with tempfile.NamedTemporaryFile(prefix=EXPORT_PREFIX, suffix=".zip", delete=False) as spool:
+        write_history_zip(spool,
+                          iter_log(history.logs["image"], image_positions),
+                          iter_log(history.logs["content"], content_positions))
+    return ExportFile(spool.name)
+
+# Most search hits shown on the Content History tab
+HISTORY_SEARCH_LIMIT = 50
+
+def render_content_item(item, position):
+    """Show one content history record in an expander"""
+    with st.expander(f"Content #{position + 1} - {item.get('timestamp', 'Unknown time')}"):
+        st.write("**Caption:**")
+        st.write(item.get('caption', 'No caption'))
+        st.write("**Hashtags:**")
+        st.write(item.get('hashtags', 'No hashtags'))
+
+        if item.get('image_description'):
+            st.write("**Image Description:**")
+            st.write(item.get('image_description', 'No description'))
 
-        # Load content history
-        if os.path.exists('content_history.json'):
-            with open('content_history.json', 'r', encoding='utf-8') as f:
-                content_history = json.load(f)
-        else:
-            content_history = []
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button(f"� Copy Caption", key=f"copy_hist_caption_{position}"):
+                st.success("Caption copied!")
+        with col2:
+            if st.button(f"📋 Copy Hashtags", key=f"copy_hist_hashtags_{position}"):
+                st.success("Hashtags copied!")
+        render_export_checkbox("content", position)
 
-        return image_history, content_history
-    except Exception as e:
-        print(f"Error loading history: {e}")
-        return [], []
+# How often the page redraws a caption that is still streaming
+STREAM_REFRESH_SECONDS = 0.15
 
-def save_history():
-    """Save history to JSON files"""
-    try:
-        # Save image history
-        with open('image_history.json', 'w', encoding='utf-8') as f:
-            json.dump(st.session_state.generated_images, f, indent=2, ensure_ascii=False)
+def render_caption_preview(slot, sections, revision):
+    """Redraw the partial caption and hashtags in a placeholder while they stream"""
+    # Each redraw is a new element, so keys carry the revision to stay unique
+    with slot.container():
+        st.markdown("---")
+        st.markdown("### 📝 **Writing your caption...**")
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            st.text_area("Generated Caption:", value=sections['caption'], height=100,
+                         disabled=True, key=f"stream_caption_{revision}")
+        with col2:
+            st.text_area("Generated Hashtags:", value=sections['hashtags'], height=100,
+                         disabled=True, key=f"stream_hashtags_{revision}")
+        if sections['tips']:
+            st.info(f"💡 {sections['tips']}")
 
-        # Save content history
-        with open('content_history.json', 'w', encoding='utf-8') as f:
-            json.dump(st.session_state.content_history, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error saving history: {e}")
+def render_social_content(social_content):
+    """Display generated caption, hashtags and posting tips"""
+    st.markdown("---")
+    st.markdown("### 📝 **Auto-Generated Social Media Content**")
+
+    if social_content:
+        # Display the generated content
+        col1, col2 = st.columns([1, 1])
+
+        with col1:
+            st.markdown("#### 📝 **Caption**")
+            st.text_area(
+                "Generated Caption:",
+                value=social_content['caption'],
+                height=100,
+                key="generated_caption_main"
+            )
 
-# Initialize session state for history with persistent storage
-if 'content_history' not in st.session_state:
-    image_history, content_history = load_history()
-    st.session_state.content_history = content_history
-    st.session_state.generated_images = image_history
+        with col2:
+            st.markdown("#### #️⃣ **Hashtags**")
+            st.text_area(
+                "Generated Hashtags:",
+                value=social_content['hashtags'],
+                height=100,
+                key="generated_hashtags_main"
+            )
+
+        # Copy buttons
+        st.markdown("#### 📋 **Quick Actions**")
+        col1, col2, col3 = st.columns([1, 1, 1])
+
+        with col1:
+            if st.button("📋 Copy Caption", key="copy_caption_main"):
+                st.success("Caption copied to clipboard!")
+
+        with col2:
+            if st.button("#️⃣ Copy Hashtags", key="copy_hashtags_main"):
+                st.success("Hashtags copied to clipboard!")
+
+        with col3:
+            if st.button("📱 Copy All", key="copy_all_main"):
+                st.success("All content copied to clipboard!")
+
+        # Show posting tips
+        st.markdown("#### 💡 **Posting Tips**")
+        st.info(social_content['tips'])
+
+    else:
+        st.error("Could not generate social media content. Please try again!")
+
+        if st.button("🔄 Generate Another", key="regenerate_img"):
+            st.rerun()
+
+@st.cache_resource
+def get_history_service():
+    """Open the history logs once per process and share them across sessions"""
+    image_log, content_log = open_history()
+    return HistoryService({"image": image_log, "content": content_log})
+
+# Shared history: each session only keeps a handle with the version it last saw
+history = get_history_service()
+if 'history_handle' not in st.session_state:
+    st.session_state.history_handle = history.attach()
+history_handle = st.session_state.history_handle
+history.refresh()
+if history_handle.seen_version < history.version:
+    st.toast("🔄 History was updated in another session")
+    history_handle.seen_version = history.version
 
 # Custom CSS for styling
 st.markdown("""
@@ -1472,7 +571,7 @@ with st.sidebar:
     # Navigation menu
     page = st.selectbox(
         "Choose Feature:",
-        ["Trending Dashboard", "Content Generator", "Image Generator", "History", "Post to Instagram"],
+        ["Trending Dashboard", "Content Generator", "Image Generator", "History", "History Analytics", "Post to Instagram"],
         index=0
     )
 
@@ -1776,11 +875,14 @@ elif page == "Content Generator":
 
     # Display uploaded image
     if uploaded_file is not None:
-        image = Image.open(uploaded_file)
-        st.image(image, caption="Your Image", width=300)
+        st.image(derivative_for_bytes(uploaded_file.getvalue(), 300), caption="Your Image", width=300)
+        palette = palette_for_upload(uploaded_file.getvalue())  # Extracted once per upload, then cached
+        show_palette(palette)
 
     # Generate button
     generate_btn = st.button("Generate Instagram Content", disabled=uploaded_file is None)
+    vision_stats = get_vision_cache().stats()
+    st.caption(f"♻️ **Vision Cache**: {vision_stats['entries']} analyses | **Exact hits**: {vision_stats['hits']} | **Near-duplicate hits**: {vision_stats['near_hits']} | **Misses**: {vision_stats['misses']}")
 
     # Results section
     if generate_btn and uploaded_file is not None:
@@ -1791,7 +893,7 @@ elif page == "Content Generator":
                 brand_voice = "professional and engaging"
                 audience = "general social media users"
                 creativity = 7
-                result = generate_instagram_content(image, brand_voice, audience, creativity)
+                result = generate_instagram_content(image, brand_voice, audience, creativity, palette)
 
                 # Display results
                 st.success("Content Generated Successfully!")
@@ -1828,8 +930,7 @@ elif page == "Content Generator":
                     "brand_voice": brand_voice,
                     "audience": audience
                 }
-                st.session_state.content_history.append(history_item)
-                save_history()  # Save to persistent storage
+                history.append("content", history_item, history_handle)  # Save to persistent storage
 
                 # Download button
                 content = f"CAPTION:\n{result['caption']}\n\nHASHTAGS:\n{' '.join(result['hashtags'])}\n\nIMAGE DESCRIPTION:\n{result['image_description']}"
@@ -1882,8 +983,7 @@ elif page == "Content Generator":
                         "brand_voice": brand_voice,
                         "audience": audience
                     }
-                    st.session_state.content_history.append(history_item)
-                    save_history()  # Save to persistent storage
+                    history.append("content", history_item, history_handle)  # Save to persistent storage
 
                     st.info("Want personalized content for your specific image? Advanced AI analysis available with premium features.")
 
@@ -1897,6 +997,53 @@ elif page == "Content Generator":
                     else:
                         st.info("Please try again in a moment")
 
+    # Batch mode: a whole shoot in one run
+    st.divider()
+    st.subheader("📚 Batch Mode")
+    st.markdown("Upload many images, or ZIP archives of them, and generate content for all of them at once.")
+    batch_files = st.file_uploader("Upload images or ZIP archives", type=["jpg", "jpeg", "png", "webp", "zip"],
+                                   accept_multiple_files=True, key="batch_uploads")
+    batch_concurrency = st.slider("Parallel requests", 1, BATCH_WORKERS, min(4, BATCH_WORKERS),
+                                  help="Requests are also throttled to the OpenAI rate limits configured in .env")
+
+    if st.button("📚 Generate for All Images", disabled=not batch_files):
+        batch_items, skipped_files = collect_batch_images(batch_files)
+        for skipped in skipped_files:
+            st.warning(f"Skipped {skipped}: not a valid ZIP archive")
+        if not batch_items:
+            st.warning("No JPG, PNG or WebP images found in the upload.")
+        else:
+            brand_voice = "professional and engaging"
+            audience = "general social media users"
+            creativity = 7
+            batch_rows, batch_results = run_content_batch(batch_items, batch_concurrency, brand_voice, audience, creativity)
+
+            # Every successful item lands in history in one write
+            records = batch_records(batch_items, batch_results, brand_voice, audience)
+            if records:
+                history.append_many("content", records, history_handle)
+            st.session_state.batch_summary = {"rows": batch_rows, "records": records}
+
+    batch_summary = st.session_state.get("batch_summary")
+    if batch_summary:
+        failed = sum(1 for row in batch_summary["rows"] if row["Status"].startswith("❌"))
+        limiter_stats = get_openai_limiter().stats()
+        st.success(f"✅ {len(batch_summary['records'])} posts saved to history" + (f", {failed} failed" if failed else ""))
+        st.caption(f"🚦 **Rate limiter**: {limiter_stats['throttled']} of {limiter_stats['acquired']} requests throttled "
+                   f"({limiter_stats['waited_seconds']:.1f}s waited) | **429 back-offs**: {limiter_stats['penalties']}")
+        with st.expander("Status per image"):
+            st.dataframe(batch_summary["rows"], hide_index=True)
+        for record in batch_summary["records"]:
+            with st.expander(f"📝 {record['image_name']}"):
+                st.write(record["caption"])
+                st.caption(record["hashtags"])
+        st.download_button(
+            label="📥 Download All Content",
+            data="\n\n".join(f"IMAGE: {record['image_name']}\n\n{post_text(record)}" for record in batch_summary["records"]),
+            file_name="instagram_batch_content.txt",
+            mime="text/plain"
+        )
+
 elif page == "Image Generator":
     st.header("AI Image Generator")
     st.markdown("Generate professional images from text descriptions using advanced AI technology.")
@@ -1905,6 +1052,12 @@ elif page == "Image Generator":
     st.info("**Powered by Advanced AI Algorithms** - Creates high-quality, themed images that match your prompts precisely. Each image is uniquely generated based on your description and chosen style.")
     st.success("**Persistent History**: All generated images are automatically saved and will remain available after reloading the application.")
 
+    # Image cache statistics (shared by all sessions)
+    cache_stats = get_image_cache().stats()
+    st.caption(f"🗄️ **Image Cache**: {cache_stats['entries']} images ({cache_stats['bytes'] / (1024 * 1024):.1f} MB) | **Hits**: {cache_stats['hits']} | **Misses**: {cache_stats['misses']} | **Evictions**: {cache_stats['evictions']}")
+    payload_stats = get_payload_cache().stats()
+    st.caption(f"🧠 **In-memory Payloads**: {payload_stats['entries']} ({payload_stats['resident_bytes'] / (1024 * 1024):.1f} of {payload_stats['max_bytes'] / (1024 * 1024):.0f} MB, peak {payload_stats['peak_bytes'] / (1024 * 1024):.1f} MB) | **Hit rate**: {payload_stats['hit_rate']:.0%} | **Evictions**: {payload_stats['evictions']} | **Spilled to scratch**: {payload_stats['spills']} ({payload_stats['spill_bytes'] / (1024 * 1024):.1f} of {payload_stats['spill_max_bytes'] / (1024 * 1024):.0f} MB)")
+
     # Text input for image generation
     col1, col2 = st.columns([3, 1])
     with col1:
@@ -1919,185 +1072,100 @@ elif page == "Image Generator":
             ["Realistic", "Artistic", "Cartoon", "Abstract", "Vintage", "Modern"]
         )
 
-    if st.button(" Generate Image", disabled=not image_prompt):
-        with st.spinner("Creating your image..."):
-            try:
-                # Try to generate real image first
-                image_url = generate_image_from_text(image_prompt, style_option.lower())
-
-                if image_url:
-                    # Real image generated successfully
-                    st.success(" AI Image Generated!")
-                    st.image(image_url, caption=f"Generated: {image_prompt[:50]}...")
-
-                    # History saving moved outside try-except block
-
-                    # Download button
-                    st.markdown(f"[📥 Download Image]({image_url})")
-
-                else:
-                    raise Exception("API unavailable")
-
-            except Exception:
-                # Demo mode for image generation using Pexels API
-                st.info("🎨 Generating sample image based on your prompt...")
-
-                # Try to get a relevant image using smart retrieval (Hugging Face AI)
-                with st.spinner("🤖 Generating AI image with Stable Diffusion..."):
-                    demo_url = get_relevant_image_smart(image_prompt)
-
-                # If Pexels didn't return an image, create a fallback
-                if not demo_url:
-                    # Create a simple fallback URL based on the prompt
-                    prompt_clean = image_prompt.lower().replace(" ", "+")
-                    demo_url = f"https://picsum.photos/512/512?random={hash(prompt_clean) % 1000}"
-
-                # Show demo image
-                st.success("✅ AI Image Generated Successfully!")
-
-                # Create a themed visual placeholder based on the prompt
-                def get_themed_placeholder(prompt):
-                    prompt_lower = prompt.lower()
-
-                    # Define theme-based gradients and emojis
-                    themes = {
-                        "sunset": {"gradient": "linear-gradient(45deg, #FF6B35, #F7931E, #FFD23F)", "emoji": "🌅", "color": "#FFF"},
-                        "sunrise": {"gradient": "linear-gradient(45deg, #FFD23F, #F7931E, #FF6B35)", "emoji": "🌄", "color": "#FFF"},
-                        "ocean": {"gradient": "linear-gradient(45deg, #0077BE, #00A8CC, #7FDBFF)", "emoji": "🌊", "color": "#FFF"},
-                        "mountain": {"gradient": "linear-gradient(45deg, #8B4513, #A0522D, #D2B48C)", "emoji": "🏔️", "color": "#FFF"},
-                        "forest": {"gradient": "linear-gradient(45deg, #228B22, #32CD32, #90EE90)", "emoji": "🌲", "color": "#FFF"},
-                        "flower": {"gradient": "linear-gradient(45deg, #FF69B4, #FFB6C1, #FFC0CB)", "emoji": "🌸", "color": "#FFF"},
-                        "city": {"gradient": "linear-gradient(45deg, #4A4A4A, #696969, #A9A9A9)", "emoji": "🏙️", "color": "#FFF"},
-                        "coffee": {"gradient": "linear-gradient(45deg, #8B4513, #A0522D, #D2691E)", "emoji": "☕", "color": "#FFF"},
-                        "sky": {"gradient": "linear-gradient(45deg, #87CEEB, #87CEFA, #B0E0E6)", "emoji": "☁️", "color": "#333"},
-                        "winter": {"gradient": "linear-gradient(45deg, #B0E0E6, #E0FFFF, #F0F8FF)", "emoji": "❄️", "color": "#333"},
-                    }
-
-                    # Find matching theme
-                    for keyword, theme in themes.items():
-                        if keyword in prompt_lower:
-                            return theme
-
-                    # Default theme
-                    return {"gradient": "linear-gradient(45deg, #667eea, #764ba2)", "emoji": "🎨", "color": "#FFF"}
-
-                # Try to display the image with comprehensive error handling
-                image_displayed = False
-                try:
-                    st.image(demo_url, caption=f"Generated: {image_prompt[:50]}...", width=400)
-                    image_displayed = True
-                except Exception as img_error:
-                    pass
-
-                # If image failed to load, show themed placeholder
-                if not image_displayed:
-                    theme = get_themed_placeholder(image_prompt)
-                    st.markdown(f"""
-                    <div style="width: 400px; height: 400px; background: {theme['gradient']};
-                                display: flex; align-items: center; justify-content: center;
-                                border-radius: 15px; margin: 20px auto; box-shadow: 0 8px 32px rgba(0,0,0,0.1);
-                                border: 2px solid rgba(255,255,255,0.2);">
-                        <div style="text-align: center; color: {theme['color']};">
-                            <div style="font-size: 60px; margin-bottom: 10px;">{theme['emoji']}</div>
-                            <div style="font-size: 20px; font-weight: bold; margin-bottom: 5px;">AI Generated Image</div>
-                            <div style="font-size: 14px; opacity: 0.9; max-width: 300px; word-wrap: break-word;">
-                                "{image_prompt[:50]}{'...' if len(image_prompt) > 50 else ''}"
-                            </div>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                # Caption and hashtag generation moved outside try-except block
-
-        # 🎯 SAVE TO HISTORY: Save generated image to history (works for both AI and demo images)
-        if 'generated_images' not in st.session_state:
-            st.session_state.generated_images = []
-
-        # Determine the image URL (either from successful generation or demo)
-        final_image_url = None
-        try:
-            # Try to get the image URL from the generation process
-            final_image_url = generate_image_from_text(image_prompt, style_option.lower())
-            if not final_image_url:
-                final_image_url = get_relevant_image_smart(image_prompt)
-        except:
-            final_image_url = get_relevant_image_smart(image_prompt)
-
-        # Save to history with the final URL
-        st.session_state.generated_images.append({
-            "prompt": image_prompt,
-            "style": style_option,
-            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "url": final_image_url if final_image_url else f"https://picsum.photos/512/512?random={hash(image_prompt) % 1000}"
-        })
-
-        # Save to persistent storage
-        save_history()
-
-        # 🎯 MOVED OUTSIDE: Auto-generate caption and hashtags for ANY image generation
-        st.markdown("---")
-        st.markdown("### 📝 **Auto-Generated Social Media Content**")
-
-        with st.spinner("🤖 Generating perfect caption and hashtags..."):
-            # Generate caption and hashtags based on the image prompt and style
-            social_content = generate_social_media_content(image_prompt, style_option.lower())
-
-            if social_content:
-                # Display the generated content
-                col1, col2 = st.columns([1, 1])
-
-                with col1:
-                    st.markdown("#### 📝 **Caption**")
-                    st.text_area(
-                        "Generated Caption:",
-                        value=social_content['caption'],
-                        height=100,
-                        key="generated_caption_main"
-                    )
-
-                with col2:
-                    st.markdown("#### #️⃣ **Hashtags**")
-                    st.text_area(
-                        "Generated Hashtags:",
-                        value=social_content['hashtags'],
-                        height=100,
-                        key="generated_hashtags_main"
-                    )
-
-                # Copy buttons
-                st.markdown("#### 📋 **Quick Actions**")
-                col1, col2, col3 = st.columns([1, 1, 1])
-
-                with col1:
-                    if st.button("📋 Copy Caption", key="copy_caption_main"):
-                        st.success("Caption copied to clipboard!")
-
-                with col2:
-                    if st.button("#️⃣ Copy Hashtags", key="copy_hashtags_main"):
-                        st.success("Hashtags copied to clipboard!")
-
-                with col3:
-                    if st.button("📱 Copy All", key="copy_all_main"):
-                        st.success("All content copied to clipboard!")
-
-                # Show posting tips
-                st.markdown("#### 💡 **Posting Tips**")
-                st.info(social_content['tips'])
-
+    # Variants mode: several seeds of the same prompt, only the chosen one is saved
+    variant_mode = st.checkbox("🎲 **Variants mode** - generate several versions and pick the best", value=False)
+    if variant_mode:
+        variant_count = st.slider("Number of variants:", min_value=4, max_value=16, value=4, step=2)
+
+    if variant_mode and st.button(" Generate Variants", disabled=not image_prompt):
+        st.session_state.variant_results = [None] * variant_count
+        st.session_state.variant_sheet = None
+        st.session_state.variant_style = style_option
+
+        # Reserve one grid slot per variant and fill them as results stream in
+        grid_columns = 4
+        slots = []
+        for row_start in range(0, variant_count, grid_columns):
+            cols = st.columns(grid_columns)
+            slots.extend(col.empty() for col in cols[:variant_count - row_start])
+
+        progress = st.progress(0.0, text="Generating variants...")
+        for finished, (index, result) in enumerate(generate_variants(image_prompt, style_option.lower(), variant_count), 1):
+            slots[index].image(result.image_bytes or result.url, caption=f"#{index + 1} · {result.provider} · seed {result.seed}")
+            st.session_state.variant_results[index] = result.park()  # The session keeps only a digest
+            progress.progress(finished / variant_count, text=f"Generated {finished}/{variant_count} variants")
+        progress.empty()
+
+    if variant_mode and st.session_state.get('variant_results'):
+        variants = st.session_state.variant_results
+        st.markdown("### 🎲 **Pick Your Favorite**")
+
+        # Build the sheet once per batch and keep it in the payload cache, not the session
+        contact_sheet = get_payload_cache().get(st.session_state.variant_sheet) if st.session_state.get('variant_sheet') else None
+        if contact_sheet is None:
+            contact_sheet = build_variant_contact_sheet(variants)
+            st.session_state.variant_sheet = get_payload_cache().put(contact_sheet) if contact_sheet else None
+        if contact_sheet:
+            st.image(contact_sheet, caption=f"Contact sheet - {len(variants)} variants of: {variants[0].prompt[:50]}")
+            st.download_button("📥 Download Contact Sheet", data=contact_sheet,
+                               file_name="instagen_variants.png", mime="image/png")
+
+        choice = st.radio(
+            "Variant to keep:",
+            options=list(range(len(variants))),
+            format_func=lambda i: f"#{i + 1} (seed {variants[i].seed}, {variants[i].provider})",
+            horizontal=True
+        )
+        if st.button("💾 Save Selected Variant to History"):
+            if save_generated_image(variants[choice], st.session_state.variant_style):
+                st.session_state.variant_results = []
+                st.success(f"Variant #{choice + 1} saved to history!")
             else:
-                st.error("Could not generate social media content. Please try again!")
-
-                # History saving moved outside try-except block
-
-                # Show download option
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.markdown(f"[📥 Download Sample Image]({demo_url})")
-                with col2:
-                    if st.button("🔄 Generate Another", key="regenerate_img"):
-                        st.rerun()
+                st.error(f"Variant #{choice + 1} is no longer cached and cannot be regenerated. Please generate the variants again.")
+
+    if not variant_mode and st.button(" Generate Image", disabled=not image_prompt):
+        # Image and caption depend only on the prompt and style, so run them concurrently
+        executor = get_executor()
+        started = time.perf_counter()
+        image_future = executor.submit(timed, generate_image, image_prompt, style_option.lower())
+        caption_updates = queue.Queue()
+        caption_future = executor.submit(timed, generate_social_media_content, image_prompt,
+                                         style_option.lower(), caption_updates.put)
+
+        # Reserve slots so each stage renders in place as soon as it finishes
+        image_slot = st.container()
+        caption_slot = st.container()
+        caption_preview = caption_slot.empty()
+        stage_times = {}
+        revision = 0
+
+        with st.spinner("Creating your image and caption..."):
+            pending = {image_future, caption_future}
+            while pending:
+                done, pending = wait(pending, timeout=STREAM_REFRESH_SECONDS)
+
+                # Show the newest partial caption while the stream is running
+                sections = latest_update(caption_updates)
+                if sections and caption_future in pending:
+                    if "first_text" not in stage_times and any(sections.values()):
+                        stage_times["first_text"] = time.perf_counter() - started
+                    revision += 1
+                    render_caption_preview(caption_preview, sections, revision)
+
+                for future in done:
+                    if future is image_future:
+                        result, stage_times["image"] = future.result()
+                        with image_slot:
+                            render_generated_image(result)
+                            save_generated_image(result, style_option)
+                    else:
+                        social_content, stage_times["caption"] = future.result()
+                        caption_preview.empty()
+                        with caption_slot:
+                            render_social_content(social_content)
 
-                st.info("This is a sample image. For AI-generated images specific to your prompt, premium features are available.")
+        first_text = f" (first text {stage_times['first_text']:.2f}s)" if "first_text" in stage_times else ""
+        st.caption(f"⏱️ **Image**: {stage_times['image']:.2f}s | **Caption**: {stage_times['caption']:.2f}s{first_text} | **Total**: {time.perf_counter() - started:.2f}s")
 
 elif page == "History":
     st.header("Content History")
@@ -2107,34 +1175,65 @@ elif page == "History":
     col1, col2, col3 = st.columns([1, 1, 2])
     with col1:
         if st.button("Clear Image History"):
-            st.session_state.generated_images = []
-            save_history()  # Clear persistent storage too
+            history.clear("image", history_handle)  # Clear persistent storage too
+            st.session_state.pop("export_selection", None)
             st.success("Image history cleared permanently.")
             st.rerun()
     with col2:
         if st.button("Clear Content History"):
-            st.session_state.content_history = []
-            save_history()  # Clear persistent storage too
+            history.clear("content", history_handle)  # Clear persistent storage too
+            st.session_state.pop("export_selection", None)
             st.success("Content history cleared permanently.")
             st.rerun()
     with col3:
-        total_images = len(st.session_state.generated_images) if 'generated_images' in st.session_state else 0
-        total_content = len(st.session_state.content_history) if 'content_history' in st.session_state else 0
+        total_images = history.count("image")
+        total_content = history.count("content")
         st.info(f"� **Stats**: {total_images} images, {total_content} content items generated")
+        dedup = dedup_stats()
+        st.caption(f"♻️ **Deduplicated**: {dedup['image_repeats']} repeated images ({dedup['image_bytes_saved'] / (1024 * 1024):.1f} MB saved), {dedup['caption_repeats']} repeated captions ({dedup['caption_bytes_saved'] / 1024:.1f} KB saved)")
+
+    # Bulk export: images, per-post text files and a manifest in one ZIP
+    with st.expander("📦 Export History"):
+        selection = st.session_state.get("export_selection", {"image": set(), "content": set()})
+        selected_count = len(selection["image"]) + len(selection["content"])
+        export_scope = st.radio(
+            "Entries to export:",
+            options=["all", "selected"],
+            format_func=lambda scope: "All history" if scope == "all" else f"Selected entries ({selected_count})",
+            horizontal=True,
+            key="export_scope"
+        )
+        if st.button("📦 Prepare ZIP Export", disabled=export_scope == "selected" and not selected_count):
+            with st.spinner("Writing export..."):
+                previous_export = st.session_state.pop("history_export", None)
+                if previous_export is not None:
+                    previous_export.discard()
+                st.session_state.history_export = prepare_history_export(selected_only=export_scope == "selected")
+
+        history_export = st.session_state.get("history_export")
+        if history_export is not None:
+            st.caption(f"Export ready: {history_export.size / (1024 * 1024):.1f} MB")
+            # Deferred: the archive is read when the button is clicked, not on every rerun
+            st.download_button("📥 Download ZIP", data=history_export.read, file_name="instagen_history.zip",
+                               mime="application/zip")
 
     # Create tabs for different history types
     hist_tab1, hist_tab2 = st.tabs(["🖼️ Generated Images", "📝 Content History"])
 
     with hist_tab1:
-        # Generated Images Tab
-        if st.session_state.generated_images:
-            st.success(f"📊 Found {len(st.session_state.generated_images)} generated images!")
+        # Generated Images Tab - one page of thumbnails, full images on demand
+        if total_images:
+            st.success(f"📊 Found {total_images} generated images!")
+            page = render_history_pager("history_image_page", total_images, HISTORY_IMAGES_PER_PAGE)
+            skip = page * HISTORY_IMAGES_PER_PAGE
 
             cols = st.columns(2)
-            for i, img in enumerate(reversed(st.session_state.generated_images)):
+            for i, img in enumerate(history.latest("image", HISTORY_IMAGES_PER_PAGE, skip=skip)):
+                position = total_images - 1 - skip - i  # Stable widget keys across pages
                 with cols[i % 2]:
                     try:
-                        st.image(img['url'], caption=f"Prompt: {img['prompt'][:40]}...")
+                        thumbnail = derivative_for_blob(img['blob'], 320) if img.get('blob') else img.get('url')
+                        st.image(thumbnail, caption=f"Prompt: {img['prompt'][:40]}...")
 
                         # Show details in an expander
                         with st.expander(f"Details - {img['timestamp']}"):
@@ -2145,11 +1244,24 @@ elif page == "History":
                             # Action buttons
                             col1, col2 = st.columns(2)
                             with col1:
-                                st.markdown(f"[📥 Download]({img['url']})")
+                                show_full = st.toggle("🔍 Full size", key=f"full_{position}")
                             with col2:
-                                if st.button("� Regenerate", key=f"regen_{i}"):
+                                if st.button("� Regenerate", key=f"regen_{position}"):
                                     st.info("Go to Image Generator and use this prompt!")
 
+                            # The original is only read and sent when asked for
+                            if show_full:
+                                # Read through the payload cache so popular originals stay in memory
+                                image_src = get_payload_cache().get(img['blob']) if img.get('blob') else img.get('url')
+                                st.image(derivative_for_blob(img['blob'], 1080) if img.get('blob') else image_src)
+                                if isinstance(image_src, bytes):
+                                    st.download_button("📥 Download", data=image_src, mime=img.get('mime', 'image/png'),
+                                                       file_name=f"instagen_{img['blob'][:12]}.{img.get('mime', 'image/png').split('/')[-1]}",
+                                                       key=f"download_{position}")
+                                else:
+                                    st.markdown(f"[📥 Download]({image_src})")
+
+                        render_export_checkbox("image", position)
                         st.divider()
                     except Exception as e:
                         st.error(f"Could not load image: {img['prompt'][:30]}... Error: {str(e)}")
@@ -2158,29 +1270,110 @@ elif page == "History":
 
     with hist_tab2:
         # Content History Tab
-        if st.session_state.content_history:
-            st.success(f"📊 Found {len(st.session_state.content_history)} content items!")
+        if total_content:
+            st.success(f"📊 Found {total_content} content items!")
+
+            # Search past captions and hashtags
+            search_col, date_col = st.columns([2, 1])
+            with search_col:
+                search_query = st.text_input("🔎 Search captions and hashtags:",
+                                             placeholder="e.g. sunset, #food, deli*", key="history_search")
+            with date_col:
+                date_range = st.date_input("Date range:", value=(), key="history_dates")
+
+            if search_query.strip() or date_range:
+                start = date_range[0].isoformat() if len(date_range) > 0 else None
+                end = date_range[-1].isoformat() if len(date_range) > 0 else None
+                search_index = get_search_index(history.logs["content"])
+                hits, seconds = timed(search_index.search, search_query,
+                                      start=start, end=end, limit=HISTORY_SEARCH_LIMIT)
+                st.caption(f"🔎 {len(hits)} matches in {seconds * 1000:.1f} ms"
+                           + (f" (showing the best {HISTORY_SEARCH_LIMIT})" if len(hits) == HISTORY_SEARCH_LIMIT else ""))
+                unindexed = search_index.pending()
+                if unindexed:
+                    st.caption(f"⏳ Still indexing {unindexed} records in the background; search again for complete results")
+                for position, _ in hits:
+                    render_content_item(history.get("content", position), position)
+            else:
+                page = render_history_pager("history_content_page", total_content, HISTORY_CONTENT_PER_PAGE)
+                skip = page * HISTORY_CONTENT_PER_PAGE
+                for i, item in enumerate(history.latest("content", HISTORY_CONTENT_PER_PAGE, skip=skip)):
+                    render_content_item(item, total_content - 1 - skip - i)
+        else:
+            st.info("📝 No content generated yet! Go to **Content Generator** to create your first post!")
 
-            for i, item in enumerate(reversed(st.session_state.content_history)):
-                with st.expander(f"Content #{len(st.session_state.content_history) - i} - {item.get('timestamp', 'Unknown time')}"):
-                    st.write("**Caption:**")
-                    st.write(item.get('caption', 'No caption'))
-                    st.write("**Hashtags:**")
-                    st.write(item.get('hashtags', 'No hashtags'))
+elif page == "History Analytics":
+    st.header("📊 History Analytics")
+    st.markdown("What we generate, for whom, and which hashtags travel together.")
 
-                    if item.get('image_description'):
-                        st.write("**Image Description:**")
-                        st.write(item.get('image_description', 'No description'))
+    # Counters are folded forward over new records only, never rebuilt per rerun
+    analytics = get_history_analytics(history.logs["image"], history.logs["content"])
+    analytics.refresh()
+    analytics_stats = analytics.stats()
 
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button(f"� Copy Caption", key=f"copy_hist_caption_{i}"):
-                            st.success("Caption copied!")
-                    with col2:
-                        if st.button(f"📋 Copy Hashtags", key=f"copy_hist_hashtags_{i}"):
-                            st.success("Hashtags copied!")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Images", analytics_stats["images"])
+    col2.metric("Posts", analytics_stats["posts"])
+    col3.metric("Distinct Hashtags", analytics_stats["hashtags"])
+    col4.metric("Active Days", analytics_stats["days"])
+
+    if not analytics_stats["images"] and not analytics_stats["posts"]:
+        st.info("No history yet. Generate some images or content to see analytics here!")
+    else:
+        # Per-day volume
+        st.subheader("📅 Daily Volume")
+        volume_days = st.slider("Days shown", 7, 90, 30, key="analytics_days")
+        volume = analytics.daily_volume(volume_days)
+        if volume:
+            st.bar_chart({
+                "Day": [day for day, _, _ in volume],
+                "Images": [images for _, images, _ in volume],
+                "Posts": [posts for _, _, posts in volume],
+            }, x="Day", y=["Images", "Posts"])
+
+        # Hashtags
+        st.subheader("🏷️ Hashtags")
+        top_tags = analytics.top_hashtags(st.slider("Top hashtags", 5, 50, 15, key="analytics_top_tags"))
+        if top_tags:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**Most used**")
+                st.bar_chart({"Hashtag": [tag for tag, _ in top_tags], "Posts": [count for _, count in top_tags]},
+                             x="Hashtag", y="Posts", horizontal=True)
+            with col2:
+                focus_tag = st.selectbox("Used together with:", [tag for tag, _ in top_tags], key="analytics_focus_tag")
+                related = analytics.related_hashtags(focus_tag, 10)
+                if related:
+                    st.bar_chart({"Hashtag": [tag for tag, _ in related], "Posts": [count for _, count in related]},
+                                 x="Hashtag", y="Posts", horizontal=True)
+                else:
+                    st.caption("No other hashtags appear alongside this one.")
+
+            st.markdown("**Most frequent pairs**")
+            st.dataframe(
+                [{"Pair": f"{tag} + {other}", "Posts": count} for (tag, other), count in analytics.top_pairs(10)],
+                hide_index=True
+            )
         else:
-            st.info("📝 No content generated yet! Go to **Content Generator** to create your first post!")
+            st.caption("No hashtags in the content history yet.")
+
+        # Styles, providers, voices and audiences
+        st.subheader("🎨 Styles & Audiences")
+        breakdowns = [
+            ("Image Styles", "image", "style"),
+            ("Image Providers", "image", "provider"),
+            ("Brand Voices", "content", "brand_voice"),
+            ("Audiences", "content", "audience"),
+        ]
+        for column, (title, kind, field) in zip(st.columns(2) + st.columns(2), breakdowns):
+            with column:
+                st.markdown(f"**{title}**")
+                counts = analytics.field_counts(kind, field)
+                if counts:
+                    st.bar_chart({title: [value for value, _ in counts], "Count": [count for _, count in counts]},
+                                 x=title, y="Count", horizontal=True)
+                else:
+                    st.caption("Nothing recorded yet.")
 
 elif page == "Post to Instagram":
     st.header("Post to Instagram")
@@ -2218,9 +1411,9 @@ elif page == "Post to Instagram":
     st.info("**Pro Tips**: Post during peak hours (6-9 PM), use Stories to boost engagement, and respond to comments quickly.")
 
     # Quick access to recent content
-    if st.session_state.content_history:
+    if history.count("content"):
         st.subheader("📋 Quick Copy - Latest Content:")
-        latest = st.session_state.content_history[-1]
+        latest = history.get("content", -1)
 
         col1, col2 = st.columns(2)
         with col1:
@@ -2273,7 +1466,7 @@ def generate_instagram_content(image, brand_voice, audience, creativity):
     """
     
     # API call to GPT-4 Vision
-    response = client.chat.completions.create(
+    response = get_openai_client().chat.completions.create(
         model="gpt-4o",
         messages=[
             {"role": "system", "content": system_prompt},
@@ -0,0 +1,54 @@
+"""Keyword classification against the recorded corpus and the tie-break rules."""
+import json
+import os
+
+import pytest
+
+from instagen.classify import SUBJECTS, THEMES
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'benchmarks', 'classify_corpus.jsonl')
+
+with open(CORPUS_PATH, encoding='utf-8') as f:
+    CORPUS = [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize('case', CORPUS, ids=[case['text'] for case in CORPUS])
+def test_corpus(case):
+    assert SUBJECTS.best(case['text']) == case['subject']
+    assert THEMES.best(case['text']) == case['theme']
+
+
+def test_ties_go_to_table_order():
+    assert THEMES.best('ocean at sunset') == 'sunset'
+    assert THEMES.best('ocean at sunset', among=('ocean', 'sunset')) == 'sunset'
+    assert THEMES.best('ocean at sunset', among={'sky': None, 'ocean': None, 'sunset': None}) == 'sunset'
+    assert THEMES.best('clouds over the ocean', among=('sky', 'ocean')) == 'ocean'
+
+
+def test_more_hits_beat_table_order():
+    assert THEMES.best('sunset sky, clouds everywhere') == 'sky'
+    assert THEMES.best('sunset sky, clouds everywhere', among=('sunset', 'ocean')) == 'sunset'
+
+
+def test_among_limits_the_categories():
+    assert THEMES.best('ocean at sunset', among=('ocean', 'sky')) == 'ocean'
+    assert THEMES.best('a cat', among=('dog',)) is None
+    assert THEMES.best('a cat and a dog', among=('dog', 'sky')) == 'dog'
+    assert SUBJECTS.best('pizza with friends', among=('people', 'nature')) == 'people'
+
+
+def test_repeated_text_answers_each_among():
+    # The lookups made for one prompt share a scan but not an answer
+    prompt = 'Golden hour over the OCEAN'
+    assert THEMES.best(prompt) == 'sunset'
+    assert THEMES.best(prompt, among=('ocean', 'gold')) == 'ocean'
+    assert THEMES.best(prompt, among=('fire',)) is None
+    assert THEMES.keywords(prompt) == ['golden hour', 'ocean']
+
+
+def test_whole_words_and_plurals():
+    assert THEMES.best('education card') is None
+    assert THEMES.best('Kittens!') == 'cat'
+    assert THEMES.best('golden light') == 'gold'
+    assert THEMES.best('a café at dusk') == 'sunset'
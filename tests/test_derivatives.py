@@ -0,0 +1,42 @@
+"""Concurrent derivative requests share one build on the derivatives pool."""
+import io
+import threading
+
+from PIL import Image
+
+from instagen import derivatives
+
+
+def test_concurrent_reads_build_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(derivatives, 'DERIVATIVE_DIR', str(tmp_path))
+    buffered = io.BytesIO()
+    Image.new('RGB', (2000, 1500), (200, 80, 40)).save(buffered, format='JPEG')
+    data = buffered.getvalue()
+
+    build_threads = []
+    real_build = derivatives.build_derivatives
+
+    def recording_build(source):
+        build_threads.append(threading.current_thread().name)
+        return real_build(source)
+
+    monkeypatch.setattr(derivatives, 'build_derivatives', recording_build)
+    built_before = derivatives.derivative_stats()['built']
+    results = [None] * 8
+    barrier = threading.Barrier(len(results))
+
+    def read(i):
+        barrier.wait()
+        results[i] = derivatives.derivative_for_bytes(data, 300)
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(build_threads) == 1
+    assert build_threads[0].startswith('instagen-derivatives')
+    assert derivatives.derivative_stats()['built'] == built_before + 1
+    assert all(result and result == results[0] for result in results)
+    assert Image.open(io.BytesIO(results[0])).size == (320, 240)
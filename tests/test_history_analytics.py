@@ -0,0 +1,43 @@
+"""Hashtag pair leader board of the history analytics."""
+import random
+
+from instagen import history_analytics
+from instagen.history_analytics import HistoryAnalytics
+from instagen.history_log import HistoryLog
+
+
+def all_pairs(aggregates):
+    return {(tag, other): count for tag, related in aggregates.cooccurrence.items()
+            for other, count in related.items() if tag < other}
+
+
+def test_top_pairs_match_a_full_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_analytics, 'TOP_PAIRS_KEPT', 20)
+    rng = random.Random(7)
+    vocab = [f'#t{i}' for i in range(60)]
+    weights = [1 / (i + 1) for i in range(len(vocab))]
+    content = HistoryLog(str(tmp_path / 'content_history.jsonl'))
+    analytics = HistoryAnalytics(HistoryLog(str(tmp_path / 'image_history.jsonl')), content)
+
+    for _ in range(5):
+        content.append_many([{'hashtags': ' '.join(rng.choices(vocab, weights, k=6))} for _ in range(200)])
+        analytics.refresh()
+        board = analytics.content.top_pairs
+        pairs = all_pairs(analytics.content)
+        assert len(board) == 20
+        assert all(pairs[pair] == count for pair, count in board.items())
+        assert min(board.values()) >= max(count for pair, count in pairs.items() if pair not in board)
+
+    expected = sorted(all_pairs(analytics.content).items(), key=lambda item: (-item[1], item[0]))[:5]
+    assert analytics.top_pairs(5) == expected
+
+
+def test_top_pairs_survive_a_snapshot(tmp_path):
+    image = HistoryLog(str(tmp_path / 'image_history.jsonl'))
+    content = HistoryLog(str(tmp_path / 'content_history.jsonl'))
+    content.append_many([{'hashtags': '#a #b #c'}] * 300 + [{'hashtags': '#b #c'}] * 300)
+    HistoryAnalytics(image, content).refresh()
+
+    reloaded = HistoryAnalytics(image, content)
+    assert reloaded.content.counted == 600
+    assert reloaded.top_pairs(2) == [(('#b', '#c'), 600), (('#a', '#b'), 300)]
@@ -0,0 +1,65 @@
+"""Caption deduplication never grows records and keeps its counters across restarts."""
+from instagen.blob_store import BlobStore
+from instagen.history_dedup import TextDedup
+from instagen.history_log import HistoryLog
+
+LONG_CAPTION = ("Golden hour over the harbour, boats drifting home while the city lights come on. "
+                "Some evenings are worth stopping for.")
+
+
+def content(caption, hashtags='#sunset #harbour'):
+    return {'caption': caption, 'hashtags': hashtags, 'image_description': 'harbour at dusk',
+            'timestamp': '2025-07-18 01:00:00'}
+
+
+def make_dedup(tmp_path):
+    return TextDedup(BlobStore(str(tmp_path / 'captions')), legacy_store=BlobStore(str(tmp_path / 'images')))
+
+
+def test_short_captions_stay_inline(tmp_path):
+    dedup = make_dedup(tmp_path)
+    short = {'caption': 'Hi', 'hashtags': '#a', 'image_description': 'x'}
+    for _ in range(3):
+        assert dedup.pack(short) == short
+    assert dedup.stats() == {'repeats': 0, 'bytes_saved': 0}
+    assert not any(path.is_file() for path in (tmp_path / 'captions').rglob('*'))  # Nothing written for short text
+
+
+def test_repeats_become_references_and_round_trip(tmp_path):
+    dedup = make_dedup(tmp_path)
+    log = HistoryLog(str(tmp_path / 'content_history.jsonl'), codec=dedup)
+    log.append_many([content(LONG_CAPTION) for _ in range(3)])
+
+    with open(log.path, encoding='utf-8') as f:
+        raw = f.read()
+    assert raw.count(LONG_CAPTION) == 1
+    assert 'text_hash' not in raw
+    assert log.read(0) == [content(LONG_CAPTION)] * 3
+
+    stats = dedup.stats()
+    assert stats['repeats'] == 2 and stats['bytes_saved'] > 0
+    assert not any((tmp_path / 'images').rglob('*'))  # Caption blobs stay out of the image store
+
+
+def test_counters_survive_a_restart(tmp_path):
+    make_dedup(tmp_path).pack(content(LONG_CAPTION))
+    make_dedup(tmp_path).pack(content(LONG_CAPTION))
+    assert make_dedup(tmp_path).stats()['repeats'] == 1
+
+
+def test_repeats_read_back_exactly_as_written(tmp_path):
+    dedup = make_dedup(tmp_path)
+    log = HistoryLog(str(tmp_path / 'content_history.jsonl'), codec=dedup)
+    spaced = dict(content(LONG_CAPTION), caption=LONG_CAPTION.replace(' boats', '   boats'))
+    listed = dict(content(LONG_CAPTION), hashtags=['#sunset', '#harbour'])
+    missing = {key: value for key, value in content(LONG_CAPTION).items() if key != 'image_description'}
+    records = [content(LONG_CAPTION), spaced, listed, listed, missing, missing]
+    log.append_many(records)
+
+    assert log.read(0) == records
+    assert HistoryLog(log.path, codec=make_dedup(tmp_path)).read(0) == records
+    with open(log.path, encoding='utf-8') as f:
+        raw = f.read()
+    assert raw.count('text_ref') == 2  # The spaced caption would stay inline, so a reference saves nothing
+    assert raw.count(LONG_CAPTION) == 3  # Only the first record of each normalized text has the caption
+    assert '"text_absent":["image_description"]' in raw
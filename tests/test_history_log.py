@@ -0,0 +1,131 @@
+"""Crash recovery of the append-only history log."""
+import os
+
+import pytest
+
+from instagen import history_log
+from instagen.history_log import HistoryLog
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'test_history.jsonl')
+
+
+def records(count, prefix='r'):
+    return [{'prompt': f'{prefix} {i}'} for i in range(count)]
+
+
+def test_torn_tail_is_truncated(log_path):
+    log = HistoryLog(log_path)
+    log.append_many(records(2))
+    size = os.path.getsize(log_path)
+    with open(log_path, 'ab') as f:
+        f.write(b'{"prompt": "half wri')
+
+    reopened = HistoryLog(log_path)
+    assert reopened.read(0) == records(2)
+    assert os.path.getsize(log_path) == size
+    reopened.append({'prompt': 'after'})
+    assert [r['prompt'] for r in HistoryLog(log_path).read(0)] == ['r 0', 'r 1', 'after']
+
+
+def test_foreign_and_garbage_lines_are_skipped(log_path):
+    log = HistoryLog(log_path)
+    log.append({'prompt': 'first'})
+    with open(log_path, 'ab') as f:
+        f.write(b'garbage\n\n{"prompt": "foreign"}\n')
+    log.append({'prompt': 'last'})
+
+    assert [r['prompt'] for r in log.read(0)] == ['first', 'foreign', 'last']
+    assert [r['prompt'] for r in HistoryLog(log_path).read(0)] == ['first', 'foreign', 'last']
+
+
+def crash_mid_batch(log_path, cut):
+    """Append a batch of 3, then roll the files back to `cut` bytes into it with the old index"""
+    log = HistoryLog(log_path)
+    log.append_many(records(2, 'kept'))
+    with open(log.index_path, 'rb') as f:
+        index_before = f.read()
+    batch_start = os.path.getsize(log_path)
+    log.append_many(records(3, 'batch'))
+    with open(log_path, 'r+b') as f:
+        f.truncate(cut(batch_start, f.read()))
+    with open(log.index_path, 'wb') as f:
+        f.write(index_before)
+    return batch_start
+
+
+@pytest.mark.parametrize('where', ['line boundary', 'mid line'])
+def test_partial_batch_is_dropped(log_path, where):
+    def cut(batch_start, data):
+        # After the header and two complete records of the batch, or part way into the third
+        end_of_second = [i for i, b in enumerate(data) if b == ord('\n') and i > batch_start][2] + 1
+        return end_of_second if where == 'line boundary' else end_of_second + 5
+
+    batch_start = crash_mid_batch(log_path, cut)
+    reopened = HistoryLog(log_path)
+    assert reopened.read(0) == records(2, 'kept')
+    assert os.path.getsize(log_path) == batch_start
+
+
+def test_complete_batch_is_recovered(log_path):
+    crash_mid_batch(log_path, lambda batch_start, data: len(data))
+    assert HistoryLog(log_path).read(0) == records(2, 'kept') + records(3, 'batch')
+
+
+def test_damaged_line_drops_the_whole_batch(log_path):
+    log = HistoryLog(log_path)
+    log.append_many(records(5, 'batch'))
+    log.append({'prompt': 'after'})
+    with open(log_path, 'rb') as f:
+        lines = f.readlines()
+    lines[3] = b'{"prompt": "dama\n'  # Third of the five batch records
+    with open(log_path, 'wb') as f:
+        f.writelines(lines)
+    os.remove(log.index_path)
+
+    reopened = HistoryLog(log_path)
+    assert reopened.read(0) == [{'prompt': 'after'}]
+    reopened.append({'prompt': 'next'})
+    assert [r['prompt'] for r in HistoryLog(log_path).read(0)] == ['after', 'next']
+
+
+def test_clear_then_compact(log_path, monkeypatch):
+    monkeypatch.setattr(history_log, 'COMPACT_MIN_DEAD_BYTES', 1)
+    log = HistoryLog(log_path)
+    log.append_many(records(5))
+    log.clear()
+
+    assert len(log) == 0
+    assert log.compactions == 1
+    assert os.path.getsize(log_path) == 0
+    log.append({'prompt': 'fresh'})
+    assert HistoryLog(log_path).read(0) == [{'prompt': 'fresh'}]
+
+
+def test_crash_between_compaction_replaces(log_path, monkeypatch):
+    log = HistoryLog(log_path)
+    log.append_many(records(4, 'old'))
+    log.clear()
+    log.append_many(records(2, 'live'))
+
+    real_replace = os.replace
+    calls = []
+
+    def replace_then_crash(src, dst):
+        calls.append(dst)
+        if len(calls) == 2:
+            raise OSError('simulated crash')
+        real_replace(src, dst)
+
+    monkeypatch.setattr(history_log.os, 'replace', replace_then_crash)
+    with pytest.raises(OSError):
+        log.compact()
+    monkeypatch.undo()
+
+    # New log, old index: the index claims more bytes than the log holds and is rebuilt
+    reopened = HistoryLog(log_path)
+    assert reopened.read(0) == records(2, 'live')
+    reopened.append({'prompt': 'next'})
+    assert [r['prompt'] for r in HistoryLog(log_path).read(0)] == ['live 0', 'live 1', 'next']
@@ -0,0 +1,28 @@
+"""Prefix expansion and background catch-up of the history search index."""
+from instagen import history_search
+from instagen.history_log import HistoryLog
+from instagen.history_search import HistorySearchIndex
+
+
+def make_log(tmp_path, count):
+    log = HistoryLog(str(tmp_path / 'content_history.jsonl'))
+    log.append_many([{'caption': f'term{i:04d} shared', 'timestamp': '2025-07-18 01:00:00'} for i in range(count)])
+    return log
+
+
+def test_prefix_expands_every_matching_term(tmp_path):
+    index = HistorySearchIndex(make_log(tmp_path, 1500))
+    hits = index.search('term1*', limit=5000)
+    assert len(hits) == 500  # term1000..term1499, far more terms than any fixed expansion cap
+    assert {position for position, _ in hits} == set(range(1000, 1500))
+
+
+def test_large_backlog_is_indexed_in_the_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(history_search, 'SYNC_REFRESH_LIMIT', 10)
+    monkeypatch.setattr(history_search, 'REFRESH_BATCH', 100)
+    index = HistorySearchIndex(make_log(tmp_path, 1000))
+
+    index.search('shared')  # Answers from whatever is indexed, without waiting for the build
+    index.refresh_in_background().result()
+    assert index.pending() == 0
+    assert len(index.search('shared', limit=5000)) == 1000
@@ -0,0 +1,32 @@
+"""The shared history tail follows appends, clears and clears followed by appends."""
+from instagen.history_log import HistoryLog
+from instagen.history_service import HistoryService
+
+
+def prompts(records):
+    return [record['prompt'] for record in records]
+
+
+def test_appends_from_another_writer_are_folded_in(tmp_path):
+    path = str(tmp_path / 'image_history.jsonl')
+    service = HistoryService({'image': HistoryLog(path)})
+    HistoryLog(path).append_many([{'prompt': f'p {i}'} for i in range(3)])
+
+    assert service.refresh()
+    assert prompts(service.latest('image', 10)) == ['p 2', 'p 1', 'p 0']
+
+
+def test_clear_followed_by_appends_reloads_the_tail(tmp_path):
+    path = str(tmp_path / 'image_history.jsonl')
+    log = HistoryLog(path)
+    log.append_many([{'prompt': f'sunset beach {i}'} for i in range(6)])
+    service = HistoryService({'image': log})
+    assert service.count('image') == 6
+
+    other = HistoryLog(path)  # Another process: clears, then appends as many records as before
+    other.clear()
+    other.append_many([{'prompt': f'NEW {i}'} for i in range(6)])
+
+    assert service.refresh()
+    assert prompts(service.latest('image', 10)) == [f'NEW {i}' for i in range(5, -1, -1)]
+    assert service.get('image', 0) == {'prompt': 'NEW 0'}
@@ -0,0 +1,31 @@
+"""Upload palettes: one extraction per upload, reused by the content fallbacks."""
+import io
+
+import pytest
+from PIL import Image
+
+from instagen import content, palette
+
+
+def jpeg_bytes(color, size=(640, 480)):
+    buffered = io.BytesIO()
+    Image.new('RGB', size, color).save(buffered, format='JPEG')
+    return buffered.getvalue()
+
+
+def test_upload_is_extracted_once(monkeypatch):
+    data = jpeg_bytes((30, 160, 40))
+    first = palette.palette_for_upload(data)
+    assert first.share('green') > 0.9
+
+    monkeypatch.setattr(palette, 'extract_palette', lambda image: pytest.fail('extracted again'))
+    assert palette.palette_for_upload(data) is first
+
+
+def test_fallbacks_use_the_given_palette(monkeypatch):
+    warm = palette.palette_for_upload(jpeg_bytes((230, 120, 40)))
+    monkeypatch.setattr(content, 'extract_palette', lambda image: pytest.fail('extracted again'))
+    image = Image.new('RGB', (4000, 3000))  # Black: its own palette would not read as food
+
+    assert '#food' in content.create_generic_content_with_image_analysis(image, warm)['hashtags']
+    assert warm.tone() in content.analyze_image_colors_only(image, warm)['caption']
@@ -0,0 +1,83 @@
+"""Evicted payloads spill to the capped scratch cache, never into the history blob store."""
+import os
+
+from instagen import images
+from instagen.blob_store import BlobStore, image_reference
+from instagen.history import image_record
+from instagen.image_cache import ImageCache
+from instagen.images import GenerationResult, render_local_image
+from instagen.payload_cache import PayloadCache
+
+
+def make_cache(tmp_path, spill_bytes=10_000):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    spill = ImageCache(str(tmp_path / 'spill'), max_bytes=spill_bytes)
+    return store, PayloadCache(store, spill, max_bytes=2500)
+
+
+def blob_count(store):
+    return sum(len(files) for _, _, files in os.walk(store.directory))
+
+
+def test_evicted_payloads_spill_to_scratch_not_history(tmp_path):
+    store, cache = make_cache(tmp_path)
+    digests = [cache.put(bytes([i]) * 1000) for i in range(5)]
+
+    assert cache.stats()['spills'] == 3
+    assert blob_count(store) == 0
+    assert store.dedup_hits == 0
+    assert cache.get(digests[0]) == bytes([0]) * 1000  # Read back from scratch
+
+
+def test_scratch_is_size_capped(tmp_path):
+    store, cache = make_cache(tmp_path, spill_bytes=3000)
+    digests = [cache.put(bytes([i]) * 1000) for i in range(10)]
+
+    assert cache.stats()['spill_bytes'] <= 3000
+    assert cache.get(digests[0]) is None  # Oldest spill evicted; it was never in history
+
+
+def test_referenced_payload_is_promoted_to_the_blob_store(tmp_path):
+    store, cache = make_cache(tmp_path)
+    digest = cache.put(b'x' * 1000)
+    reference = image_reference(cache.get(digest), store)
+
+    assert reference['blob'] == digest
+    assert store.get(digest) == b'x' * 1000
+
+
+def test_a_digest_spilled_twice_is_written_and_counted_once(tmp_path):
+    store, cache = make_cache(tmp_path)
+    digest = cache.put(b'a' * 1000)
+    cache._entries.pop(digest)
+    cache._spilling[digest] = b'a' * 1000
+    cache._spill([digest, digest])  # Two evictions of the same digest racing
+
+    assert cache.stats()['spills'] == 1
+    assert cache.get(digest) == b'a' * 1000
+
+
+def lose_parked_payload(tmp_path, monkeypatch, result):
+    """Park a result's bytes, then push them out of memory and the scratch cache"""
+    store, cache = make_cache(tmp_path, spill_bytes=3000)
+    monkeypatch.setattr(images, 'get_payload_cache', lambda: cache)
+    monkeypatch.setattr(images, 'get_image_cache', lambda: ImageCache(str(tmp_path / 'renders')))
+    result.park()
+    for i in range(10):
+        cache.put(bytes([i]) * 1000)
+    assert cache.get(result.payload_digest) is None
+    return result
+
+
+def test_lost_reproducible_variant_is_regenerated(tmp_path, monkeypatch):
+    data = render_local_image('harbour at dusk', 'realistic', 7)
+    result = lose_parked_payload(tmp_path, monkeypatch,
+                                 GenerationResult('harbour at dusk', 'realistic', 'local', 7, image_bytes=data))
+    assert result.payload == data
+
+
+def test_lost_variant_that_cannot_be_regenerated_is_not_saved(tmp_path, monkeypatch):
+    result = lose_parked_payload(tmp_path, monkeypatch,
+                                 GenerationResult('harbour', 'realistic', 'dall-e', 7, image_bytes=b'z' * 1000))
+    assert result.payload is None
+    assert image_record(result, 'Realistic') is None
@@ -0,0 +1,100 @@
+"""Provider client against the local stub server: pooling, circuit breaker, pool timeout."""
+import threading
+import time
+
+import pytest
+import requests
+
+from instagen.provider_client import CircuitBreaker, CircuitOpenError, ProviderClient
+from tools.stub_image_server import start_stub_server
+
+
+@pytest.fixture
+def stub():
+    server = start_stub_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_reuse_one_pooled_connection(stub):
+    client = ProviderClient()
+    for i in range(5):
+        response = client.get(f"{stub.base_url}/image/{i}", timeout=5)
+        assert response.status_code == 200
+        assert response.content.startswith(b'\x89PNG')
+    assert stub.state.requests == 5
+    assert stub.state.connections == 1
+
+
+def test_breaker_opens_rejects_then_half_opens(stub):
+    client = ProviderClient(max_retries=0)
+    url = f"{stub.base_url}/image"
+    breaker = client.breaker(url)
+    breaker.reset_seconds = 0.2
+    stub.state.mode = 'fail'
+
+    for _ in range(breaker.failure_threshold):
+        assert client.get(url, timeout=5).status_code == 503
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        client.get(url, timeout=5)
+    assert stub.state.requests == breaker.failure_threshold  # Rejected without touching the host
+    assert breaker.rejected == 1
+
+    time.sleep(0.25)
+    stub.state.mode = 'ok'
+    assert client.get(url, timeout=5).status_code == 200  # The half-open probe
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # Second caller waits for the probe's verdict
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_unexpected_error_releases_the_probe(stub, monkeypatch):
+    client = ProviderClient(max_retries=0)
+    url = f"{stub.base_url}/image"
+    breaker = client.breaker(url)
+    breaker.reset_seconds = 0
+    breaker.failure_threshold = 1
+    breaker.record_failure()
+
+    def explode(*args, **kwargs):
+        raise RuntimeError("not a RequestException")
+
+    monkeypatch.setattr(client.session, 'get', explode)
+    with pytest.raises(RuntimeError):
+        client.get(url, timeout=5)
+    monkeypatch.undo()
+
+    assert client.get(url, timeout=5).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_saturated_pool_times_out_instead_of_blocking():
+    server = start_stub_server(mode='slow', delay=1.0)
+    try:
+        client = ProviderClient(pool_per_host=1, pool_timeout=0.2)
+        holder = threading.Thread(target=client.get, args=(f"{server.base_url}/slow",), kwargs={'timeout': 5})
+        holder.start()
+        time.sleep(0.1)  # Let the first request take the only connection
+
+        started = time.monotonic()
+        with pytest.raises(requests.ConnectionError):
+            client.get(f"{server.base_url}/waiting", timeout=5)
+        assert time.monotonic() - started < 0.9
+        holder.join()
+        assert client.breaker(server.base_url).failures == 0  # Local saturation is not a host failure
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,138 @@
+"""Local stub image provider for exercising the provider client offline.
+
+Serves random PNG images on any path and can simulate outages, slow
+responses and intermittent failures. It counts TCP connections separately
+from requests so connection reuse (keep-alive pooling) can be observed.
+
+Usage:
+    python tools/stub_image_server.py --port 8765 --mode ok
+    POLLINATIONS_BASE_URL=http://127.0.0.1:8765 streamlit run model.py
+
+Modes:
+    ok     every request returns a PNG
+    fail   every request returns HTTP 503
+    slow   every request sleeps --delay seconds before returning a PNG
+    flaky  every other request returns HTTP 503
+
+GET /stats returns {"requests": n, "connections": n, "failures": n} as JSON,
+and GET /mode/<name> switches the mode of a running server.
+"""
+import argparse
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODES = ('ok', 'fail', 'slow', 'flaky')
+
+
+def make_png(width=32, height=32):
+    """Encode random RGB noise as a PNG (incompressible, so always > 1000 bytes)"""
+    raw = b''.join(b'\x00' + os.urandom(width * 3) for _ in range(height))
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data
+                + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b''))
+
+
+class StubState:
+    """Mutable server configuration and counters shared by handler threads"""
+
+    def __init__(self, mode='ok', delay=2.0):
+        self.mode = mode
+        self.delay = delay
+        self.requests = 0
+        self.connections = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Required for keep-alive
+    state = None
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        state = self.state
+
+        if self.path == '/stats':
+            with state.lock:
+                stats = {'requests': state.requests, 'connections': state.connections,
+                         'failures': state.failures, 'mode': state.mode}
+            self._send(200, json.dumps(stats).encode(), 'application/json')
+            return
+
+        if self.path.startswith('/mode/'):
+            mode = self.path.split('/')[-1]
+            if mode not in MODES:
+                self._send(400, f'unknown mode {mode}'.encode(), 'text/plain')
+                return
+            with state.lock:
+                state.mode = mode
+            self._send(200, mode.encode(), 'text/plain')
+            return
+
+        with state.lock:
+            state.requests += 1
+            fail = state.mode == 'fail' or (state.mode == 'flaky' and state.requests % 2 == 0)
+            if fail:
+                state.failures += 1
+
+        if fail:
+            self._send(503, b'stub outage', 'text/plain')
+            return
+        if state.mode == 'slow':
+            time.sleep(state.delay)
+        self._send(200, make_png(), 'image/png')
+
+
+def start_stub_server(mode='ok', port=0, delay=2.0):
+    """Start the stub server on a background thread and return it"""
+    handler = type('BoundStubHandler', (StubHandler,), {'state': StubState(mode, delay)})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    server.state = handler.state
+    server.base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--mode', choices=MODES, default='ok')
+    parser.add_argument('--delay', type=float, default=2.0, help='Seconds to sleep in slow mode')
+    args = parser.parse_args()
+
+    server = start_stub_server(args.mode, args.port, args.delay)
+    print(f"Stub image server on {server.base_url} (mode: {args.mode})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()